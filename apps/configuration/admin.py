@@ -1,10 +1,12 @@
 # 文件路径: apps/configuration/admin.py
 
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.utils.html import format_html
 from solo.admin import SingletonModelAdmin
 from unfold.admin import ModelAdmin
 
-from .models import EncodingProfile, IntegrationSettings
+from .forms import DeliveryTargetForm
+from .models import DeliveryTarget, EncodingProfile, IntegrationSettings
 
 
 @admin.register(IntegrationSettings)
@@ -34,6 +36,52 @@ class IntegrationSettingsAdmin(ModelAdmin, SingletonModelAdmin):  # <-- 核心
 
 @admin.register(EncodingProfile)
 class EncodingProfileAdmin(ModelAdmin):
-    list_display = ("name", "is_default", "container", "modified")
-    list_filter = ("is_default",)  # 顺便也加一个过滤器
+    list_display = (
+        "name",
+        "is_default",
+        "is_annotation_proxy",
+        "enable_segmented",
+        "output_mode",
+        "container",
+        "benchmark_summary",
+        "modified",
+    )
+    list_filter = ("is_default", "is_annotation_proxy", "output_mode")  # 顺便也加一个过滤器
     search_fields = ("name", "description")
+    readonly_fields = ("benchmark_results",)
+    actions = ["run_benchmark_action"]
+
+    @admin.display(description="基准测试 (fps / 倍速 / 码率 / PSNR / SSIM)")
+    def benchmark_summary(self, obj):
+        r = obj.benchmark_results or {}
+        if not r:
+            return "—"
+        if "error" in r:
+            return format_html('<span style="color:#dc2626">{}</span>', r["error"].splitlines()[0])
+        return (
+            f"{r.get('encode_fps')} / {r.get('realtime_factor')}x / {r.get('bitrate_kbps')} kbps / "
+            f"{r.get('psnr')} / {r.get('ssim')}"
+        )
+
+    @admin.action(description="⏱️ 运行基准测试 (合成参考片段)")
+    def run_benchmark_action(self, request, queryset):
+        from apps.workflow.transcoding.tasks import run_profile_benchmark
+
+        run_profile_benchmark.delay(list(queryset.values_list("id", flat=True)))
+        self.message_user(request, f"已提交 {queryset.count()} 个配置的基准测试，完成后刷新本页查看结果。", messages.SUCCESS)
+
+
+@admin.register(DeliveryTarget)
+class DeliveryTargetAdmin(ModelAdmin):
+    form = DeliveryTargetForm
+    list_display = ("name", "kind", "is_active", "is_primary", "key_prefix", "bucket_name", "modified")
+    list_filter = ("kind", "is_active")
+    search_fields = ("name", "bucket_name")
+    fieldsets = (
+        (None, {"fields": ("name", "kind", ("is_active", "is_primary"), "key_prefix", "public_url_base")}),
+        ("本地媒体服务器", {"fields": ("local_root",)}),
+        (
+            "S3 / S3 兼容存储",
+            {"fields": ("bucket_name", "endpoint_url", "region_name", "access_key_id", "secret_access_key")},
+        ),
+    )
@@ -0,0 +1,27 @@
+# 文件路径: apps/configuration/forms.py
+
+from django import forms
+from unfold.widgets import UnfoldAdminPasswordInput
+
+from .models import DeliveryTarget
+
+
+class DeliveryTargetForm(forms.ModelForm):
+    """分发目标表单: Secret Key 以密码框输入且不回显，编辑时留空表示保持原值。"""
+
+    secret_access_key = forms.CharField(
+        label="Secret Access Key",
+        required=False,
+        widget=UnfoldAdminPasswordInput(render_value=False),
+        help_text="出于安全考虑不回显已保存的值；留空则保持不变。",
+    )
+
+    class Meta:
+        model = DeliveryTarget
+        fields = "__all__"
+
+    def clean_secret_access_key(self):
+        value = self.cleaned_data.get("secret_access_key")
+        if not value and self.instance.pk:
+            return self.instance.secret_access_key
+        return value
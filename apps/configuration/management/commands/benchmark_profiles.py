@@ -0,0 +1,50 @@
+# 文件路径: apps/configuration/management/commands/benchmark_profiles.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.configuration.models import EncodingProfile
+from apps.workflow.transcoding.services.benchmark import (
+    DEFAULT_CLIP_DURATION,
+    DEFAULT_CLIP_RATE,
+    DEFAULT_CLIP_SIZE,
+    benchmark_profiles,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks EncodingProfiles against a reference clip (synthesized with testsrc2 unless --clip is given) "
+        "and stores encode fps, realtime factor, bitrate, size and PSNR/SSIM on each profile."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--profile", type=int, action="append", help="Profile ID (repeatable). Default: all.")
+        parser.add_argument("--clip", help="Use an existing reference clip instead of synthesizing one.")
+        parser.add_argument("--duration", type=int, default=DEFAULT_CLIP_DURATION, help="Synthesized clip seconds.")
+        parser.add_argument("--size", default=DEFAULT_CLIP_SIZE, help="Synthesized clip size, e.g. 1920x1080.")
+        parser.add_argument("--rate", type=int, default=DEFAULT_CLIP_RATE, help="Synthesized clip frame rate.")
+
+    def handle(self, *args, **options):
+        profiles = EncodingProfile.objects.order_by("id")
+        if options["profile"]:
+            profiles = profiles.filter(id__in=options["profile"])
+        profiles = list(profiles)
+        if not profiles:
+            raise CommandError("No EncodingProfile matched.")
+
+        clip_options = {} if options["clip"] else {k: options[k] for k in ("duration", "size", "rate")}
+        self.stdout.write(f"⏱️ Benchmarking {len(profiles)} profile(s)...")
+        results = benchmark_profiles(profiles, clip_path=options["clip"], **clip_options)
+
+        header = f"{'profile':<32} {'fps':>8} {'x RT':>7} {'kbps':>9} {'MB':>8} {'PSNR':>7} {'SSIM':>7}"
+        self.stdout.write(header)
+        for profile in profiles:
+            r = results.get(profile.id, {})
+            if "error" in r:
+                self.stdout.write(self.style.ERROR(f"{profile.name[:32]:<32} failed: {r['error'].splitlines()[0]}"))
+                continue
+            self.stdout.write(
+                f"{profile.name[:32]:<32} {r['encode_fps'] or 0:>8.1f} {r['realtime_factor'] or 0:>7.2f} "
+                f"{r['bitrate_kbps'] or 0:>9.1f} {r['size_bytes'] / 1024**2:>8.2f} "
+                f"{str(r['psnr']):>7} {str(r['ssim']):>7}"
+            )
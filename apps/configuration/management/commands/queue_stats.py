@@ -0,0 +1,28 @@
+# 文件路径: apps/configuration/management/commands/queue_stats.py
+
+import redis
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.media_assets.services.scheduler import get_queue_stats, get_slot_usage
+
+
+class Command(BaseCommand):
+    help = "Shows queued/running task counts per Celery queue and current CPU slot usage."
+
+    def handle(self, *args, **options):
+        try:
+            stats = get_queue_stats()
+            usage = get_slot_usage()
+        except redis.RedisError as e:
+            raise CommandError(f"Cannot reach Redis broker: {e}")
+
+        self.stdout.write("📊 Queues:")
+        for queue, counts in stats.items():
+            running = counts["running"] if counts["running"] is not None else "n/a (no worker replied)"
+            self.stdout.write(f"  {queue:<8} queued={counts['queued']}  running={running}")  # noqa: E231
+
+        used = sum(usage.values())
+        self.stdout.write(f"🧮 CPU slots: {used}/{settings.SCHEDULER_CPU_SLOTS} in use")
+        for holder, slots in sorted(usage.items()):
+            self.stdout.write(f"  {holder}: {slots}")
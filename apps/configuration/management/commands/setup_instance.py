@@ -121,12 +121,20 @@ class Command(BaseCommand):
         self.stdout.write("🎞️ Creating default Encoding Profile for Annotation...")
 
         name = config("DEFAULT_ENCODING_NAME", "H.264 720p (1Mbps UltraFast)")
-        cmd = config("DEFAULT_FFMPEG_CMD", "-c:v libx264 -b:v 1M -vf scale=-2:720 -preset ultrafast")
+        cmd = config(
+            "DEFAULT_FFMPEG_CMD", "-c:v libx264 -b:v 1M -vf scale=-2:720 -preset ultrafast -movflags +faststart"
+        )
 
-        if EncodingProfile.objects.filter(is_default=True, name=name).exists():
+        existing = EncodingProfile.objects.filter(is_default=True, name=name).first()
+        if existing:
             self.stdout.write(
                 self.style.WARNING("Default Encoding Profile already exists with desired name. Skipping creation.")
             )
+            # 升级安装: 尚未指定标注代理配置时，沿用默认配置作为入库自动代理
+            if not EncodingProfile.objects.filter(is_annotation_proxy=True).exists():
+                existing.is_annotation_proxy = True
+                existing.save()
+                self.stdout.write(self.style.SUCCESS(f"Marked '{name}' as the annotation proxy profile."))
             return
 
         profile, created = EncodingProfile.objects.update_or_create(
@@ -136,6 +144,7 @@ class Command(BaseCommand):
                 "container": "mp4",
                 "ffmpeg_command": cmd,
                 "is_default": True,
+                "is_annotation_proxy": True,
             },
         )
 
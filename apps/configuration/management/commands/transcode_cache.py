@@ -0,0 +1,29 @@
+# 文件路径: apps/configuration/management/commands/transcode_cache.py
+
+from django.core.management.base import BaseCommand
+
+from apps.workflow.transcoding.services import cache as transcode_cache
+
+
+class Command(BaseCommand):
+    help = "Shows transcode cache hit/miss counters and usage; --evict trims the cache to its quota (LRU)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--evict", action="store_true", help="Evict least recently used entries over quota.")
+
+    def handle(self, *args, **options):
+        if options["evict"]:
+            removed, freed = transcode_cache.evict()
+            self.stdout.write(f"🧹 Evicted {removed} entries, freed {freed / 1024**2:.1f} MB")
+
+        stats = transcode_cache.get_cache_stats()
+        hits, misses = stats["hits"], stats["misses"]
+        if hits is None:
+            self.stdout.write("📊 Hits/misses: n/a (Redis unreachable)")
+        else:
+            lookups = hits + misses
+            ratio = f"{hits / lookups:.1%}" if lookups else "n/a"
+            self.stdout.write(f"📊 Hits: {hits}  Misses: {misses}  Hit ratio: {ratio}")
+        self.stdout.write(
+            f"💾 Entries: {stats['entries']}  Size: {stats['size'] / 1024**3:.2f} GB / {stats['quota'] / 1024**3:.2f} GB"
+        )
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.23 on 2026-10-17 03:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("configuration", "0006_integrationsettings_label_studio_access_token"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="encodingprofile",
+            name="is_annotation_proxy",
+            field=models.BooleanField(
+                default=False, help_text="勾选此项，媒资入库时会自动用此配置为每个媒体生成低码率代理文件，标注端优先播放。系统中只能有一个代理配置。", verbose_name="用作标注代理"
+            ),
+        ),
+    ]
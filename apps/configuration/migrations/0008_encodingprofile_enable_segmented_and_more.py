@@ -0,0 +1,31 @@
+# Generated by Django 4.2.23 on 2026-10-17 03:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("configuration", "0007_encodingprofile_is_annotation_proxy"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="encodingprofile",
+            name="enable_segmented",
+            field=models.BooleanField(
+                default=False, help_text="在关键帧处把源视频切成多段并行编码，再无损拼接。适合长视频，需要源视频已建立关键帧索引。", verbose_name="分段并行转码"
+            ),
+        ),
+        migrations.AddField(
+            model_name="encodingprofile",
+            name="min_segment_duration",
+            field=models.PositiveIntegerField(
+                default=60, help_text="源视频过短时自动减少分段数，避免分段开销大于收益。", verbose_name="最短分段时长 (秒)"
+            ),
+        ),
+        migrations.AddField(
+            model_name="encodingprofile",
+            name="segment_count",
+            field=models.PositiveSmallIntegerField(default=0, help_text="0 表示按 CPU 核数自动决定。", verbose_name="分段数"),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.23 on 2026-10-17 03:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("configuration", "0008_encodingprofile_enable_segmented_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="encodingprofile",
+            name="cpu_slots",
+            field=models.PositiveSmallIntegerField(
+                default=1,
+                help_text="调度器按此值占用全局 CPU 槽位 (SCHEDULER_CPU_SLOTS)。编码越重 (高分辨率、慢 preset、分段并行) 应设得越大。",
+                verbose_name="CPU 槽位",
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.23 on 2026-10-17 03:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("configuration", "0009_encodingprofile_cpu_slots"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="encodingprofile",
+            name="benchmark_results",
+            field=models.JSONField(blank=True, default=dict, verbose_name="基准测试结果"),
+        ),
+    ]
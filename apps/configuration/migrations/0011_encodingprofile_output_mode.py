@@ -0,0 +1,28 @@
+# Generated by Django 4.2.23 on 2026-10-17 03:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("configuration", "0010_encodingprofile_benchmark_results"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="encodingprofile",
+            name="hls_segment_duration",
+            field=models.PositiveSmallIntegerField(default=6, help_text="按此间隔强制关键帧并切片。", verbose_name="HLS 分片时长 (秒)"),
+        ),
+        migrations.AddField(
+            model_name="encodingprofile",
+            name="output_mode",
+            field=models.CharField(
+                choices=[("progressive", "单文件 (渐进式下载)"), ("hls", "HLS (fMP4 分片 + m3u8 播放列表)")],
+                default="progressive",
+                help_text="HLS 模式输出 index.m3u8 + init.mp4 + .m4s 分片，播放器按需加载分片，长视频拖动时无需缓冲整个文件。此模式忽略「输出容器格式」。",
+                max_length=16,
+                verbose_name="输出方式",
+            ),
+        ),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 4.2.23 on 2026-10-17 03:48
+
+import django.utils.timezone
+import model_utils.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("configuration", "0011_encodingprofile_output_mode"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeliveryTarget",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "created",
+                    model_utils.fields.AutoCreatedField(
+                        default=django.utils.timezone.now, editable=False, verbose_name="created"
+                    ),
+                ),
+                (
+                    "modified",
+                    model_utils.fields.AutoLastModifiedField(
+                        default=django.utils.timezone.now, editable=False, verbose_name="modified"
+                    ),
+                ),
+                ("name", models.CharField(help_text="例如：主存储桶、异地镜像", max_length=255, unique=True, verbose_name="目标名称")),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("local", "本地媒体服务器"), ("s3", "S3 / S3 兼容存储")],
+                        default="s3",
+                        max_length=10,
+                        verbose_name="目标类型",
+                    ),
+                ),
+                ("is_active", models.BooleanField(default=True, verbose_name="启用")),
+                (
+                    "is_primary",
+                    models.BooleanField(
+                        default=False,
+                        help_text="主目标的 URL 会回写到源对象 (如转码任务的 output_url)。系统中只能有一个主目标；未指定时取第一个启用的目标。",
+                        verbose_name="主目标",
+                    ),
+                ),
+                (
+                    "key_prefix",
+                    models.CharField(
+                        blank=True,
+                        default="",
+                        help_text="交付到目标时在相对路径前追加的前缀，例如 mirror/",
+                        max_length=255,
+                        verbose_name="路径前缀",
+                    ),
+                ),
+                (
+                    "local_root",
+                    models.CharField(
+                        blank=True, default="", help_text="留空表示 MEDIA_ROOT。", max_length=1024, verbose_name="本地根目录"
+                    ),
+                ),
+                ("bucket_name", models.CharField(blank=True, default="", max_length=255, verbose_name="Bucket Name")),
+                (
+                    "endpoint_url",
+                    models.URLField(
+                        blank=True,
+                        default="",
+                        help_text="S3 兼容服务地址 (如 MinIO)；AWS 留空。",
+                        max_length=1024,
+                        verbose_name="Endpoint URL",
+                    ),
+                ),
+                ("region_name", models.CharField(blank=True, default="", max_length=255, verbose_name="Region Name")),
+                (
+                    "access_key_id",
+                    models.CharField(blank=True, default="", max_length=255, verbose_name="Access Key ID"),
+                ),
+                (
+                    "secret_access_key",
+                    models.CharField(blank=True, default="", max_length=255, verbose_name="Secret Access Key"),
+                ),
+                (
+                    "public_url_base",
+                    models.CharField(
+                        blank=True,
+                        default="",
+                        help_text="生成交付 URL 时使用，例如 CDN 域名 https://cdn.example.com。留空时本地目标使用媒体服务器地址，S3 目标使用存储桶地址。",
+                        max_length=1024,
+                        verbose_name="访问 URL 前缀",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "分发目标",
+                "verbose_name_plural": "分发目标",
+                "ordering": ["-is_primary", "name"],
+            },
+        ),
+    ]
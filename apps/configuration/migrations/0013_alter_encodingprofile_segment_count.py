@@ -0,0 +1,19 @@
+# Generated by Django 4.2.23 on 2026-10-17 04:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("configuration", "0012_deliverytarget"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="encodingprofile",
+            name="segment_count",
+            field=models.PositiveSmallIntegerField(
+                default=0, help_text="0 表示等于 CPU 槽位数。并发编码的分段数与线程数不超过 CPU 槽位。", verbose_name="分段数"
+            ),
+        ),
+    ]
@@ -84,6 +84,50 @@ class EncodingProfile(TimeStampedModel):
         default=False, verbose_name="设为默认", help_text="勾选此项，在启动转码项目时将默认选中此配置。系统中只能有一个默认配置。"
     )
 
+    is_annotation_proxy = models.BooleanField(
+        default=False,
+        verbose_name="用作标注代理",
+        help_text="勾选此项，媒资入库时会自动用此配置为每个媒体生成低码率代理文件，标注端优先播放。系统中只能有一个代理配置。",
+    )
+
+    # --- 输出方式 ---
+    OUTPUT_MODE_CHOICES = (
+        ("progressive", "单文件 (渐进式下载)"),
+        ("hls", "HLS (fMP4 分片 + m3u8 播放列表)"),
+    )
+    output_mode = models.CharField(
+        max_length=16,
+        choices=OUTPUT_MODE_CHOICES,
+        default="progressive",
+        verbose_name="输出方式",
+        help_text="HLS 模式输出 index.m3u8 + init.mp4 + .m4s 分片，播放器按需加载分片，长视频拖动时无需缓冲整个文件。" "此模式忽略「输出容器格式」。",
+    )
+    hls_segment_duration = models.PositiveSmallIntegerField(
+        default=6, verbose_name="HLS 分片时长 (秒)", help_text="按此间隔强制关键帧并切片。"
+    )
+
+    cpu_slots = models.PositiveSmallIntegerField(
+        default=1,
+        verbose_name="CPU 槽位",
+        help_text="调度器按此值占用全局 CPU 槽位 (SCHEDULER_CPU_SLOTS)。编码越重 (高分辨率、慢 preset、分段并行) 应设得越大。",
+    )
+
+    # --- 分段并行转码 ---
+    enable_segmented = models.BooleanField(
+        default=False,
+        verbose_name="分段并行转码",
+        help_text="在关键帧处把源视频切成多段并行编码，再无损拼接。适合长视频，需要源视频已建立关键帧索引。",
+    )
+    segment_count = models.PositiveSmallIntegerField(
+        default=0, verbose_name="分段数", help_text="0 表示等于 CPU 槽位数。并发编码的分段数与线程数不超过 CPU 槽位。"
+    )
+    min_segment_duration = models.PositiveIntegerField(
+        default=60, verbose_name="最短分段时长 (秒)", help_text="源视频过短时自动减少分段数，避免分段开销大于收益。"
+    )
+
+    # 最近一次基准测试结果 (编码 fps、倍速、码率、体积、PSNR/SSIM 及测试环境)，由 benchmark_profiles 命令或后台动作写入
+    benchmark_results = models.JSONField(default=dict, blank=True, verbose_name="基准测试结果")
+
     def save(self, *args, **kwargs):
         """
         重写 save 方法以确保只有一个 profile 是默认的。
@@ -94,9 +138,17 @@ class EncodingProfile(TimeStampedModel):
             # .exclude(pk=self.pk) 确保我们不会取消当前实例的勾选
             EncodingProfile.objects.exclude(pk=self.pk).update(is_default=False)
 
+        # 标注代理配置同样保持唯一
+        if self.is_annotation_proxy:
+            EncodingProfile.objects.exclude(pk=self.pk).update(is_annotation_proxy=False)
+
         # 调用父类的 save 方法，正常保存当前实例
         super().save(*args, **kwargs)
 
+    @property
+    def is_hls(self) -> bool:
+        return self.output_mode == "hls"
+
     def __str__(self):
         return self.name
 
@@ -104,3 +156,68 @@ class EncodingProfile(TimeStampedModel):
         verbose_name = "编码配置"
         verbose_name_plural = "编码配置"
         ordering = ["-created"]
+
+
+class DeliveryTarget(TimeStampedModel):
+    """
+    一个分发目标 (本地媒体服务器、S3 存储桶、S3 兼容镜像等)。
+    分发任务把同一份产出并发交付到所有启用的目标；未配置任何目标时按“集成设置”中的存储后端交付。
+    """
+
+    KIND_CHOICES = (
+        ("local", "本地媒体服务器"),
+        ("s3", "S3 / S3 兼容存储"),
+    )
+
+    name = models.CharField(max_length=255, unique=True, verbose_name="目标名称", help_text="例如：主存储桶、异地镜像")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default="s3", verbose_name="目标类型")
+    is_active = models.BooleanField(default=True, verbose_name="启用")
+    is_primary = models.BooleanField(
+        default=False,
+        verbose_name="主目标",
+        help_text="主目标的 URL 会回写到源对象 (如转码任务的 output_url)。系统中只能有一个主目标；未指定时取第一个启用的目标。",
+    )
+    key_prefix = models.CharField(
+        max_length=255, blank=True, default="", verbose_name="路径前缀", help_text="交付到目标时在相对路径前追加的前缀，例如 mirror/"
+    )
+
+    # --- 本地媒体服务器 ---
+    local_root = models.CharField(
+        max_length=1024, blank=True, default="", verbose_name="本地根目录", help_text="留空表示 MEDIA_ROOT。"
+    )
+
+    # --- S3 / S3 兼容存储 ---
+    bucket_name = models.CharField(max_length=255, blank=True, default="", verbose_name="Bucket Name")
+    endpoint_url = models.URLField(
+        max_length=1024, blank=True, default="", verbose_name="Endpoint URL", help_text="S3 兼容服务地址 (如 MinIO)；AWS 留空。"
+    )
+    region_name = models.CharField(max_length=255, blank=True, default="", verbose_name="Region Name")
+    access_key_id = models.CharField(max_length=255, blank=True, default="", verbose_name="Access Key ID")
+    secret_access_key = models.CharField(max_length=255, blank=True, default="", verbose_name="Secret Access Key")
+
+    public_url_base = models.CharField(
+        max_length=1024,
+        blank=True,
+        default="",
+        verbose_name="访问 URL 前缀",
+        help_text="生成交付 URL 时使用，例如 CDN 域名 https://cdn.example.com。留空时本地目标使用媒体服务器地址，S3 目标使用存储桶地址。",
+    )
+
+    def clean(self):
+        super().clean()
+        if self.kind == "s3" and not self.bucket_name:
+            raise ValidationError("S3 目标必须填写 Bucket Name。")
+
+    def save(self, *args, **kwargs):
+        # 主目标保持唯一
+        if self.is_primary:
+            DeliveryTarget.objects.exclude(pk=self.pk).update(is_primary=False)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        verbose_name = "分发目标"
+        verbose_name_plural = "分发目标"
+        ordering = ["-is_primary", "name"]
@@ -4,12 +4,12 @@ from django.contrib import admin
 from django.db import models
 from django.urls import path, reverse
 from django.utils.html import format_html
-from unfold.admin import ModelAdmin
+from unfold.admin import ModelAdmin, StackedInline
 from unfold.contrib.forms.widgets import WysiwygWidget
 from unfold.decorators import display
 
 from . import views
-from .models import Asset, Media
+from .models import Asset, KeyframeIndex, Media, MediaProbe
 
 
 @admin.register(Asset)
@@ -67,6 +67,22 @@ class AssetAdmin(ModelAdmin):
                 self.admin_site.admin_view(views.batch_file_upload_view),
                 name="%s_%s_batch_upload_api" % info,
             ),
+            # 断点续传协议: 创建/恢复会话 -> PUT 分块 (Content-Range) -> 服务端组装
+            path(
+                "<path:asset_id>/api/upload-sessions/",
+                self.admin_site.admin_view(views.upload_session_create_view),
+                name="%s_%s_upload_sessions" % info,
+            ),
+            path(
+                "<path:asset_id>/api/upload-sessions/<uuid:session_id>/",
+                self.admin_site.admin_view(views.upload_session_detail_view),
+                name="%s_%s_upload_session_detail" % info,
+            ),
+            path(
+                "<path:asset_id>/api/upload-sessions/<uuid:session_id>/complete/",
+                self.admin_site.admin_view(views.upload_session_complete_view),
+                name="%s_%s_upload_session_complete" % info,
+            ),
             path(
                 "<path:asset_id>/trigger-ingest/",
                 self.admin_site.admin_view(views.trigger_ingest_task),
@@ -76,6 +92,44 @@ class AssetAdmin(ModelAdmin):
         return custom_urls + urls
 
 
+class MediaProbeInline(StackedInline):
+    """入库时的 ffprobe 探测结果 (只读)。"""
+
+    model = MediaProbe
+    extra = 0
+    can_delete = False
+    readonly_fields = (
+        "format_name",
+        "duration",
+        "bit_rate",
+        "size",
+        "video_codec",
+        "width",
+        "height",
+        "frame_rate",
+        "audio_codec",
+        "audio_sample_rate",
+        "audio_channels",
+    )
+    exclude = ("streams",)
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+class KeyframeIndexInline(StackedInline):
+    """关键帧索引概要 (只读，二进制数据不展示)。"""
+
+    model = KeyframeIndex
+    extra = 0
+    can_delete = False
+    readonly_fields = ("count", "duration", "modified")
+    exclude = ("data",)
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Media)
 class MediaAdmin(ModelAdmin):
     """
@@ -100,12 +154,14 @@ class MediaAdmin(ModelAdmin):
     # [修复] 移除 processed_video_url 引用
     fieldsets = (
         ("基本信息", {"fields": ("asset", "title", "sequence_number")}),
-        ("源文件", {"classes": ("collapse",), "fields": ("source_video", "source_subtitle")}),
+        ("源文件", {"classes": ("collapse",), "fields": ("source_video", "source_subtitle", "blob")}),
+        ("派生文件", {"classes": ("collapse",), "fields": ("thumbnails_vtt", "waveform_peaks")}),
     )
 
     # [修复] 移除不存在的 readonly_fields
     # source_video 和 source_subtitle 是 FileField，Admin 默认会以链接形式显示
     # 如果您希望它们只读，可以放进来，但不要放已删除的 xxx_url 字段
-    readonly_fields = ()
+    readonly_fields = ("blob", "thumbnails_vtt", "waveform_peaks")
+    inlines = [MediaProbeInline, KeyframeIndexInline]
 
     # 移除所有自定义的 get_urls 和 action 方法
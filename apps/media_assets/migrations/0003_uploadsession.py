@@ -0,0 +1,61 @@
+# Generated by Django 4.2.23 on 2026-10-17 03:19
+
+import uuid
+
+import django.db.models.deletion
+import django.utils.timezone
+import model_utils.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("media_assets", "0002_remove_media_processed_video_url_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UploadSession",
+            fields=[
+                (
+                    "created",
+                    model_utils.fields.AutoCreatedField(
+                        default=django.utils.timezone.now, editable=False, verbose_name="created"
+                    ),
+                ),
+                (
+                    "modified",
+                    model_utils.fields.AutoLastModifiedField(
+                        default=django.utils.timezone.now, editable=False, verbose_name="modified"
+                    ),
+                ),
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("filename", models.CharField(max_length=255, verbose_name="文件名")),
+                ("total_size", models.BigIntegerField(verbose_name="文件总大小 (bytes)")),
+                ("received_size", models.BigIntegerField(default=0, verbose_name="已接收大小 (bytes)")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("uploading", "上传中"), ("completed", "已完成"), ("failed", "失败")],
+                        default="uploading",
+                        max_length=20,
+                        verbose_name="状态",
+                    ),
+                ),
+                (
+                    "asset",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="upload_sessions",
+                        to="media_assets.asset",
+                        verbose_name="所属资产",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "上传会话",
+                "verbose_name_plural": "上传会话",
+                "ordering": ["-created"],
+            },
+        ),
+    ]
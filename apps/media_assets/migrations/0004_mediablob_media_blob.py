@@ -0,0 +1,59 @@
+# Generated by Django 4.2.23 on 2026-10-17 03:20
+
+import django.db.models.deletion
+import django.utils.timezone
+import model_utils.fields
+from django.db import migrations, models
+
+import apps.media_assets.models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("media_assets", "0003_uploadsession"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MediaBlob",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "created",
+                    model_utils.fields.AutoCreatedField(
+                        default=django.utils.timezone.now, editable=False, verbose_name="created"
+                    ),
+                ),
+                (
+                    "modified",
+                    model_utils.fields.AutoLastModifiedField(
+                        default=django.utils.timezone.now, editable=False, verbose_name="modified"
+                    ),
+                ),
+                ("sha256", models.CharField(max_length=64, unique=True, verbose_name="SHA-256")),
+                (
+                    "file",
+                    models.FileField(
+                        max_length=255, upload_to=apps.media_assets.models.get_blob_upload_path, verbose_name="文件"
+                    ),
+                ),
+                ("size", models.BigIntegerField(default=0, verbose_name="文件大小 (bytes)")),
+            ],
+            options={
+                "verbose_name": "媒体内容块 (Blob)",
+                "verbose_name_plural": "媒体内容块 (Blob)",
+            },
+        ),
+        migrations.AddField(
+            model_name="media",
+            name="blob",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="medias",
+                to="media_assets.mediablob",
+                verbose_name="内容块 (Blob)",
+            ),
+        ),
+    ]
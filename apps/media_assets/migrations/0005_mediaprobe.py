@@ -0,0 +1,58 @@
+# Generated by Django 4.2.23 on 2026-10-17 03:22
+
+import django.db.models.deletion
+import django.utils.timezone
+import model_utils.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("media_assets", "0004_mediablob_media_blob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MediaProbe",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "created",
+                    model_utils.fields.AutoCreatedField(
+                        default=django.utils.timezone.now, editable=False, verbose_name="created"
+                    ),
+                ),
+                (
+                    "modified",
+                    model_utils.fields.AutoLastModifiedField(
+                        default=django.utils.timezone.now, editable=False, verbose_name="modified"
+                    ),
+                ),
+                ("format_name", models.CharField(blank=True, max_length=100, verbose_name="容器格式")),
+                ("duration", models.FloatField(blank=True, null=True, verbose_name="时长 (秒)")),
+                ("bit_rate", models.BigIntegerField(blank=True, null=True, verbose_name="总码率 (bps)")),
+                ("size", models.BigIntegerField(blank=True, null=True, verbose_name="文件大小 (bytes)")),
+                ("video_codec", models.CharField(blank=True, max_length=50, verbose_name="视频编码")),
+                ("width", models.PositiveIntegerField(blank=True, null=True, verbose_name="宽度")),
+                ("height", models.PositiveIntegerField(blank=True, null=True, verbose_name="高度")),
+                ("frame_rate", models.FloatField(blank=True, null=True, verbose_name="帧率")),
+                ("audio_codec", models.CharField(blank=True, max_length=50, verbose_name="音频编码")),
+                ("audio_sample_rate", models.PositiveIntegerField(blank=True, null=True, verbose_name="音频采样率")),
+                ("audio_channels", models.PositiveSmallIntegerField(blank=True, null=True, verbose_name="音频声道数")),
+                ("streams", models.JSONField(blank=True, default=list, verbose_name="流信息")),
+                (
+                    "media",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="probe",
+                        to="media_assets.media",
+                        verbose_name="媒体文件",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "媒体探测信息",
+                "verbose_name_plural": "媒体探测信息",
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.23 on 2026-10-17 03:24
+
+import django.db.models.deletion
+import django.utils.timezone
+import model_utils.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("media_assets", "0005_mediaprobe"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="KeyframeIndex",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "created",
+                    model_utils.fields.AutoCreatedField(
+                        default=django.utils.timezone.now, editable=False, verbose_name="created"
+                    ),
+                ),
+                (
+                    "modified",
+                    model_utils.fields.AutoLastModifiedField(
+                        default=django.utils.timezone.now, editable=False, verbose_name="modified"
+                    ),
+                ),
+                ("data", models.BinaryField(verbose_name="关键帧时间戳 (uint32 毫秒)")),
+                ("count", models.PositiveIntegerField(default=0, verbose_name="关键帧数量")),
+                ("duration", models.FloatField(blank=True, null=True, verbose_name="时长 (秒)")),
+                (
+                    "media",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="keyframe_index",
+                        to="media_assets.media",
+                        verbose_name="媒体文件",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "关键帧索引",
+                "verbose_name_plural": "关键帧索引",
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.23 on 2026-10-17 03:27
+
+from django.db import migrations, models
+
+import apps.media_assets.models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("media_assets", "0006_keyframeindex"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="media",
+            name="thumbnails_vtt",
+            field=models.FileField(
+                blank=True,
+                max_length=255,
+                null=True,
+                upload_to=apps.media_assets.models.get_thumbnail_upload_path,
+                verbose_name="缩略图索引 (WebVTT)",
+            ),
+        ),
+    ]
@@ -1,10 +1,15 @@
 # 文件路径: apps/media_assets/models.py
 
 import logging
+import sys
 import uuid
+from array import array
+from bisect import bisect_right
+from pathlib import Path
 
 from django.conf import settings
 from django.db import models
+from django.utils.functional import cached_property
 from model_utils.models import TimeStampedModel
 
 logger = logging.getLogger(__name__)
@@ -19,6 +24,40 @@ def get_subtitle_upload_path(instance, filename):
     return f"source_files/{instance.asset.id}/subtitles/{filename}"
 
 
+def get_thumbnail_upload_path(instance, filename):
+    # 与源文件同级: 每个 Media 一个目录，WebVTT 与雪碧图放在一起，VTT 内以相对路径引用图片
+    return f"source_files/{instance.asset.id}/thumbnails/{instance.id}/{filename}"
+
+
+def get_waveform_upload_path(instance, filename):
+    return f"source_files/{instance.asset.id}/waveforms/{instance.id}/{filename}"
+
+
+def get_blob_upload_path(instance, filename):
+    # 内容寻址: blobs/sha256/ab/cd/<sha256>.<ext>，两级目录避免单目录文件过多
+    digest = instance.sha256
+    return f"blobs/sha256/{digest[:2]}/{digest[2:4]}/{filename}"
+
+
+# --- MediaBlob 模型 (内容寻址存储) ---
+class MediaBlob(TimeStampedModel):
+    """
+    按 SHA-256 寻址的源视频实体。
+    内容相同的源视频 (重剪、多语言版本等重复上传) 只存储一份，多个 Media 指向同一个 Blob。
+    """
+
+    sha256 = models.CharField(max_length=64, unique=True, verbose_name="SHA-256")
+    file = models.FileField(upload_to=get_blob_upload_path, max_length=255, verbose_name="文件")
+    size = models.BigIntegerField(default=0, verbose_name="文件大小 (bytes)")
+
+    def __str__(self):
+        return self.sha256
+
+    class Meta:
+        verbose_name = "媒体内容块 (Blob)"
+        verbose_name_plural = "媒体内容块 (Blob)"
+
+
 # --- Asset 模型 (保持不变) ---
 class Asset(TimeStampedModel):
     ASSET_TYPE_CHOICES = (("short_drama", "短剧"), ("movie", "电影"))
@@ -66,51 +105,104 @@ class Media(TimeStampedModel):
         upload_to=get_subtitle_upload_path, blank=True, null=True, verbose_name="源字幕文件 (SRT)"
     )
 
+    # 内容寻址: 入库时计算 SHA-256，source_video 指向 Blob 的存储路径
+    blob = models.ForeignKey(
+        MediaBlob,
+        on_delete=models.PROTECT,
+        related_name="medias",
+        blank=True,
+        null=True,
+        verbose_name="内容块 (Blob)",
+    )
+
+    # 缩略图索引 (WebVTT)，同目录下的雪碧图由其引用
+    thumbnails_vtt = models.FileField(
+        upload_to=get_thumbnail_upload_path, max_length=255, blank=True, null=True, verbose_name="缩略图索引 (WebVTT)"
+    )
+
+    # 音频波形峰值 (audiowaveform .dat)，供字幕编辑器直接绘制，无需在浏览器端解码整条音轨
+    waveform_peaks = models.FileField(
+        upload_to=get_waveform_upload_path, max_length=255, blank=True, null=True, verbose_name="波形峰值 (.dat)"
+    )
+
     # [已删除] processed_video_url 及相关 property
     # [已删除] source_subtitle_url 及相关 property
 
     def __str__(self):
         return f"{self.asset.title} - {self.sequence_number:02d} - {self.title}"  # noqa: E231
 
+    @property
+    def content_hash(self):
+        """源视频的 SHA-256 (未入内容库的历史数据返回 None)。"""
+        return self.blob.sha256 if self.blob_id else None
+
     def get_best_playback_url(self, encoding_profile=None):
         """
         [业务逻辑] 智能获取最佳播放地址 (绝对路径)。
         策略:
         1. 如果提供了 encoding_profile，优先查找匹配且已完成的 TranscodingJob。
-        2. 如果找不到转码结果，回退到 source_video。
-        3. 强制确保返回的是指向 Nginx (9999) 的绝对 URL。
+        2. 其次使用标注代理 (EncodingProfile.is_annotation_proxy) 的 HLS 播放列表 (分片按需加载，长视频拖动无需大量缓冲)。
+        3. 再次使用入库时自动生成的标注代理 (低码率 fast-start)。
+        4. 没有标注代理时，使用其他配置的 HLS 播放列表 (例如交付用的高码率版本，仍比源文件易于拖动)。
+        5. 如果找不到转码结果，回退到 source_video。
+        6. 强制确保返回的是指向 Nginx (9999) 的绝对 URL。
         """
 
         target_url = None
 
         # 1. 尝试查找转码任务
         if encoding_profile:
-            try:
-                # [延迟导入] 避免 Circular Import (Media <-> TranscodingJob)
-                from apps.workflow.transcoding.projects import TranscodingJob
-
-                job = (
-                    TranscodingJob.objects.filter(
-                        media=self, profile=encoding_profile, status=TranscodingJob.STATUS.COMPLETED
-                    )
-                    .order_by("-modified")
-                    .first()
-                )
-
-                if job and job.output_url:
-                    target_url = job.output_url
-            except Exception as e:
-                logger.warning(f"查找转码任务失败: {e}")
-
-        # 2. 兜底策略：使用源文件
+            target_url = self._get_transcoded_url(profile=encoding_profile)
+
+        # 2. 标注代理的 HLS 播放列表 (高码率的交付版 HLS 不能替代低码率代理)
+        if not target_url:
+            target_url = self._get_transcoded_url(profile__is_annotation_proxy=True, profile__output_mode="hls")
+
+        # 3. 标注代理 (低码率 fast-start，适合浏览器直接播放)
+        if not target_url:
+            target_url = self._get_transcoded_url(profile__is_annotation_proxy=True)
+
+        # 4. 其他 HLS 播放列表
+        if not target_url:
+            target_url = self._get_transcoded_url(profile__output_mode="hls")
+
+        # 5. 兜底策略：使用源文件
         if not target_url and self.source_video:
             # EdgeLocalStorage 已经保证了这里是 http://... 的绝对路径
             # 但为了双重保险 (防止有人改回 FileSystemStorage)，下方会统一处理
             target_url = self.source_video.url
 
-        # 3. 统一格式化为绝对路径 (Private Helper Logic)
+        # 6. 统一格式化为绝对路径 (Private Helper Logic)
         return self.ensure_absolute_url(target_url)
 
+    def _get_transcoded_url(self, **profile_filter):
+        """查找本 Media 最近一次已完成的转码任务的输出 URL (多个候选时标注代理配置优先)。"""
+        try:
+            # [延迟导入] 避免 Circular Import (Media <-> TranscodingJob)
+            from apps.workflow.models import TranscodingJob
+
+            job = (
+                TranscodingJob.objects.filter(media=self, status=TranscodingJob.STATUS.COMPLETED, **profile_filter)
+                .order_by("-profile__is_annotation_proxy", "-modified")
+                .first()
+            )
+            return job.output_url if job and job.output_url else None
+        except Exception as e:
+            logger.warning(f"查找转码任务失败: {e}")
+            return None
+
+    def get_thumbnails_url(self):
+        """缩略图 WebVTT 的绝对 URL，尚未生成时返回空字符串。"""
+        if not self.thumbnails_vtt:
+            return ""
+        return self.ensure_absolute_url(self.thumbnails_vtt.url)
+
+    def get_waveform_url(self):
+        """波形峰值文件的绝对 URL，尚未生成时返回空字符串。"""
+        if not self.waveform_peaks:
+            return ""
+        return self.ensure_absolute_url(self.waveform_peaks.url)
+
     def ensure_absolute_url(self, url_path):
         """
         确保 URL 是绝对路径 (http/https 开头)。
@@ -132,3 +224,155 @@ class Media(TimeStampedModel):
         verbose_name = "媒体文件 (Media)"
         verbose_name_plural = "媒体文件 (Media)"
         ordering = ["asset", "sequence_number"]
+
+
+# --- UploadSession 模型 (断点续传) ---
+class UploadSession(TimeStampedModel):
+    """
+    一次可续传的分块上传会话。
+    客户端按偏移量 (Content-Range) 顺序追加分块，分块直接写入 .part 文件；
+    received_size 只在分块校验通过后推进，是续传偏移量的唯一依据。
+    """
+
+    STATUS_CHOICES = (("uploading", "上传中"), ("completed", "已完成"), ("failed", "失败"))
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name="upload_sessions", verbose_name="所属资产")
+    filename = models.CharField(max_length=255, verbose_name="文件名")
+    total_size = models.BigIntegerField(verbose_name="文件总大小 (bytes)")
+    received_size = models.BigIntegerField(default=0, verbose_name="已接收大小 (bytes)")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="uploading", verbose_name="状态")
+
+    @property
+    def upload_dir(self) -> Path:
+        return Path(settings.MEDIA_ROOT) / "batch_uploads" / str(self.asset_id)
+
+    @property
+    def part_path(self) -> Path:
+        # 放在隐藏子目录中，避免被 ingest_media_files 的 glob 扫描到
+        return self.upload_dir / ".sessions" / f"{self.id}.part"
+
+    @property
+    def target_path(self) -> Path:
+        return self.upload_dir / self.filename
+
+    def __str__(self):
+        return f"{self.filename} ({self.received_size}/{self.total_size})"
+
+    class Meta:
+        verbose_name = "上传会话"
+        verbose_name_plural = "上传会话"
+        ordering = ["-created"]
+
+
+# --- MediaProbe 模型 (探测结果缓存) ---
+class MediaProbe(TimeStampedModel):
+    """
+    入库时由 ffprobe 探测一次的媒体元数据。
+    下游 (转码、合成、调度估算、校验) 统一从数据库读取，不再重复打开文件探测。
+    """
+
+    media = models.OneToOneField(Media, on_delete=models.CASCADE, related_name="probe", verbose_name="媒体文件")
+
+    # --- 容器级信息 (ffprobe format) ---
+    format_name = models.CharField(max_length=100, blank=True, verbose_name="容器格式")
+    duration = models.FloatField(blank=True, null=True, verbose_name="时长 (秒)")
+    bit_rate = models.BigIntegerField(blank=True, null=True, verbose_name="总码率 (bps)")
+    size = models.BigIntegerField(blank=True, null=True, verbose_name="文件大小 (bytes)")
+
+    # --- 主视频流 ---
+    video_codec = models.CharField(max_length=50, blank=True, verbose_name="视频编码")
+    width = models.PositiveIntegerField(blank=True, null=True, verbose_name="宽度")
+    height = models.PositiveIntegerField(blank=True, null=True, verbose_name="高度")
+    frame_rate = models.FloatField(blank=True, null=True, verbose_name="帧率")
+
+    # --- 主音频流 ---
+    audio_codec = models.CharField(max_length=50, blank=True, verbose_name="音频编码")
+    audio_sample_rate = models.PositiveIntegerField(blank=True, null=True, verbose_name="音频采样率")
+    audio_channels = models.PositiveSmallIntegerField(blank=True, null=True, verbose_name="音频声道数")
+
+    # 完整的流布局 (ffprobe streams 原样保存)
+    streams = models.JSONField(default=list, blank=True, verbose_name="流信息")
+
+    @property
+    def has_video(self) -> bool:
+        return bool(self.video_codec)
+
+    @property
+    def has_audio(self) -> bool:
+        return bool(self.audio_codec)
+
+    @property
+    def estimated_frames(self):
+        """估算总帧数，用于调度与进度估算。"""
+        if self.duration and self.frame_rate:
+            return int(self.duration * self.frame_rate)
+        return None
+
+    def __str__(self):
+        return f"{self.format_name} {self.video_codec} {self.width}x{self.height} {self.duration}s"
+
+    class Meta:
+        verbose_name = "媒体探测信息"
+        verbose_name_plural = "媒体探测信息"
+
+
+# --- KeyframeIndex 模型 (关键帧索引) ---
+class KeyframeIndex(TimeStampedModel):
+    """
+    每个 Media 的关键帧时间戳索引，入库时提取一次。
+    时间戳以毫秒为单位存为小端 uint32 数组 (array('I'))，一小时 2 秒 GOP 的视频仅约 7KB。
+    提供"t 之前最近的关键帧"与"区间是否 GOP 对齐"查询，供裁切逻辑决定能否直接流复制。
+    """
+
+    # 判断时间点是否落在关键帧上的默认容差 (秒)，约等于 25fps 下半帧
+    DEFAULT_TOLERANCE = 0.02
+
+    media = models.OneToOneField(Media, on_delete=models.CASCADE, related_name="keyframe_index", verbose_name="媒体文件")
+    data = models.BinaryField(verbose_name="关键帧时间戳 (uint32 毫秒)")
+    count = models.PositiveIntegerField(default=0, verbose_name="关键帧数量")
+    duration = models.FloatField(blank=True, null=True, verbose_name="时长 (秒)")
+
+    @staticmethod
+    def pack(timestamps_ms) -> bytes:
+        arr = array("I", sorted(timestamps_ms))
+        if sys.byteorder == "big":
+            arr.byteswap()
+        return arr.tobytes()
+
+    @cached_property
+    def timestamps_ms(self) -> array:
+        arr = array("I")
+        arr.frombytes(bytes(self.data))
+        if sys.byteorder == "big":
+            arr.byteswap()
+        return arr
+
+    def keyframe_at_or_before(self, t: float):
+        """返回 t (秒) 处或之前最近的关键帧时间 (秒)；t 早于第一个关键帧时返回 None。"""
+        pos = bisect_right(self.timestamps_ms, int(round(t * 1000)))
+        if pos == 0:
+            return None
+        return self.timestamps_ms[pos - 1] / 1000.0
+
+    def is_keyframe(self, t: float, tolerance: float = DEFAULT_TOLERANCE) -> bool:
+        kf = self.keyframe_at_or_before(t + tolerance)
+        return kf is not None and abs(t - kf) <= tolerance
+
+    def is_gop_aligned(self, t0: float, t1: float, tolerance: float = DEFAULT_TOLERANCE) -> bool:
+        """
+        [t0, t1] 是否 GOP 对齐：t0 落在关键帧上，且 t1 落在关键帧上或已到达片尾。
+        满足时可以使用 -c copy 精确裁切，无需重新编码。
+        """
+        if t1 <= t0 or not self.is_keyframe(t0, tolerance):
+            return False
+        if self.duration and t1 >= self.duration - tolerance:
+            return True
+        return self.is_keyframe(t1, tolerance)
+
+    def __str__(self):
+        return f"{self.media_id} ({self.count} keyframes)"
+
+    class Meta:
+        verbose_name = "关键帧索引"
+        verbose_name_plural = "关键帧索引"
@@ -0,0 +1,128 @@
+# 文件路径: apps/media_assets/services/bandwidth.py
+
+import logging
+import threading
+import time
+from typing import Optional
+
+import redis
+from django.conf import settings
+
+from apps.media_assets.services.scheduler import get_redis
+
+logger = logging.getLogger(__name__)
+
+# 所有 worker 共享的令牌桶 (HASH: tokens, ts)
+GLOBAL_BUCKET_KEY = "vss:bandwidth:delivery"
+
+# 桶容量 = 1 秒的配额 (允许的最大突发)
+BURST_SECONDS = 1.0
+
+# 累计到该字节数才申请一次令牌，避免每个网络小块都访问 Redis
+THROTTLE_QUANTUM = 256 * 1024
+
+# 先预支再等待 (令牌可为负)：返回调用方需要等待的秒数。时间取 Redis 服务器时钟，避免各主机时钟偏差
+_RESERVE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate) - requested
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], 60)
+if tokens >= 0 then
+    return '0'
+end
+return tostring(-tokens / rate)
+"""
+
+
+def mbit_to_bytes(mbit: float) -> float:
+    return mbit * 1000 * 1000 / 8
+
+
+class TokenBucket:
+    """进程内令牌桶 (线程安全)。reserve() 先预支令牌，返回需要等待的秒数。"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate * BURST_SECONDS
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: int) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate) - amount
+            self._updated_at = now
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+_worker_bucket: Optional[TokenBucket] = None
+_worker_bucket_lock = threading.Lock()
+
+
+def _get_worker_bucket() -> Optional[TokenBucket]:
+    """当前 worker 进程共享的令牌桶；未设置上限时为 None。配置变更后自动换新。"""
+    global _worker_bucket
+    rate = mbit_to_bytes(settings.DELIVERY_WORKER_BANDWIDTH_MBIT)
+    if rate <= 0:
+        return None
+    with _worker_bucket_lock:
+        if _worker_bucket is None or _worker_bucket.rate != rate:
+            _worker_bucket = TokenBucket(rate)
+        return _worker_bucket
+
+
+def _reserve_global(amount: int) -> float:
+    rate = mbit_to_bytes(settings.DELIVERY_GLOBAL_BANDWIDTH_MBIT)
+    if rate <= 0:
+        return 0.0
+    try:
+        wait = get_redis().eval(_RESERVE_SCRIPT, 1, GLOBAL_BUCKET_KEY, rate, rate * BURST_SECONDS, amount)
+        return float(wait)
+    except redis.RedisError as e:
+        # 与调度器一致：Redis 不可用时不限速，不因限速层故障阻塞交付
+        logger.debug(f"全局带宽令牌桶不可用，本次不限速: {e}")
+        return 0.0
+
+
+def acquire(amount: int):
+    """为即将发送的 amount 字节申请令牌 (worker 上限与全局上限同时生效)，不足时阻塞等待。"""
+    if amount <= 0:
+        return
+    bucket = _get_worker_bucket()
+    wait = max(bucket.reserve(amount) if bucket else 0.0, _reserve_global(amount))
+    if wait > 0:
+        time.sleep(wait)
+
+
+def is_limited() -> bool:
+    return settings.DELIVERY_WORKER_BANDWIDTH_MBIT > 0 or settings.DELIVERY_GLOBAL_BANDWIDTH_MBIT > 0
+
+
+class Throttle:
+    """
+    上传回调: 按实际发送的字节数限速。可直接作为 boto3 的 Callback 或 ReadFileChunk 的 callbacks 使用。
+    重试时 boto3 会回调负数 (回退已发送的字节)，这里忽略，不退还令牌。
+    """
+
+    def __init__(self, quantum: int = THROTTLE_QUANTUM):
+        self.quantum = quantum
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, bytes_transferred):
+        if bytes_transferred <= 0:
+            return
+        with self._lock:
+            self._pending += bytes_transferred
+            if self._pending < self.quantum:
+                return
+            amount, self._pending = self._pending, 0
+        acquire(amount)
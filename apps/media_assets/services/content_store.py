@@ -0,0 +1,64 @@
+# 文件路径: apps/media_assets/services/content_store.py
+
+import hashlib
+import logging
+from pathlib import Path
+from typing import Tuple
+
+from django.db import IntegrityError, transaction
+
+from apps.media_assets.models import MediaBlob
+from apps.media_assets.services.placement import place_into_field
+
+logger = logging.getLogger(__name__)
+
+# 流式计算哈希时的分块大小 (8MB)
+HASH_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+def sha256_file(path) -> str:
+    """流式计算文件的 SHA-256，内存占用与文件大小无关。"""
+    digest = hashlib.sha256()
+    with Path(path).open("rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _blob_file_exists(blob: MediaBlob) -> bool:
+    return bool(blob.file) and blob.file.storage.exists(blob.file.name)
+
+
+def store_blob(src_path, mode: str = "link") -> Tuple[MediaBlob, bool]:
+    """
+    将文件存入内容寻址库。
+    如果相同内容的 Blob 已存在，直接复用 (不再放置文件)；否则按 mode 放置到 blobs/ 下。
+    返回 (blob, created)。
+    """
+    src = Path(src_path)
+    size = src.stat().st_size
+    digest = sha256_file(src)
+
+    blob = MediaBlob.objects.filter(sha256=digest).first()
+    if blob and _blob_file_exists(blob):
+        logger.info(f"内容库命中: {src.name} -> {blob.file.name}")
+        return blob, False
+
+    if blob is None:
+        blob = MediaBlob(sha256=digest)
+    else:
+        # 记录存在但文件丢失：重新放置文件以修复
+        logger.warning(f"Blob {digest} 的文件已丢失，重新放置。")
+
+    place_into_field(blob.file, src, f"{digest}{src.suffix.lower()}", mode=mode)
+    blob.size = size
+
+    try:
+        with transaction.atomic():
+            blob.save()
+    except IntegrityError:
+        # 并发入库时另一个任务已写入相同内容：删除本次放置的副本，复用对方的记录
+        blob.file.storage.delete(blob.file.name)
+        return MediaBlob.objects.get(sha256=digest), False
+
+    return blob, True
@@ -0,0 +1,141 @@
+# 文件路径: apps/media_assets/services/ffmpeg_runner.py
+
+import logging
+import subprocess
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, replace
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+FFMPEG_BINARY = "ffmpeg"
+
+# 失败时保留的 stderr 末尾行数 (只保留尾部，避免长任务把全部日志堆在内存里)
+STDERR_TAIL_LINES = 50
+
+
+@dataclass
+class FFmpegProgress:
+    """-progress 输出的一次进度快照。"""
+
+    frame: Optional[int] = None
+    fps: Optional[float] = None
+    speed: Optional[float] = None
+    out_time: Optional[float] = None  # 已输出的时长 (秒)
+    total_size: Optional[int] = None
+    finished: bool = False
+
+    def percent(self, duration: Optional[float]) -> Optional[float]:
+        if not duration or self.out_time is None:
+            return None
+        return max(0.0, min(100.0, self.out_time / duration * 100))
+
+
+class FFmpegError(subprocess.CalledProcessError):
+    """FFmpeg 非零退出。继承 CalledProcessError，兼容原有的异常处理分支；stderr 为末尾若干行。"""
+
+    def __str__(self):
+        return f"FFmpeg 退出码 {self.returncode}\n--- stderr (末尾) ---\n{self.stderr}"
+
+
+def _parse_number(value: str, cast):
+    value = (value or "").strip().rstrip("x")
+    if not value or value == "N/A":
+        return None
+    try:
+        return cast(value)
+    except ValueError:
+        return None
+
+
+def _apply_progress_line(progress: FFmpegProgress, key: str, value: str):
+    if key == "frame":
+        progress.frame = _parse_number(value, int)
+    elif key == "fps":
+        progress.fps = _parse_number(value, float)
+    elif key == "speed":
+        progress.speed = _parse_number(value, float)
+    elif key == "out_time_us":
+        us = _parse_number(value, int)
+        progress.out_time = us / 1_000_000 if us is not None and us >= 0 else None
+    elif key == "total_size":
+        progress.total_size = _parse_number(value, int)
+
+
+def _drain_stderr(stream, tail: deque):
+    for line in stream:
+        tail.append(line.rstrip())
+
+
+def run_ffmpeg(
+    args: List[str],
+    label: str = "ffmpeg",
+    duration: Optional[float] = None,
+    on_progress: Optional[Callable[[FFmpegProgress], None]] = None,
+    log_interval: float = 30.0,
+) -> List[str]:
+    """
+    执行一条 FFmpeg 命令 (args 不含可执行文件名)，增量读取 -progress 输出。
+
+    - 每个进度块结束时构造 FFmpegProgress 回调 on_progress；
+    - 按 log_interval 限流输出进度日志 (提供 duration 时附带百分比)；
+    - stderr 在后台线程中读取，只保留末尾 STDERR_TAIL_LINES 行。
+    成功返回 stderr 末尾行；失败抛出 FFmpegError。
+    """
+    cmd = [FFMPEG_BINARY, "-hide_banner", "-nostats", "-progress", "pipe:1", *[str(a) for a in args]]
+    logger.debug(f"Executing ffmpeg command for '{label}': {' '.join(cmd)}")
+
+    stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+    last_logged_at = time.monotonic()
+
+    with subprocess.Popen(
+        cmd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    ) as proc:
+        stderr_thread = threading.Thread(target=_drain_stderr, args=(proc.stderr, stderr_tail), daemon=True)
+        stderr_thread.start()
+
+        progress = FFmpegProgress()
+        for line in proc.stdout:
+            key, _, value = line.strip().partition("=")
+            if key != "progress":
+                _apply_progress_line(progress, key, value)
+                continue
+
+            # 一个进度块以 progress=continue / progress=end 结束
+            progress.finished = value == "end"
+            if on_progress:
+                on_progress(progress)
+            now = time.monotonic()
+            if now - last_logged_at >= log_interval and not progress.finished:
+                last_logged_at = now
+                percent = progress.percent(duration)
+                percent_str = f" ({percent:.1f}%)" if percent is not None else ""
+                logger.info(
+                    f"FFmpeg '{label}' 进度: out_time={progress.out_time}s{percent_str}, "
+                    f"frame={progress.frame}, fps={progress.fps}, speed={progress.speed}x"
+                )
+            # 下一个块会重新给出全部字段，这里复制一份，避免回调方持有的快照被改写
+            progress = replace(progress, finished=False)
+
+        proc.wait()
+        stderr_thread.join()
+
+    tail = list(stderr_tail)
+    if proc.returncode != 0:
+        logger.error(f"FFmpeg '{label}' 执行失败 (退出码 {proc.returncode})，stderr 末尾:\n" + "\n".join(tail))
+        raise FFmpegError(proc.returncode, cmd, stderr="\n".join(tail))
+    return tail
+
+
+def check_ffmpeg() -> str:
+    """确认 ffmpeg 可用，返回版本行。"""
+    result = subprocess.run([FFMPEG_BINARY, "-version"], capture_output=True, text=True, check=True, encoding="utf-8")
+    return result.stdout.splitlines()[0] if result.stdout else ""
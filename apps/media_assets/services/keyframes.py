@@ -0,0 +1,74 @@
+# 文件路径: apps/media_assets/services/keyframes.py
+
+import logging
+import subprocess
+from typing import List, Optional
+
+from apps.media_assets.models import KeyframeIndex, Media
+from apps.media_assets.services.probe import get_media_probe
+
+logger = logging.getLogger(__name__)
+
+
+def extract_keyframe_times(path) -> List[int]:
+    """
+    读取第一条视频流中关键帧 (K 标志) 数据包的时间戳，单位毫秒。
+    只解析包头不解码，按行流式读取 ffprobe 输出，内存与视频长度无关。
+    """
+    cmd = [
+        "ffprobe",
+        "-v",
+        "error",
+        "-select_streams",
+        "v:0",
+        "-show_entries",
+        "packet=pts_time,flags",
+        "-of",
+        "csv=p=0",
+        str(path),
+    ]
+    timestamps = []
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True) as proc:
+        for line in proc.stdout:
+            pts_time, _, flags = line.strip().partition(",")
+            if "K" not in flags or not pts_time or pts_time == "N/A":
+                continue
+            timestamps.append(max(0, int(round(float(pts_time) * 1000))))
+        stderr = proc.stderr.read()
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd, stderr=stderr)
+    return timestamps
+
+
+def build_keyframe_index(media: Media) -> KeyframeIndex:
+    """为 Media 的源视频提取关键帧并写入 KeyframeIndex (存在则覆盖)。"""
+    if not media.source_video:
+        raise FileNotFoundError(f"Media (ID: {media.id}) 没有源视频，无法提取关键帧。")
+
+    timestamps = extract_keyframe_times(media.source_video.path)
+    probe = get_media_probe(media)
+
+    index, _ = KeyframeIndex.objects.update_or_create(
+        media=media,
+        defaults={
+            "data": KeyframeIndex.pack(timestamps),
+            "count": len(timestamps),
+            "duration": probe.duration if probe else None,
+        },
+    )
+    logger.info(f"Media {media.id} 关键帧索引已建立: {index.count} 个关键帧")
+    return index
+
+
+def get_keyframe_index(media: Media) -> Optional[KeyframeIndex]:
+    """读取 Media 的关键帧索引；历史数据首次访问时补建，失败返回 None。"""
+    try:
+        return media.keyframe_index
+    except KeyframeIndex.DoesNotExist:
+        pass
+
+    try:
+        return build_keyframe_index(media)
+    except Exception as e:
+        logger.warning(f"Media {media.id} 关键帧索引建立失败: {e}")
+        return None
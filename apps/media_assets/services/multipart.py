@@ -0,0 +1,139 @@
+# 文件路径: apps/media_assets/services/multipart.py
+
+import logging
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, Optional
+
+from botocore.exceptions import ClientError
+from django.conf import settings
+from s3transfer.utils import ReadFileChunk, signal_not_transferring, signal_transferring
+
+logger = logging.getLogger(__name__)
+
+# 上传进度 (resume.load() / resume.save() 读写) 的格式:
+# {"upload_id": ..., "etag": 整体校验值, "chunksize": 分片大小, "parts": {"分片号": 分片 ETag}}
+
+
+def _register_transfer_handlers(client):
+    """
+    与 s3transfer 相同的事件处理 (相同 unique_id，重复注册无副作用):
+    计算请求校验和时读取分片不触发回调，真正发送时才触发，限速与进度只统计实际发送的字节。
+    """
+    client.meta.events.register_first(
+        "request-created.s3", signal_not_transferring, unique_id="s3upload-not-transferring"
+    )
+    client.meta.events.register_last("request-created.s3", signal_transferring, unique_id="s3upload-transferring")
+
+
+def _list_uploaded_parts(client, bucket: str, key: str, upload_id: str) -> Dict[int, Dict]:
+    parts, marker = {}, 0
+    while True:
+        resp = client.list_parts(Bucket=bucket, Key=key, UploadId=upload_id, PartNumberMarker=marker)
+        for part in resp.get("Parts", []):
+            parts[part["PartNumber"]] = part
+        if not resp.get("IsTruncated"):
+            return parts
+        marker = resp["NextPartNumberMarker"]
+
+
+def abort_upload(client, bucket: str, key: str, state: Optional[Dict]):
+    if not state:
+        return
+    try:
+        client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=state["upload_id"])
+    except ClientError as e:
+        logger.debug(f"放弃分片上传失败 (可能已过期): s3://{bucket}/{key} {e}")
+
+
+def _restore_state(client, bucket: str, key: str, state: Optional[Dict], etag: str, chunksize: int, size: int):
+    """
+    校验持久化的进度: 源文件或分片大小变化时放弃旧上传；
+    已完成分片以 S3 的 ListParts 为准 (持久化前 worker 崩溃的分片也能复用，丢失的分片重新上传)。
+    """
+    if not state:
+        return None
+    if state.get("etag") != etag or state.get("chunksize") != chunksize:
+        logger.info(f"源文件已变化，放弃旧的分片上传: s3://{bucket}/{key}")
+        abort_upload(client, bucket, key, state)
+        return None
+    try:
+        uploaded = _list_uploaded_parts(client, bucket, key, state["upload_id"])
+    except ClientError as e:
+        logger.info(f"分片上传 {state['upload_id']} 已失效，重新开始: {e}")
+        return None
+
+    parts = {}
+    for number, part in uploaded.items():
+        expected = min(chunksize, size - (number - 1) * chunksize)
+        if part["Size"] == expected:
+            parts[str(number)] = part["ETag"]
+    return {**state, "parts": parts}
+
+
+def resumable_upload(
+    client,
+    bucket: str,
+    local_path,
+    key: str,
+    etag: str,
+    chunksize: int,
+    resume,
+    callbacks: Iterable[Callable[[int], None]] = (),
+    extra_args: Optional[Dict] = None,
+):
+    """
+    可续传的分片上传: 每完成一个分片就把分片号与 ETag 写入 resume (提供 load() / save(state) 的持久化对象)，
+    worker 重启后从上次的 UploadId 继续，只上传缺失的分片。
+    分片大小须与计算 etag 时一致，完成后对象的 ETag 即等于 etag。
+    callbacks 在分片实际发送时按字节数回调 (限速、进度)。
+    """
+    size = os.path.getsize(local_path)
+    part_count = math.ceil(size / chunksize)
+    _register_transfer_handlers(client)
+
+    state = _restore_state(client, bucket, key, resume.load(), etag, chunksize, size)
+    if state is None:
+        upload_id = client.create_multipart_upload(Bucket=bucket, Key=key, **(extra_args or {}))["UploadId"]
+        state = {"upload_id": upload_id, "etag": etag, "chunksize": chunksize, "parts": {}}
+        resume.save(state)
+    elif state["parts"]:
+        logger.info(f"继续分片上传 s3://{bucket}/{key}: 已完成 {len(state['parts'])}/{part_count} 个分片")
+
+    callbacks = list(callbacks)
+
+    def on_transfer(bytes_transferred):
+        for callback in callbacks:
+            callback(bytes_transferred)
+
+    def upload_part(number: int):
+        offset = (number - 1) * chunksize
+        body = ReadFileChunk.from_filename(
+            str(local_path), offset, min(chunksize, size - offset), callbacks=[on_transfer], enable_callbacks=False
+        )
+        try:
+            resp = client.upload_part(Bucket=bucket, Key=key, UploadId=state["upload_id"], PartNumber=number, Body=body)
+        finally:
+            body.close()
+        return number, resp["ETag"]
+
+    pending = [n for n in range(1, part_count + 1) if str(n) not in state["parts"]]
+    if pending:
+        # 进度在调用线程中逐个分片持久化，上传线程不访问数据库
+        with ThreadPoolExecutor(max_workers=max(1, settings.S3_MAX_CONCURRENCY)) as pool:
+            futures = [pool.submit(upload_part, n) for n in pending]
+            for future in as_completed(futures):
+                number, part_etag = future.result()
+                state["parts"][str(number)] = part_etag
+                resume.save(state)
+
+    client.complete_multipart_upload(
+        Bucket=bucket,
+        Key=key,
+        UploadId=state["upload_id"],
+        MultipartUpload={
+            "Parts": [{"PartNumber": n, "ETag": state["parts"][str(n)]} for n in range(1, part_count + 1)]
+        },
+    )
+    resume.save(None)
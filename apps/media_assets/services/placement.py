@@ -0,0 +1,130 @@
+# 文件路径: apps/media_assets/services/placement.py
+
+import logging
+import os
+import shutil
+from pathlib import Path
+
+from django.core.files import File
+
+logger = logging.getLogger(__name__)
+
+# 放置方式:
+# - link: 同一文件系统内创建硬链接 (源文件保留，零拷贝)
+# - move: 同一文件系统内 rename (源文件移走，零拷贝)
+# - copy: 始终分块复制
+PLACEMENT_MODES = ("link", "move", "copy")
+
+# 跨设备回退时的分块大小 (8MB)
+COPY_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+def is_local_storage(storage) -> bool:
+    """判断存储后端是否为本地文件系统 (支持 .path())。"""
+    try:
+        storage.path("")
+        return True
+    except NotImplementedError:
+        return False
+
+
+def _chunked_copy(src: Path, dest: Path):
+    """分块复制到同目录下的临时文件，完成后原子替换，避免产生半截文件。"""
+    tmp_dest = dest.with_name(f"{dest.name}.part")
+    with src.open("rb") as fsrc, tmp_dest.open("wb") as fdst:
+        shutil.copyfileobj(fsrc, fdst, COPY_CHUNK_SIZE)
+    os.replace(tmp_dest, dest)
+
+
+def place_local_file(src_path, dest_path, mode: str = "link") -> str:
+    """
+    将本地文件放置到目标路径，尽量避免字节拷贝。
+    源与目标位于同一文件系统时使用 hardlink / rename，跨设备时回退到分块复制。
+    返回实际采用的方式 ("link" / "move" / "copy")。
+    """
+    if mode not in PLACEMENT_MODES:
+        raise ValueError(f"不支持的放置方式: {mode}")
+
+    src = Path(src_path)
+    dest = Path(dest_path)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+
+    same_device = src.stat().st_dev == dest.parent.stat().st_dev
+
+    if same_device and mode == "link":
+        try:
+            os.link(src, dest)
+            return "link"
+        except OSError as e:
+            # 部分文件系统 (如某些网络挂载) 不支持硬链接，回退到复制
+            logger.warning(f"硬链接失败，回退到复制: {src} -> {dest} ({e})")
+
+    if same_device and mode == "move":
+        os.replace(src, dest)
+        return "move"
+
+    _chunked_copy(src, dest)
+    if mode == "move":
+        src.unlink()
+    return "copy"
+
+
+def place_into_field(field_file, src_path, filename: str, mode: str = "link") -> str:
+    """
+    将本地文件挂载到 FileField 上，替代 field_file.save(name, File(f)) 的整文件拷贝。
+
+    本地存储: 按 upload_to 生成目标路径，然后调用 place_local_file 放置。
+    远程存储 (如 S3): 以文件句柄交给 storage.save，由后端流式上传。
+    注意: 与 FieldFile.save(save=False) 一致，此处不会保存 instance。
+    """
+    storage = field_file.storage
+    src = Path(src_path)
+
+    if not is_local_storage(storage):
+        with src.open("rb") as f:
+            field_file.save(filename, File(f), save=False)
+        if mode == "move":
+            src.unlink()
+        return "upload"
+
+    name = field_file.field.generate_filename(field_file.instance, filename)
+    name = storage.get_available_name(name, max_length=field_file.field.max_length)
+    method = place_local_file(src, storage.path(name), mode=mode)
+
+    field_file.name = name
+    field_file._committed = True
+    return method
+
+
+def place_directory_into_field(field_file, src_dir, dirname: str, entry_name: str, mode: str = "move") -> str:
+    """
+    将一个目录 (如 HLS 播放列表 + 分片) 整体放置到 upload_to 生成的 <dirname>/ 下，field_file 指向其中的 entry_name。
+    目标目录已存在时先清空 (重跑覆盖)，目录内的相对引用因此保持有效。
+    远程存储逐个文件流式上传。注意: 与 place_into_field 一致，此处不会保存 instance。
+    """
+    storage = field_file.storage
+    src = Path(src_dir)
+    name = field_file.field.generate_filename(field_file.instance, f"{dirname}/{entry_name}")
+    target_dir = name.rsplit("/", 1)[0]
+    files = sorted(p for p in src.iterdir() if p.is_file())
+
+    if is_local_storage(storage):
+        dest = Path(storage.path(target_dir))
+        if dest.exists():
+            shutil.rmtree(dest)
+        methods = {place_local_file(p, dest / p.name, mode=mode) for p in files}
+        method = methods.pop() if len(methods) == 1 else "mixed"
+    else:
+        if storage.exists(target_dir):
+            for old_name in storage.listdir(target_dir)[1]:
+                storage.delete(f"{target_dir}/{old_name}")
+        for p in files:
+            with p.open("rb") as f:
+                storage.save(f"{target_dir}/{p.name}", File(f))
+            if mode == "move":
+                p.unlink()
+        method = "upload"
+
+    field_file.name = name
+    field_file._committed = True
+    return method
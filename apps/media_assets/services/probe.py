@@ -0,0 +1,137 @@
+# 文件路径: apps/media_assets/services/probe.py
+
+import json
+import logging
+import subprocess
+from typing import List, Optional
+
+from apps.media_assets.models import Media, MediaProbe
+
+logger = logging.getLogger(__name__)
+
+
+def run_ffprobe(path) -> dict:
+    """调用 ffprobe 读取容器与全部流信息 (JSON)。"""
+    cmd = ["ffprobe", "-v", "error", "-print_format", "json", "-show_format", "-show_streams", str(path)]
+    result = subprocess.run(cmd, check=True, capture_output=True, text=True, encoding="utf-8")
+    return json.loads(result.stdout or "{}")
+
+
+def video_packet_times(path) -> List[float]:
+    """读取首个视频流所有数据包的 pts (秒，只解封装不解码)。无时间戳的包忽略。"""
+    cmd = [
+        "ffprobe",
+        "-v",
+        "error",
+        "-select_streams",
+        "v:0",
+        "-show_entries",
+        "packet=pts_time",
+        "-of",
+        "csv=p=0",
+        str(path),
+    ]
+    result = subprocess.run(cmd, check=True, capture_output=True, text=True, encoding="utf-8")
+    times = []
+    for line in result.stdout.splitlines():
+        value = _to_float(line.strip().rstrip(","))
+        if value is not None:
+            times.append(value)
+    return times
+
+
+def count_video_packets(path) -> int:
+    """统计首个视频流的数据包 (帧) 数，只解封装不解码。"""
+    cmd = [
+        "ffprobe",
+        "-v",
+        "error",
+        "-select_streams",
+        "v:0",
+        "-count_packets",
+        "-show_entries",
+        "stream=nb_read_packets",
+        "-of",
+        "csv=p=0",
+        str(path),
+    ]
+    result = subprocess.run(cmd, check=True, capture_output=True, text=True, encoding="utf-8")
+    return _to_int(result.stdout.strip().rstrip(",")) or 0
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_frame_rate(rate: str) -> Optional[float]:
+    """解析 ffprobe 的分数帧率，例如 '30000/1001'。"""
+    if not rate or rate == "0/0":
+        return None
+    num, _, den = rate.partition("/")
+    num, den = _to_float(num), _to_float(den or 1)
+    if not num or not den:
+        return None
+    return round(num / den, 3)
+
+
+def probe_media(media: Media) -> MediaProbe:
+    """
+    对 Media 的源视频执行一次 ffprobe，并将结构化结果写入 MediaProbe (存在则覆盖)。
+    """
+    if not media.source_video:
+        raise FileNotFoundError(f"Media (ID: {media.id}) 没有源视频，无法探测。")
+
+    data = run_ffprobe(media.source_video.path)
+    fmt = data.get("format", {})
+    streams = data.get("streams", [])
+
+    video = next((s for s in streams if s.get("codec_type") == "video"), {})
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), {})
+    frame_rate = _parse_frame_rate(video.get("avg_frame_rate")) or _parse_frame_rate(video.get("r_frame_rate"))
+
+    probe, _ = MediaProbe.objects.update_or_create(
+        media=media,
+        defaults={
+            "format_name": fmt.get("format_name", ""),
+            "duration": _to_float(fmt.get("duration")) or _to_float(video.get("duration")),
+            "bit_rate": _to_int(fmt.get("bit_rate")),
+            "size": _to_int(fmt.get("size")),
+            "video_codec": video.get("codec_name", ""),
+            "width": _to_int(video.get("width")),
+            "height": _to_int(video.get("height")),
+            "frame_rate": frame_rate,
+            "audio_codec": audio.get("codec_name", ""),
+            "audio_sample_rate": _to_int(audio.get("sample_rate")),
+            "audio_channels": _to_int(audio.get("channels")),
+            "streams": streams,
+        },
+    )
+    logger.info(f"Media {media.id} 探测完成: {probe}")
+    return probe
+
+
+def get_media_probe(media: Media) -> Optional[MediaProbe]:
+    """
+    读取 Media 的探测结果。
+    对入库早于探测功能的历史数据，首次访问时补探测一次并落库；探测失败返回 None。
+    """
+    try:
+        return media.probe
+    except MediaProbe.DoesNotExist:
+        pass
+
+    try:
+        return probe_media(media)
+    except Exception as e:
+        logger.warning(f"Media {media.id} 补充探测失败: {e}")
+        return None
@@ -0,0 +1,155 @@
+# 文件路径: apps/media_assets/services/scheduler.py
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+import redis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Redis 键: 持有者 -> 占用槽位数 (HASH)，持有者 -> 租约到期时间 (ZSET)
+HOLDERS_KEY = "vss:scheduler:holders"
+LEASES_KEY = "vss:scheduler:leases"
+
+# 租约时长 (秒)。持有期间后台线程每 LEASE_TTL/3 续约一次；worker 崩溃时槽位最多 LEASE_TTL 后自动回收
+LEASE_TTL = 120
+
+# 原子地: 清理过期租约 -> 统计已占用槽位 -> 判断能否准入
+# 已占用为 0 时总是准入，保证槽位需求超过上限的任务也能单独运行
+_ACQUIRE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local ttl = tonumber(ARGV[2])
+local need = tonumber(ARGV[3])
+local limit = tonumber(ARGV[4])
+local holder = ARGV[5]
+for _, h in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now)) do
+    redis.call('HDEL', KEYS[1], h)
+end
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now)
+if redis.call('HEXISTS', KEYS[1], holder) == 1 then
+    redis.call('ZADD', KEYS[2], now + ttl, holder)
+    return 1
+end
+local used = 0
+for _, v in ipairs(redis.call('HVALS', KEYS[1])) do
+    used = used + tonumber(v)
+end
+if used > 0 and used + need > limit then
+    return 0
+end
+redis.call('HSET', KEYS[1], holder, need)
+redis.call('ZADD', KEYS[2], now + ttl, holder)
+return 1
+"""
+
+_client = None
+_client_lock = threading.Lock()
+
+
+class SlotsUnavailable(Exception):
+    """CPU 槽位已满，任务应稍后重试。"""
+
+
+def get_redis():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = redis.Redis.from_url(settings.CELERY_BROKER_URL, socket_timeout=5)
+        return _client
+
+
+def try_acquire(holder: str, slots: int) -> bool:
+    """尝试为 holder 占用 slots 个 CPU 槽位。Redis 不可用时放行 (不因调度层故障阻塞任务)。"""
+    try:
+        client = get_redis()
+        granted = client.eval(
+            _ACQUIRE_SCRIPT,
+            2,
+            HOLDERS_KEY,
+            LEASES_KEY,
+            time.time(),
+            LEASE_TTL,
+            slots,
+            settings.SCHEDULER_CPU_SLOTS,
+            holder,
+        )
+        return bool(granted)
+    except redis.RedisError as e:
+        logger.warning(f"调度器无法连接 Redis，直接放行 {holder}: {e}")
+        return True
+
+
+def release(holder: str):
+    try:
+        client = get_redis()
+        pipe = client.pipeline()
+        pipe.hdel(HOLDERS_KEY, holder)
+        pipe.zrem(LEASES_KEY, holder)
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"调度器释放槽位失败 ({holder})，将由租约到期回收: {e}")
+
+
+def _renew_loop(holder: str, stop: threading.Event):
+    while not stop.wait(LEASE_TTL / 3):
+        try:
+            get_redis().zadd(LEASES_KEY, {holder: time.time() + LEASE_TTL})
+        except redis.RedisError as e:
+            logger.warning(f"调度器续约失败 ({holder}): {e}")
+
+
+@contextmanager
+def cpu_slots(holder: str, slots: int = 1):
+    """
+    在全局 CPU 槽位上限 (SCHEDULER_CPU_SLOTS) 内运行一段重负载代码。
+    槽位不足时抛出 SlotsUnavailable，由调用的 Celery 任务 retry，而不是在 worker 内阻塞等待。
+    """
+    slots = max(1, int(slots or 1))
+    if not try_acquire(holder, slots):
+        raise SlotsUnavailable(f"{holder} 需要 {slots} 个 CPU 槽位，当前已满")
+
+    stop = threading.Event()
+    renewer = threading.Thread(target=_renew_loop, args=(holder, stop), daemon=True)
+    renewer.start()
+    logger.info(f"{holder} 获得 {slots} 个 CPU 槽位")
+    try:
+        yield
+    finally:
+        stop.set()
+        release(holder)
+
+
+def get_slot_usage() -> Dict[str, int]:
+    """当前各持有者占用的槽位 (已过滤过期租约)。"""
+    client = get_redis()
+    now = time.time()
+    live = set(h.decode() for h in client.zrangebyscore(LEASES_KEY, now, "+inf"))
+    holders = {h.decode(): int(v) for h, v in client.hgetall(HOLDERS_KEY).items()}
+    return {h: v for h, v in holders.items() if h in live}
+
+
+def get_queue_stats(inspect_timeout: float = 1.0) -> Dict[str, Dict[str, Optional[int]]]:
+    """
+    各队列的排队/运行数量。
+    排队数直接读取 Redis broker 中的队列长度；运行数通过 worker inspect 获取 (worker 无响应时为 None)。
+    """
+    from visify_ssw.celery import app
+
+    queues = [settings.CELERY_TASK_DEFAULT_QUEUE, settings.CELERY_HEAVY_QUEUE]
+    client = get_redis()
+    stats = {q: {"queued": client.llen(q), "running": None} for q in queues}
+
+    active = app.control.inspect(timeout=inspect_timeout).active() or {}
+    if active:
+        for q in queues:
+            stats[q]["running"] = 0
+        for tasks in active.values():
+            for task in tasks:
+                queue = (task.get("delivery_info") or {}).get("routing_key")
+                if queue in stats:
+                    stats[queue]["running"] += 1
+    return stats
@@ -1,16 +1,25 @@
 # 文件路径: apps/media_assets/services/storage.py (V5.2 - 修复 URL 重复)
 
+import hashlib
 import logging
+import math
 import os
 import shutil
+import threading
+import time
 from pathlib import Path
+from typing import Dict, Optional, Tuple
 
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError
 from django.conf import settings
 
 from apps.configuration.models import IntegrationSettings
 from apps.media_assets.models import Media
-from apps.workflow.models import TranscodingJob
+from apps.media_assets.services import bandwidth
+from apps.media_assets.services.multipart import abort_upload, resumable_upload
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +35,217 @@ def get_integration_settings():
         return None
 
 
+# --- 进程级共享的 S3 客户端 ---
+# boto3 客户端是线程安全的，创建成本却不低 (加载服务模型、建立连接池)。
+# 每个 worker 进程按 (region, endpoint, access key) 缓存一个实例，凭证变更时自动换新。
+# 同一目标的所有上传 (包括批量分发中的多个任务) 共用该客户端的连接池，复用 TLS 连接。
+_s3_clients = {}
+_s3_clients_lock = threading.Lock()
+
+
+def get_s3_client(
+    region_name: Optional[str] = None,
+    endpoint_url: Optional[str] = None,
+    access_key_id: Optional[str] = None,
+    secret_access_key: Optional[str] = None,
+):
+    """
+    获取当前进程共享的 S3 客户端。
+    不传参数时使用 settings 中的默认存储凭证；分发目标 (如第二个 S3 兼容镜像) 传入各自的凭证。
+    """
+    if not any((region_name, endpoint_url, access_key_id, secret_access_key)):
+        region_name = settings.AWS_S3_REGION_NAME
+        endpoint_url = settings.AWS_S3_ENDPOINT_URL
+        access_key_id = settings.AWS_ACCESS_KEY_ID
+        secret_access_key = settings.AWS_SECRET_ACCESS_KEY
+    endpoint_url = endpoint_url or None
+    key = (region_name, endpoint_url, access_key_id)
+    with _s3_clients_lock:
+        client = _s3_clients.get(key)
+        if client is None:
+            client = boto3.client(
+                "s3",
+                region_name=region_name or None,
+                endpoint_url=endpoint_url,
+                aws_access_key_id=access_key_id or None,
+                aws_secret_access_key=secret_access_key or None,
+                config=Config(max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS),
+            )
+            _s3_clients[key] = client
+        return client
+
+
+def get_transfer_config() -> TransferConfig:
+    """根据 settings 构建分片上传参数 (分片大小 / 并发线程数 / 启用分片的阈值)。"""
+    return TransferConfig(
+        multipart_threshold=settings.S3_MULTIPART_THRESHOLD,
+        multipart_chunksize=settings.S3_MULTIPART_CHUNK_SIZE,
+        max_concurrency=settings.S3_MAX_CONCURRENCY,
+        use_threads=settings.S3_MAX_CONCURRENCY > 1,
+    )
+
+
+# 上传时写入对象元数据的校验值 (加密桶等场景下 S3 返回的 ETag 不是内容 MD5，以元数据为准)
+ETAG_METADATA_KEY = "vss-etag"
+
+# 与 boto3 分片上传一致的限制: 分片不少于 5MB，最多 10000 片
+S3_MIN_PART_SIZE = 5 * 1024 * 1024
+S3_MAX_PARTS = 10000
+
+# 流式计算校验值时每次读取的字节数
+CHECKSUM_READ_SIZE = 8 * 1024 * 1024
+
+
+def _adjusted_chunksize(size: int, chunksize: int) -> int:
+    """复刻 boto3 ChunksizeAdjuster: 分片过小时提升到 5MB，分片数超过 10000 时倍增。"""
+    chunksize = max(chunksize, S3_MIN_PART_SIZE)
+    while math.ceil(size / chunksize) > S3_MAX_PARTS:
+        chunksize *= 2
+    return chunksize
+
+
+def compute_s3_etag(local_path, threshold: Optional[int] = None, chunksize: Optional[int] = None) -> str:
+    """
+    按 S3 的 ETag 规则流式计算本地文件的校验值 (内存占用与文件大小无关):
+    - 小于分片阈值: 整个文件的 MD5；
+    - 分片上传: 各分片 MD5 拼接后再取 MD5，后缀 "-分片数"。
+    分片参数与 get_transfer_config 一致，因此与 upload_file 上传后 S3 返回的 ETag 相同。
+    """
+    threshold = settings.S3_MULTIPART_THRESHOLD if threshold is None else threshold
+    chunksize = settings.S3_MULTIPART_CHUNK_SIZE if chunksize is None else chunksize
+    size = os.path.getsize(local_path)
+
+    with open(local_path, "rb") as f:
+        if size < threshold:
+            digest = hashlib.md5(usedforsecurity=False)
+            for block in iter(lambda: f.read(CHECKSUM_READ_SIZE), b""):
+                digest.update(block)
+            return digest.hexdigest()
+
+        chunksize = _adjusted_chunksize(size, chunksize)
+        part_digests = []
+        while True:
+            part = hashlib.md5(usedforsecurity=False)
+            remaining = chunksize
+            while remaining:
+                block = f.read(min(CHECKSUM_READ_SIZE, remaining))
+                if not block:
+                    break
+                part.update(block)
+                remaining -= len(block)
+            if remaining == chunksize:
+                break
+            part_digests.append(part.digest())
+            if remaining:
+                break
+    return f"{hashlib.md5(b''.join(part_digests), usedforsecurity=False).hexdigest()}-{len(part_digests)}"
+
+
+class ProgressLogger:
+    """
+    boto3 上传进度回调。
+    回调在多个上传线程中并发触发 (每个分片多次)，这里只累加字节数，
+    并按时间间隔或百分比步进限流输出日志，避免每个分块一行。
+    """
+
+    def __init__(self, filename, interval: float = 5.0, step: float = 10.0):
+        self._filename = filename
+        self._size = float(os.path.getsize(filename)) or 1.0
+        self._seen_so_far = 0
+        self._interval = interval
+        self._step = step
+        self._started_at = time.monotonic()
+        self._last_logged_at = self._started_at
+        self._last_percentage = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, bytes_amount):
+        with self._lock:
+            self._seen_so_far += bytes_amount
+            percentage = (self._seen_so_far / self._size) * 100
+            now = time.monotonic()
+            finished = self._seen_so_far >= self._size
+            if not finished and (
+                now - self._last_logged_at < self._interval and percentage - self._last_percentage < self._step
+            ):
+                return
+            self._last_logged_at = now
+            self._last_percentage = percentage
+            speed = self._seen_so_far / max(now - self._started_at, 1e-6) / (1024 * 1024)
+            logger.info(
+                f"上传进度: {self._filename}  {self._seen_so_far} / {int(self._size)} bytes ({percentage:.2f}%, {speed:.1f} MB/s)"  # noqa: E501,E231
+            )
+
+
+def combine_checksums(checksums: Dict[str, str]) -> str:
+    """多文件产出 (如 HLS 目录) 的整体校验值: 各文件校验值按文件名排序拼接后取 MD5，后缀 "-hls文件数"。"""
+    combined = "".join(f"{name}:{checksums[name]}\n" for name in sorted(checksums))
+    return f"{hashlib.md5(combined.encode(), usedforsecurity=False).hexdigest()}-hls{len(checksums)}"
+
+
+def s3_object_matches(client, bucket: str, s3_key: str, size: int, etag: str) -> bool:
+    """HEAD 目标对象: 大小一致且 ETag (或上传时写入的校验元数据) 一致时视为相同内容。"""
+    try:
+        head = client.head_object(Bucket=bucket, Key=s3_key)
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            return False
+        raise
+    if head.get("ContentLength") != size:
+        return False
+    return head.get("ETag", "").strip('"') == etag or head.get("Metadata", {}).get(ETAG_METADATA_KEY) == etag
+
+
+def upload_file_if_changed(
+    client,
+    bucket: str,
+    local_path,
+    s3_key: str,
+    etag: Optional[str] = None,
+    resume=None,
+    throttle: bool = False,
+) -> Tuple[str, bool]:
+    """
+    幂等上传: HEAD 目标，内容相同则跳过上传 (重试 / 重跑只花一次 HEAD)。
+    etag 为空时先流式计算；已算好的 (例如多个目标共用) 直接传入，避免重复读取文件。
+    resume 为上传进度的持久化对象 (见 multipart.resumable_upload)，达到分片阈值的文件改用可续传分片上传；
+    throttle=True 时按分发带宽上限 (worker / 全局令牌桶) 限速。
+    返回 (校验值, 是否跳过)。
+    """
+    etag = etag or compute_s3_etag(local_path)
+    size = os.path.getsize(local_path)
+    if s3_object_matches(client, bucket, s3_key, size, etag):
+        logger.info(f"目标已存在相同内容，跳过上传: s3://{bucket}/{s3_key} ({etag})")
+        if resume is not None and resume.load():
+            abort_upload(client, bucket, s3_key, resume.load())
+            resume.save(None)
+        return etag, True
+
+    callbacks = [ProgressLogger(str(local_path))]
+    if throttle and bandwidth.is_limited():
+        callbacks.append(bandwidth.Throttle())
+    extra_args = {"Metadata": {ETAG_METADATA_KEY: etag}}
+
+    if resume is not None and size >= settings.S3_MULTIPART_THRESHOLD:
+        chunksize = _adjusted_chunksize(size, settings.S3_MULTIPART_CHUNK_SIZE)
+        resumable_upload(client, bucket, local_path, s3_key, etag, chunksize, resume, callbacks, extra_args)
+        return etag, False
+
+    def on_transfer(bytes_amount):
+        for callback in callbacks:
+            callback(bytes_amount)
+
+    client.upload_file(
+        str(local_path),
+        bucket,
+        s3_key,
+        ExtraArgs=extra_args,
+        Config=get_transfer_config(),
+        Callback=on_transfer,
+    )
+    return etag, False
+
+
 class StorageService:
     """
     (V4.0 - 集成设置动态读取)
@@ -39,16 +259,30 @@ class StorageService:
         # 如果失败，则使用 settings.py 中定义的 FINAL_STORAGE_BACKEND 作为回退
         self.storage_backend = getattr(settings_obj, "storage_backend", settings.FINAL_STORAGE_BACKEND)
 
-        # 只有当后端是 s3 时，才初始化 s3_client
+        # 只有当后端是 s3 时，才获取 s3_client (进程内共享，不再每个实例新建)
         if self.storage_backend == "s3":
             # 依赖 settings.py (V4.0) 中通过 IntegrationSettings 动态设置的 AWS 凭证
-            # boto3 会自动查找 settings.AWS_ACCESS_KEY_ID 等配置
-            self.s3_client = boto3.client("s3", region_name=settings.AWS_S3_REGION_NAME)
+            self.s3_client = get_s3_client()
         else:
             self.s3_client = None
 
         logger.info(f"StorageService 初始化，后端类型: {self.storage_backend}")
 
+    def _upload_to_s3(self, local_path: str, s3_key: str) -> str:
+        """分片并发上传到 S3 (参数见 get_transfer_config)，返回对象的访问 URL。目标已有相同内容时跳过。"""
+        upload_file_if_changed(self.s3_client, settings.AWS_STORAGE_BUCKET_NAME, local_path, s3_key)
+        return self.get_s3_url(s3_key)
+
+    @staticmethod
+    def get_s3_url(s3_key: str) -> str:
+        # 确保返回正确的 URL 格式
+        if settings.AWS_S3_CUSTOM_DOMAIN:
+            return f"https://{settings.AWS_S3_CUSTOM_DOMAIN}/{s3_key}"  # noqa: E231
+        if settings.AWS_S3_ENDPOINT_URL:
+            # S3 兼容服务 (如本地 MinIO) 使用 path-style 地址
+            return f"{settings.AWS_S3_ENDPOINT_URL.rstrip('/')}/{settings.AWS_STORAGE_BUCKET_NAME}/{s3_key}"
+        return f"https://{settings.AWS_STORAGE_BUCKET_NAME}.s3.amazonaws.com/{s3_key}"  # noqa: E231
+
     def save_processed_video(self, local_temp_path: str, media: Media) -> str:
         # ... (此方法保持不变) ...
         base_dir = Path(settings.MEDIA_ROOT) / "source_files" / str(media.asset.id)
@@ -59,63 +293,10 @@ class StorageService:
 
         if self.storage_backend == "s3":
             s3_key = f"source_files/{media.asset.id}/processed_media/{processed_filename}"
-            self.s3_client.upload_file(local_temp_path, settings.AWS_STORAGE_BUCKET_NAME, s3_key)
-            # 确保返回正确的 URL 格式
-            if settings.AWS_S3_CUSTOM_DOMAIN:
-                return f"https://{settings.AWS_S3_CUSTOM_DOMAIN}/{s3_key}"  # noqa: E231
-            else:
-                return f"https://{settings.AWS_STORAGE_BUCKET_NAME}.s3.amazonaws.com/{s3_key}"  # noqa: E231
+            return self._upload_to_s3(local_temp_path, s3_key)
         else:
             shutil.move(local_temp_path, final_path)
             relative_path = final_path.relative_to(Path(settings.MEDIA_ROOT))
             # [修复 1] 移除冗余的 LOCAL_MEDIA_URL_BASE，只使用 MEDIA_URL + 相对路径
             # MEDIA_URL 已经是绝对 URL (http://127.0.0.1:9999/media/)
             return f"{settings.MEDIA_URL}{relative_path}"
-
-    def save_transcoded_video(self, local_temp_path: str, job: TranscodingJob) -> str:
-        """
-        (V2.1 修复版) 保存转码后的视频文件。
-        """
-        asset_id = job.media.asset.id
-        job_id = job.id
-        container = job.profile.container
-        final_filename = f"{job_id}.{container}"
-
-        if self.storage_backend == "s3":
-            s3_key = f"transcoding_outputs/{asset_id}/{final_filename}"
-            self.s3_client.upload_file(local_temp_path, settings.AWS_STORAGE_BUCKET_NAME, s3_key)
-
-            if settings.AWS_S3_CUSTOM_DOMAIN:
-                return f"https://{settings.AWS_S3_CUSTOM_DOMAIN}/{s3_key}"  # noqa: E231
-            else:
-                return f"https://{settings.AWS_STORAGE_BUCKET_NAME}.s3.amazonaws.com/{s3_key}"  # noqa: E231
-        else:
-            # 本地存储逻辑
-            # 1. 物理路径构建 (确保包含 asset_id)
-            final_dir = Path(settings.MEDIA_ROOT) / "transcoding_outputs" / str(asset_id)
-            final_dir.mkdir(parents=True, exist_ok=True)
-            final_path = final_dir / final_filename
-
-            # 2. 移动文件
-            if os.path.exists(local_temp_path):
-                shutil.move(local_temp_path, final_path)
-
-            # [核心修复] 更新 job.output_file (FileField)
-            # 这非常重要！让 Django 知道文件存在哪里，这样 Admin 里的 output_file 链接才会对
-            # 我们存的是相对于 MEDIA_ROOT 的路径
-            relative_path_str = f"transcoding_outputs/{asset_id}/{final_filename}"
-            job.output_file.name = relative_path_str
-            job.save(update_fields=["output_file"])
-
-            # [核心修复] 返回给 output_url 的值
-            # 既然我们已经更新了 job.output_file，且有了 EdgeLocalStorage，
-            # 其实 output_url 可以直接取 job.output_file.url
-            # 但为了保持兼容性，我们这里手动返回绝对路径
-
-            # 逻辑：http://IP:9999 + /media/ + transcoding_outputs/uuid/file.mp4
-            # 使用 settings.LOCAL_MEDIA_URL_BASE (http://10.168.1.90:9999)
-            base = settings.LOCAL_MEDIA_URL_BASE.rstrip("/")
-            media_prefix = settings.MEDIA_URL.strip("/")  # 通常是 "media"
-
-            # 拼接: http://...:9999/media/transcoding_outputs/...
-            return f"{base}/{media_prefix}/{relative_path_str}"
@@ -0,0 +1,159 @@
+# 文件路径: apps/media_assets/services/thumbnails.py
+
+import logging
+import math
+import shutil
+import tempfile
+from pathlib import Path
+from typing import List, Optional
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+
+from apps.media_assets.models import Media
+from apps.media_assets.services.ffmpeg_runner import run_ffmpeg
+from apps.media_assets.services.probe import get_media_probe
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_MODES = ("interval", "scene")
+SPRITE_PATTERN = "sprite_%03d.jpg"
+VTT_FILENAME = "thumbnails.vtt"
+
+
+def _format_vtt_time(seconds: float) -> str:
+    ms = int(round(max(seconds, 0) * 1000))
+    h, ms = divmod(ms, 3600_000)
+    m, ms = divmod(ms, 60_000)
+    s, ms = divmod(ms, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d}.{ms:03d}"  # noqa: E231
+
+
+def _parse_metadata_times(path: Path) -> List[float]:
+    """解析 metadata=print 的输出 (frame:0 pts:0 pts_time:0.0)，得到被选中帧的时间戳。"""
+    times = []
+    if not path.exists():
+        return times
+    for line in path.read_text(encoding="utf-8", errors="replace").splitlines():
+        if not line.startswith("frame:"):
+            continue
+        for part in line.split():
+            if part.startswith("pts_time:"):
+                times.append(float(part.split(":", 1)[1]))
+    return times
+
+
+def build_vtt(times: List[float], duration: Optional[float], tile_w: int, tile_h: int, columns: int, rows: int) -> str:
+    """按取帧时间生成 WebVTT，每条 cue 指向雪碧图中的一格 (#xywh)。"""
+    per_sheet = columns * rows
+    lines = ["WEBVTT", ""]
+    for k, start in enumerate(times):
+        end = times[k + 1] if k + 1 < len(times) else (duration or start + 1)
+        if end <= start:
+            continue
+        sheet, cell = divmod(k, per_sheet)
+        x = (cell % columns) * tile_w
+        y = (cell // columns) * tile_h
+        lines.append(f"{_format_vtt_time(start)} --> {_format_vtt_time(end)}")
+        lines.append(f"{SPRITE_PATTERN % (sheet + 1)}#xywh={x},{y},{tile_w},{tile_h}")  # noqa: E231
+        lines.append("")
+    return "\n".join(lines)
+
+
+def generate_thumbnails(media: Media, mode: Optional[str] = None) -> int:
+    """
+    单次解码生成缩略图雪碧图 + WebVTT 索引，写入 media.thumbnails_vtt 所在目录。
+    interval 模式按固定间隔取帧，scene 模式按画面变化取帧 (时间戳由 metadata=print 记录)。
+    返回缩略图数量。
+    """
+    mode = mode or settings.THUMBNAIL_MODE
+    if mode not in THUMBNAIL_MODES:
+        raise ValueError(f"不支持的缩略图模式: {mode}")
+    if not media.source_video:
+        raise FileNotFoundError(f"Media (ID: {media.id}) 没有源视频，无法生成缩略图。")
+
+    probe = get_media_probe(media)
+    if probe and not probe.has_video:
+        raise ValueError(f"Media (ID: {media.id}) 的源文件不包含视频流。")
+    duration = probe.duration if probe else None
+
+    # 缩略图尺寸按源宽高比计算 (偶数高度)，VTT 的 xywh 依赖固定尺寸
+    tile_w = settings.THUMBNAIL_WIDTH
+    if probe and probe.width and probe.height:
+        tile_h = max(2, int(round(tile_w * probe.height / probe.width / 2)) * 2)
+    else:
+        tile_h = int(round(tile_w * 9 / 16 / 2)) * 2
+    columns, rows = (int(n) for n in settings.THUMBNAIL_GRID.lower().split("x"))
+
+    work_dir = Path(tempfile.mkdtemp(prefix=f"thumbs_{media.id}_"))
+    try:
+        metadata_path = work_dir / "selected.txt"
+        if mode == "interval":
+            sampler = f"fps=1/{settings.THUMBNAIL_INTERVAL}"
+        else:
+            # 第一帧总是保留，之后只取场景切换帧；metadata=print 记录被选中帧的时间
+            threshold = settings.THUMBNAIL_SCENE_THRESHOLD
+            sampler = f"select='eq(n\\,0)+gt(scene\\,{threshold})',metadata=print:file={metadata_path.as_posix()}"
+        vf = f"{sampler},scale={tile_w}:{tile_h},tile={columns}x{rows}"
+
+        run_ffmpeg(
+            [
+                "-i",
+                media.source_video.path,
+                "-an",
+                "-sn",
+                "-vf",
+                vf,
+                "-fps_mode",
+                "vfr",
+                "-q:v",
+                "5",
+                "-y",
+                str(work_dir / SPRITE_PATTERN),
+            ],
+            label=f"thumbnails {media.id}",
+            duration=duration,
+        )
+
+        sheets = sorted(work_dir.glob("sprite_*.jpg"))
+        if mode == "interval":
+            interval = settings.THUMBNAIL_INTERVAL
+            count = math.ceil(duration / interval) if duration else len(sheets) * columns * rows
+            times = [k * interval for k in range(count)]
+        else:
+            times = _parse_metadata_times(metadata_path)
+
+        vtt = build_vtt(times, duration, tile_w, tile_h, columns, rows)
+        _store_outputs(media, sheets, vtt)
+        logger.info(f"Media {media.id} 缩略图生成完成: {len(times)} 帧, {len(sheets)} 张雪碧图 ({mode})")
+        return len(times)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _store_outputs(media: Media, sheets: List[Path], vtt: str):
+    """把雪碧图与 VTT 写入同一目录 (覆盖旧文件，保证 VTT 内的相对路径有效)。"""
+    field = media.thumbnails_vtt
+    storage = field.storage
+    vtt_name = field.field.generate_filename(media, VTT_FILENAME)
+    directory = vtt_name.rsplit("/", 1)[0]
+
+    # 清理上一次生成、本次已不再需要的雪碧图 (例如切换取帧模式后张数变少)
+    new_names = {sheet.name for sheet in sheets}
+    if storage.exists(directory):
+        for old_name in storage.listdir(directory)[1]:
+            if old_name.startswith("sprite_") and old_name not in new_names:
+                storage.delete(f"{directory}/{old_name}")
+
+    for sheet in sheets:
+        name = f"{directory}/{sheet.name}"
+        if storage.exists(name):
+            storage.delete(name)
+        with sheet.open("rb") as f:
+            storage.save(name, File(f))
+
+    if storage.exists(vtt_name):
+        storage.delete(vtt_name)
+    field.name = storage.save(vtt_name, ContentFile(vtt.encode("utf-8")))
+    media.save(update_fields=["thumbnails_vtt"])
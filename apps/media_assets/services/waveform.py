@@ -0,0 +1,111 @@
+# 文件路径: apps/media_assets/services/waveform.py
+
+import logging
+import struct
+import sys
+import tempfile
+from array import array
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+from apps.media_assets.models import Media
+from apps.media_assets.services.ffmpeg_runner import run_ffmpeg
+from apps.media_assets.services.probe import get_media_probe
+
+logger = logging.getLogger(__name__)
+
+WAVEFORM_FILENAME = "peaks.dat"
+
+# 每次从解码结果中读取的峰值对数量 (决定内存占用上限)
+READ_PAIRS_PER_CHUNK = 4096
+
+
+def _compute_peaks(raw_path: Path, samples_per_pixel: int, bits: int) -> array:
+    """
+    逐块读取 s16le 单声道 PCM，计算每 samples_per_pixel 个采样的 (min, max)。
+    bits=8 时缩放为 int8，文件体积减半。
+    """
+    peaks = array("b" if bits == 8 else "h")
+    block_bytes = samples_per_pixel * 2
+    shift = 8 if bits == 8 else 0
+
+    with raw_path.open("rb") as f:
+        while True:
+            chunk = f.read(block_bytes * READ_PAIRS_PER_CHUNK)
+            if not chunk:
+                break
+            samples = array("h")
+            samples.frombytes(chunk[: len(chunk) - len(chunk) % 2])
+            if sys.byteorder == "big":
+                samples.byteswap()
+            for i in range(0, len(samples), samples_per_pixel):
+                block = samples[i : i + samples_per_pixel]
+                peaks.append(min(block) >> shift)
+                peaks.append(max(block) >> shift)
+    return peaks
+
+
+def build_dat(peaks: array, sample_rate: int, samples_per_pixel: int, bits: int) -> bytes:
+    """
+    按 audiowaveform 的 .dat (version 1) 格式打包，peaks.js 等前端库可直接加载:
+    int32 version | uint32 flags (bit0=8位) | int32 sample_rate | int32 samples_per_pixel | uint32 length | 数据
+    """
+    flags = 1 if bits == 8 else 0
+    header = struct.pack("<iIiiI", 1, flags, sample_rate, samples_per_pixel, len(peaks) // 2)
+    data = array(peaks.typecode, peaks)
+    if sys.byteorder == "big" and data.itemsize > 1:
+        data.byteswap()
+    return header + data.tobytes()
+
+
+def generate_waveform(media: Media) -> int:
+    """
+    解码一次音轨 (单声道重采样)，生成峰值文件写入 media.waveform_peaks。
+    返回峰值对数量；源文件不含音频时返回 0 且不生成文件。
+    """
+    if not media.source_video:
+        raise FileNotFoundError(f"Media (ID: {media.id}) 没有源视频，无法生成波形。")
+
+    probe = get_media_probe(media)
+    if probe and not probe.has_audio:
+        logger.info(f"Media {media.id} 不包含音频流，跳过波形生成。")
+        return 0
+
+    sample_rate = settings.WAVEFORM_SAMPLE_RATE
+    samples_per_pixel = settings.WAVEFORM_SAMPLES_PER_PIXEL
+    bits = settings.WAVEFORM_BITS
+
+    with tempfile.TemporaryDirectory(prefix=f"waveform_{media.id}_") as tmp:
+        raw_path = Path(tmp) / "audio.raw"
+        run_ffmpeg(
+            [
+                "-i",
+                media.source_video.path,
+                "-vn",
+                "-sn",
+                "-ac",
+                "1",
+                "-ar",
+                str(sample_rate),
+                "-f",
+                "s16le",
+                "-y",
+                str(raw_path),
+            ],
+            label=f"waveform {media.id}",
+            duration=probe.duration if probe else None,
+        )
+        peaks = _compute_peaks(raw_path, samples_per_pixel, bits)
+
+    if media.waveform_peaks:
+        media.waveform_peaks.delete(save=False)
+    media.waveform_peaks.save(
+        WAVEFORM_FILENAME, ContentFile(build_dat(peaks, sample_rate, samples_per_pixel, bits)), save=False
+    )
+    media.save(update_fields=["waveform_peaks"])
+
+    count = len(peaks) // 2
+    logger.info(f"Media {media.id} 波形峰值生成完成: {count} 对 ({samples_per_pixel} 采样/对, {bits} 位)")
+    return count
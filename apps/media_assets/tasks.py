@@ -2,40 +2,28 @@
 
 import logging
 import os
-import subprocess
-import threading
 from pathlib import Path
 
 from celery import shared_task
 from django.conf import settings
-from django.core.files import File
 
+from apps.media_assets.services.content_store import store_blob
+from apps.media_assets.services.ffmpeg_runner import run_ffmpeg
+from apps.media_assets.services.keyframes import build_keyframe_index
+from apps.media_assets.services.placement import is_local_storage, place_into_field
+from apps.media_assets.services.probe import get_media_probe, probe_media
+from apps.media_assets.services.scheduler import SlotsUnavailable, cpu_slots
 from apps.media_assets.services.storage import StorageService
+from apps.media_assets.services.thumbnails import generate_thumbnails
+from apps.media_assets.services.waveform import generate_waveform
+from apps.workflow.transcoding.services.proxy import queue_annotation_proxy
 
-from .models import Asset, Media
+from .models import Asset, KeyframeIndex, Media, MediaProbe
 
 # 获取一个模块级的 logger 实例
 logger = logging.getLogger(__name__)
 
 
-class ProgressLogger:
-    """ """
-
-    def __init__(self, filename):
-        self._filename = filename
-        self._size = float(os.path.getsize(filename))
-        self._seen_so_far = 0
-        self._lock = threading.Lock()
-
-    def __call__(self, bytes_amount):
-        with self._lock:
-            self._seen_so_far += bytes_amount
-            percentage = (self._seen_so_far / self._size) * 100
-            logger.info(
-                f"上传进度: {self._filename}  {self._seen_so_far} / {int(self._size)} bytes ({percentage:.2f}%)"  # noqa: E501,E231
-            )  # noqa: E231
-
-
 def _check_and_update_asset_processing_status(media):
     """
     (V4 命名修正版)
@@ -63,15 +51,22 @@ def _check_and_update_asset_processing_status(media):
     asset.save(update_fields=["processing_status"])
 
 
-@shared_task
-def process_single_media_file(media_id):
+@shared_task(bind=True, max_retries=None)
+def process_single_media_file(self, media_id):
     """
     (V4 命名修正版)
     处理单个物理媒体文件（Media），执行转码、上传等操作，
     并将结果URL存回该 Media 对象。
+    与其他重任务一样先申请 CPU 槽位，槽位已满时稍后重试。
     """
-    # 导入正确的模型
+    try:
+        with cpu_slots(f"media:{media_id}"):
+            return _process_single_media_file(media_id)
+    except SlotsUnavailable as e:
+        raise self.retry(countdown=settings.SCHEDULER_RETRY_DELAY, exc=e)
 
+
+def _process_single_media_file(media_id):
     media = Media.objects.get(id=media_id)
     storage_service = StorageService()
 
@@ -86,6 +81,11 @@ def process_single_media_file(media_id):
             # 注意：这里可以为 Media 模型增加一个 status 字段来记录失败状态
             raise FileNotFoundError(f"为 media {media.id} 在 {source_video_path} 未找到输入文件")
 
+        # 读取入库时的探测结果做前置校验，避免对无视频流的文件盲目执行 FFmpeg
+        probe = get_media_probe(media)
+        if probe and not probe.has_video:
+            raise ValueError(f"Media (ID: {media.id}) 的源文件不包含视频流 ({probe.format_name})")
+
         # 2. 准备临时目录和FFmpeg命令
         source_video_path_str = str(source_video_path)
         temp_dir = Path(settings.MEDIA_ROOT) / "temp_processed"
@@ -93,8 +93,7 @@ def process_single_media_file(media_id):
         # 使用 media.id 命名，确保唯一性
         processed_video_path = temp_dir / f"{media.id}.mp4"
 
-        ffmpeg_command = [
-            "ffmpeg",
+        ffmpeg_args = [
             "-i",
             source_video_path_str,
             "-c:v",
@@ -107,15 +106,9 @@ def process_single_media_file(media_id):
             str(processed_video_path),
         ]
 
-        # 3. 执行转码
-        try:
-            logger.info(f"执行 FFmpeg 命令: {' '.join(ffmpeg_command)}")
-            result = subprocess.run(ffmpeg_command, check=True, capture_output=True, text=True, encoding="utf-8")
-            logger.info(f"FFmpeg STDOUT: \n{result.stdout}")
-        except subprocess.CalledProcessError as e:
-            logger.error("!!! FFmpeg 命令执行失败 !!!")
-            logger.error(f"--- FFmpeg STDERR ---\n{e.stderr}")
-            raise
+        # 3. 执行转码 (增量读取进度，失败时日志中只包含 stderr 末尾)
+        logger.info(f"执行 FFmpeg 参数: {' '.join(ffmpeg_args)}")
+        run_ffmpeg(ffmpeg_args, label=f"media {media.id}", duration=probe.duration if probe else None)
 
         # 4. 保存处理后的文件并获取 URL
         # 注意：storage_service 也需要适配新的 Media 模型
@@ -139,6 +132,46 @@ def process_single_media_file(media_id):
         raise e
 
 
+@shared_task(bind=True, max_retries=None)
+def generate_media_thumbnails(self, media_id):
+    """为单个 Media 生成缩略图雪碧图与 WebVTT 索引 (单次解码)。"""
+    media = Media.objects.select_related("asset").get(id=media_id)
+    try:
+        with cpu_slots(f"thumbnails:{media_id}"):
+            count = generate_thumbnails(media)
+    except SlotsUnavailable as e:
+        raise self.retry(countdown=settings.SCHEDULER_RETRY_DELAY, exc=e)
+    except Exception as e:
+        logger.error(f"Media {media_id} 缩略图生成失败: {e}", exc_info=True)
+        raise
+    return f"Generated {count} thumbnails for Media {media_id}"
+
+
+@shared_task(bind=True, max_retries=None)
+def generate_media_waveform(self, media_id):
+    """为单个 Media 生成音频波形峰值文件。"""
+    media = Media.objects.select_related("asset").get(id=media_id)
+    try:
+        with cpu_slots(f"waveform:{media_id}"):
+            count = generate_waveform(media)
+    except SlotsUnavailable as e:
+        raise self.retry(countdown=settings.SCHEDULER_RETRY_DELAY, exc=e)
+    except Exception as e:
+        logger.error(f"Media {media_id} 波形生成失败: {e}", exc_info=True)
+        raise
+    return f"Generated {count} waveform peaks for Media {media_id}"
+
+
+def _is_already_placed(field_file, src_path: Path) -> bool:
+    """判断 FileField 当前指向的文件是否已是 src_path 本身 (同一 inode)，用于重复入库时跳过。"""
+    if not field_file or not is_local_storage(field_file.storage):
+        return False
+    try:
+        return os.path.samefile(field_file.path, src_path)
+    except OSError:
+        return False
+
+
 @shared_task
 def ingest_media_files(asset_id):
     """
@@ -159,6 +192,9 @@ def ingest_media_files(asset_id):
         video_files = list(upload_dir.glob("*.mp4")) + list(upload_dir.glob("*.mov"))
         logger.info(f"在 {upload_dir} 中找到 {len(video_files)} 个视频文件。")
 
+        placement_mode = settings.INGEST_PLACEMENT_MODE
+        logger.info(f"入库放置模式: {placement_mode}")
+
         for video_path in video_files:
             base_name = video_path.stem
             srt_path = upload_dir / f"{base_name}.srt"
@@ -172,13 +208,48 @@ def ingest_media_files(asset_id):
             )
             logger.info(f"已创建/找到 Media: {media.title}")
 
-            with video_path.open("rb") as f:
-                media.source_video.save(video_path.name, File(f), save=False)
-            if srt_path.exists():
-                with srt_path.open("rb") as f:
-                    media.source_subtitle.save(srt_path.name, File(f), save=False)
+            # [内容寻址入库] 流式计算 SHA-256，相同内容复用已有 Blob；
+            # 新内容以 hardlink/rename 放入 blobs/ (零拷贝)，仅跨设备才分块复制
+            source_changed = not _is_already_placed(media.source_video, video_path)
+            if not source_changed:
+                logger.info(f"Media {media.id} 的源视频已指向 {video_path.name}，跳过放置。")
+            else:
+                blob, blob_created = store_blob(video_path, mode=placement_mode)
+                media.blob = blob
+                media.source_video.name = blob.file.name
+                logger.info(f"源视频 {video_path.name} 已入库 (sha256={blob.sha256}, 新内容={blob_created})")
+            if srt_path.exists() and not _is_already_placed(media.source_subtitle, srt_path):
+                place_into_field(media.source_subtitle, srt_path, srt_path.name, mode=placement_mode)
             media.save()
 
+            # [探测一次] 新入库或缺少探测信息时执行 ffprobe，结果落库供下游复用
+            if source_changed or not MediaProbe.objects.filter(media=media).exists():
+                try:
+                    probe_media(media)
+                except Exception as e:
+                    logger.warning(f"Media {media.id} 探测失败 (不影响入库): {e}")
+
+            # [关键帧索引] 同样只在入库时提取一次，供裁切逻辑判断能否流复制
+            if source_changed or not KeyframeIndex.objects.filter(media=media).exists():
+                try:
+                    build_keyframe_index(media)
+                except Exception as e:
+                    logger.warning(f"Media {media.id} 关键帧索引建立失败 (不影响入库): {e}")
+
+            # [缩略图] 源视频变化或尚未生成时，异步生成雪碧图 + WebVTT
+            if source_changed or not media.thumbnails_vtt:
+                generate_media_thumbnails.delay(str(media.id))
+
+            # [波形峰值] 同上，解码一次音轨生成峰值文件
+            if source_changed or not media.waveform_peaks:
+                generate_media_waveform.delay(str(media.id))
+
+            # [标注代理] 源视频变化时重新生成；否则仅在从未生成过时补排队
+            try:
+                queue_annotation_proxy(media, force=source_changed)
+            except Exception as e:
+                logger.warning(f"Media {media.id} 标注代理转码排队失败 (不影响入库): {e}")
+
             # --- 核心逻辑：调用处理 Media 的任务 ---
             # process_single_media_file.delay(str(media.id))
 
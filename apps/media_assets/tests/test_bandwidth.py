@@ -0,0 +1,46 @@
+# 文件路径: apps/media_assets/tests/test_bandwidth.py
+
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from apps.media_assets.services.bandwidth import Throttle, TokenBucket
+
+
+class TokenBucketTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch("apps.media_assets.services.bandwidth.time.monotonic", return_value=100.0)
+        self.clock = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_burst_up_to_capacity_does_not_wait(self):
+        bucket = TokenBucket(rate=1000)
+        self.assertEqual(bucket.reserve(1000), 0.0)
+
+    def test_overdraft_returns_wait_time(self):
+        bucket = TokenBucket(rate=1000)
+        bucket.reserve(1000)
+        self.assertAlmostEqual(bucket.reserve(500), 0.5)
+        # 预支是累计的: 再申请 500 需要等到前面的欠额也补回
+        self.assertAlmostEqual(bucket.reserve(500), 1.0)
+
+    def test_tokens_refill_over_time_up_to_capacity(self):
+        bucket = TokenBucket(rate=1000)
+        bucket.reserve(1000)
+        self.clock.return_value = 100.25
+        self.assertEqual(bucket.reserve(250), 0.0)
+        # 空闲很久也只能积累 capacity 个令牌
+        self.clock.return_value = 200.0
+        self.assertEqual(bucket.reserve(1000), 0.0)
+        self.assertAlmostEqual(bucket.reserve(1), 0.001)
+
+
+class ThrottleTests(SimpleTestCase):
+    @mock.patch("apps.media_assets.services.bandwidth.acquire")
+    def test_acquires_in_quanta_and_ignores_rewinds(self, acquire):
+        throttle = Throttle(quantum=100)
+        throttle(60)
+        throttle(-60)  # boto3 重试时回退已发送的字节
+        acquire.assert_not_called()
+        throttle(60)
+        acquire.assert_called_once_with(120)
@@ -0,0 +1,139 @@
+# 文件路径: apps/media_assets/tests/test_multipart.py
+
+import os
+import tempfile
+from types import SimpleNamespace
+from unittest import mock
+
+from botocore.exceptions import ClientError
+from django.test import SimpleTestCase
+
+from apps.media_assets.services.multipart import resumable_upload
+
+CHUNK = 1024
+
+
+class StubClient:
+    """只实现 resumable_upload 用到的 S3 接口，记录每次调用。"""
+
+    def __init__(self, uploaded_parts=None, list_error=None):
+        self.meta = SimpleNamespace(events=mock.Mock())
+        self.uploaded_parts = uploaded_parts or {}
+        self.list_error = list_error
+        self.calls = []
+        self.part_bodies = {}
+
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        self.calls.append(("create",))
+        return {"UploadId": "new-upload"}
+
+    def list_parts(self, Bucket, Key, UploadId, PartNumberMarker=0):
+        self.calls.append(("list", UploadId, PartNumberMarker))
+        if self.list_error:
+            raise self.list_error
+        numbers = sorted(n for n in self.uploaded_parts if n > PartNumberMarker)
+        # 每页一个分片，覆盖分页逻辑
+        page = numbers[:1]
+        parts = [{"PartNumber": n, "Size": self.uploaded_parts[n][0], "ETag": self.uploaded_parts[n][1]} for n in page]
+        truncated = len(numbers) > 1
+        return {"Parts": parts, "IsTruncated": truncated, "NextPartNumberMarker": page[-1] if page else 0}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.calls.append(("upload", UploadId, PartNumber))
+        self.part_bodies[PartNumber] = Body.read()
+        return {"ETag": f'"etag-{PartNumber}"'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        self.calls.append(("complete", UploadId, MultipartUpload["Parts"]))
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.calls.append(("abort", UploadId))
+
+    def uploads(self):
+        return sorted(c[2] for c in self.calls if c[0] == "upload")
+
+    def completed(self):
+        return next(c for c in self.calls if c[0] == "complete")
+
+
+class MemoryState:
+    def __init__(self, state=None):
+        self.state = state
+        self.history = []
+
+    def load(self):
+        return self.state
+
+    def save(self, state):
+        self.state = None if state is None else {**state, "parts": dict(state["parts"])}
+        self.history.append(self.state)
+
+
+class ResumableUploadTests(SimpleTestCase):
+    def setUp(self):
+        # 3 个分片: 1024 + 1024 + 452 字节
+        self.data = os.urandom(2 * CHUNK + 452)
+        fd, self.path = tempfile.mkstemp()
+        with os.fdopen(fd, "wb") as f:
+            f.write(self.data)
+        self.addCleanup(os.remove, self.path)
+
+    def _upload(self, client, resume, etag="etag-3"):
+        resumable_upload(client, "bucket", self.path, "key.mp4", etag, CHUNK, resume)
+
+    def test_fresh_upload_sends_all_parts(self):
+        client, resume = StubClient(), MemoryState()
+        self._upload(client, resume)
+
+        self.assertEqual(client.uploads(), [1, 2, 3])
+        self.assertEqual(b"".join(client.part_bodies[n] for n in (1, 2, 3)), self.data)
+        self.assertEqual(
+            client.completed()[2], [{"PartNumber": n, "ETag": f'"etag-{n}"'} for n in (1, 2, 3)]  # noqa: E231
+        )
+        self.assertIsNone(resume.state)
+
+    def test_restore_reuses_parts_reported_by_list_parts(self):
+        # 持久化的进度只记录了分片 1；S3 上还有崩溃前已上传但未持久化的分片 2，以及大小不对的分片 3
+        client = StubClient(uploaded_parts={1: (CHUNK, '"s3-1"'), 2: (CHUNK, '"s3-2"'), 3: (100, '"s3-3"')})
+        resume = MemoryState(
+            {"upload_id": "old-upload", "etag": "etag-3", "chunksize": CHUNK, "parts": {"1": '"s3-1"'}}
+        )
+        self._upload(client, resume)
+
+        self.assertNotIn(("create",), client.calls)
+        self.assertEqual([c[2] for c in client.calls if c[0] == "list"], [0, 1, 2])
+        self.assertEqual(client.uploads(), [3])
+        self.assertEqual(client.part_bodies[3], self.data[2 * CHUNK :])
+        upload_id, parts = client.completed()[1:]
+        self.assertEqual(upload_id, "old-upload")
+        self.assertEqual([p["ETag"] for p in parts], ['"s3-1"', '"s3-2"', '"etag-3"'])
+        self.assertIsNone(resume.state)
+
+    def test_progress_is_persisted_after_each_part(self):
+        client, resume = StubClient(), MemoryState()
+        self._upload(client, resume)
+
+        saved_parts = [len(s["parts"]) for s in resume.history if s is not None]
+        self.assertEqual(saved_parts, [0, 1, 2, 3])
+
+    def test_changed_source_aborts_stale_upload(self):
+        client = StubClient(uploaded_parts={1: (CHUNK, '"s3-1"')})
+        resume = MemoryState(
+            {"upload_id": "old-upload", "etag": "old-etag", "chunksize": CHUNK, "parts": {"1": '"s3-1"'}}
+        )
+        self._upload(client, resume)
+
+        self.assertIn(("abort", "old-upload"), client.calls)
+        self.assertIn(("create",), client.calls)
+        self.assertEqual(client.uploads(), [1, 2, 3])
+        self.assertEqual(client.completed()[1], "new-upload")
+
+    def test_expired_upload_starts_over(self):
+        error = ClientError({"Error": {"Code": "NoSuchUpload"}}, "ListParts")
+        client = StubClient(list_error=error)
+        resume = MemoryState({"upload_id": "gone", "etag": "etag-3", "chunksize": CHUNK, "parts": {"1": '"s3-1"'}})
+        self._upload(client, resume)
+
+        self.assertIn(("create",), client.calls)
+        self.assertEqual(client.uploads(), [1, 2, 3])
+        self.assertEqual(client.completed()[1], "new-upload")
@@ -0,0 +1,44 @@
+# 文件路径: apps/media_assets/tests/test_storage.py
+
+import hashlib
+import os
+import tempfile
+
+from django.test import SimpleTestCase
+
+from apps.media_assets.services.storage import compute_s3_etag
+
+MB = 1024 * 1024
+
+
+class ComputeS3EtagTests(SimpleTestCase):
+    def setUp(self):
+        # 11 MB 的确定性内容: 按 5 MB 分片为 5 + 5 + 1 三个分片
+        self.data = (bytes(range(251)) * (11 * MB // 251 + 1))[: 11 * MB]
+        fd, self.path = tempfile.mkstemp()
+        with os.fdopen(fd, "wb") as f:
+            f.write(self.data)
+        self.addCleanup(os.remove, self.path)
+
+    def test_multipart_etag_matches_known_value(self):
+        # S3 对 5 MB 分片上传该文件返回的 ETag
+        self.assertEqual(
+            compute_s3_etag(self.path, threshold=8 * MB, chunksize=5 * MB), "af35a684675c366900bb097be2dffe92-3"
+        )
+
+    def test_multipart_etag_follows_s3_algorithm(self):
+        parts = [self.data[i : i + 5 * MB] for i in range(0, len(self.data), 5 * MB)]
+        expected = hashlib.md5(b"".join(hashlib.md5(p).digest() for p in parts)).hexdigest()
+        self.assertEqual(compute_s3_etag(self.path, threshold=8 * MB, chunksize=5 * MB), f"{expected}-{len(parts)}")
+
+    def test_below_threshold_is_plain_md5(self):
+        self.assertEqual(
+            compute_s3_etag(self.path, threshold=16 * MB, chunksize=5 * MB), "323431f0c479bbdc425e1a62b0b2abaa"
+        )
+
+    def test_small_chunksize_is_raised_to_s3_minimum(self):
+        # 与 boto3 一致，小于 5 MB 的分片大小会被提升到 5 MB
+        self.assertEqual(
+            compute_s3_etag(self.path, threshold=8 * MB, chunksize=1 * MB),
+            compute_s3_etag(self.path, threshold=8 * MB, chunksize=5 * MB),
+        )
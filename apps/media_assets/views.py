@@ -1,16 +1,27 @@
 # 文件路径: apps/media_assets/views.py
 
+import hashlib
+import json
+import os
+import re
+import zlib
 from pathlib import Path
 
 from django.conf import settings
 from django.contrib import admin, messages
 from django.contrib.auth.decorators import login_required
+from django.db import DatabaseError, transaction
 from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 
-from .models import Asset
+from .models import Asset, UploadSession
 from .tasks import ingest_media_files
 
+CONTENT_RANGE_RE = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+
+# 从请求流中读取分块时的单次读取大小
+STREAM_READ_SIZE = 1024 * 1024
+
 
 @login_required
 def batch_file_upload_view(request, asset_id):
@@ -34,6 +45,177 @@ def batch_file_upload_view(request, asset_id):
     return JsonResponse({"status": "error", "message": "Only POST method is allowed"}, status=405)
 
 
+class _Crc32:
+    """与 hashlib 接口一致的 CRC32 包装，便于与 sha256 统一处理。"""
+
+    def __init__(self):
+        self._value = 0
+
+    def update(self, data):
+        self._value = zlib.crc32(data, self._value)
+
+    def hexdigest(self):
+        return f"{self._value & 0xFFFFFFFF:08x}"
+
+
+def _parse_chunk_checksum(header_value):
+    """
+    解析 X-Chunk-Checksum 头，格式为 "<algo>=<hex>"，支持 sha256 与 crc32。
+    浏览器在非 HTTPS 环境下没有 crypto.subtle，因此前端默认使用 crc32。
+    """
+    if not header_value:
+        return None, None
+    algo, _, expected = header_value.partition("=")
+    algo = algo.strip().lower()
+    if algo == "sha256":
+        return hashlib.sha256(), expected.strip().lower()
+    if algo == "crc32":
+        return _Crc32(), expected.strip().lower()
+    raise ValueError(f"不支持的校验算法: {algo}")
+
+
+def _session_payload(session):
+    return {
+        "status": "success",
+        "session_id": str(session.id),
+        "filename": session.filename,
+        "offset": session.received_size,
+        "total_size": session.total_size,
+        "upload_status": session.status,
+        "chunk_size": settings.UPLOAD_CHUNK_SIZE,
+    }
+
+
+@login_required
+def upload_session_create_view(request, asset_id):
+    """
+    创建 (或恢复) 一个断点续传会话。
+    同一资产下同名同大小、仍在上传中的会话会被复用，客户端从返回的 offset 继续上传。
+    """
+    if request.method != "POST":
+        return JsonResponse({"status": "error", "message": "Only POST method is allowed"}, status=405)
+
+    try:
+        asset = Asset.objects.get(id=asset_id)
+    except Asset.DoesNotExist:
+        return JsonResponse({"status": "error", "message": "Asset not found"}, status=404)
+
+    try:
+        payload = json.loads(request.body or b"{}")
+        filename = Path(payload.get("filename", "")).name
+        total_size = int(payload.get("size"))
+    except (TypeError, ValueError):
+        return JsonResponse({"status": "error", "message": "Invalid filename or size"}, status=400)
+    if not filename or total_size < 0:
+        return JsonResponse({"status": "error", "message": "Invalid filename or size"}, status=400)
+
+    session = UploadSession.objects.filter(
+        asset=asset, filename=filename, total_size=total_size, status="uploading"
+    ).first()
+    if session is None:
+        session = UploadSession.objects.create(asset=asset, filename=filename, total_size=total_size)
+
+    session.part_path.parent.mkdir(parents=True, exist_ok=True)
+    # 以数据库中已确认的偏移量为准，丢弃上次中断时写了一半、未经校验的尾部数据
+    with open(session.part_path, "ab") as fp:
+        fp.truncate(session.received_size)
+
+    return JsonResponse(_session_payload(session))
+
+
+@login_required
+def upload_session_detail_view(request, asset_id, session_id):
+    """
+    GET: 查询会话状态 (续传偏移量)。
+    PUT: 以 Content-Range 追加一个分块，分块从请求流直接写入 .part 文件 (不经过 Django 临时文件)。
+    """
+    session = get_object_or_404(UploadSession, id=session_id, asset_id=asset_id)
+
+    if request.method == "GET":
+        return JsonResponse(_session_payload(session))
+    if request.method != "PUT":
+        return JsonResponse({"status": "error", "message": "Only GET/PUT methods are allowed"}, status=405)
+
+    match = CONTENT_RANGE_RE.match(request.headers.get("Content-Range", ""))
+    if not match:
+        return JsonResponse({"status": "error", "message": "Missing or invalid Content-Range"}, status=400)
+    start, end, total = (int(v) for v in match.groups())
+    length = end - start + 1
+    if length <= 0 or total != session.total_size or end >= total:
+        return JsonResponse({"status": "error", "message": "Content-Range out of bounds"}, status=400)
+
+    try:
+        hasher, expected = _parse_chunk_checksum(request.headers.get("X-Chunk-Checksum"))
+    except ValueError as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=400)
+
+    try:
+        with transaction.atomic():
+            # 同一会话同一时刻只允许一个分块写入
+            session = UploadSession.objects.select_for_update(nowait=True).get(id=session.id)
+
+            if session.status != "uploading":
+                return JsonResponse({**_session_payload(session), "status": "error"}, status=409)
+            if start != session.received_size:
+                # 偏移不一致：告知客户端从服务端记录的 offset 继续
+                return JsonResponse(
+                    {**_session_payload(session), "status": "error", "message": "Offset mismatch"}, status=409
+                )
+
+            remaining = length
+            with open(session.part_path, "r+b") as fp:
+                fp.seek(start)
+                fp.truncate()
+                while remaining > 0:
+                    buf = request.read(min(STREAM_READ_SIZE, remaining))
+                    if not buf:
+                        break
+                    fp.write(buf)
+                    if hasher:
+                        hasher.update(buf)
+                    remaining -= len(buf)
+
+                if remaining > 0 or (hasher and hasher.hexdigest() != expected):
+                    # 分块不完整或校验失败：回滚到分块起点，等待客户端重传
+                    fp.truncate(start)
+                    message = "Incomplete chunk" if remaining > 0 else "Chunk checksum mismatch"
+                    return JsonResponse(
+                        {**_session_payload(session), "status": "error", "message": message}, status=400
+                    )
+
+            session.received_size = end + 1
+            session.save(update_fields=["received_size", "modified"])
+    except DatabaseError:
+        return JsonResponse({"status": "error", "message": "Another chunk is being written"}, status=409)
+
+    return JsonResponse(_session_payload(session))
+
+
+@login_required
+def upload_session_complete_view(request, asset_id, session_id):
+    """
+    所有分块到齐后，在服务端完成组装：将 .part 文件原子重命名为 batch_uploads 下的目标文件。
+    """
+    if request.method != "POST":
+        return JsonResponse({"status": "error", "message": "Only POST method is allowed"}, status=405)
+
+    with transaction.atomic():
+        session = get_object_or_404(UploadSession.objects.select_for_update(), id=session_id, asset_id=asset_id)
+
+        if session.status == "completed":
+            return JsonResponse(_session_payload(session))
+        if session.received_size != session.total_size:
+            return JsonResponse(
+                {**_session_payload(session), "status": "error", "message": "Upload incomplete"}, status=409
+            )
+
+        os.replace(session.part_path, session.target_path)
+        session.status = "completed"
+        session.save(update_fields=["status", "modified"])
+
+    return JsonResponse(_session_payload(session))
+
+
 @login_required
 def batch_upload_page_view(request, asset_id):
     try:
@@ -17,6 +17,7 @@ from unfold.widgets import UnfoldAdminTextareaWidget
 from apps.media_assets.models import Asset
 
 from ..common.baseJob import BaseJob
+from ..delivery.tasks import enqueue_delivery
 from ..models import AnnotationJob, AnnotationProject
 from ..services.portable import ProjectPortableService  # 导入新服务
 from ..widgets import FileFieldWithActionButtonWidget
@@ -271,7 +272,7 @@ class AnnotationProjectAdmin(ModelAdmin):
     # (基础 readonly_fields 列表，get_readonly_fields 会在此基础上动态添加)
     readonly_fields = ("status",)  # 状态字段总是只读，由后台任务更新
 
-    actions = ["export_project_action"]
+    actions = ["export_project_action", "deliver_blueprint_action"]
 
     # --- 1. 导出功能 (Action) ---
     @admin.action(description="📦 导出项目包 (用于测试/迁移)")
@@ -293,6 +294,18 @@ class AnnotationProjectAdmin(ModelAdmin):
         except Exception as e:
             self.message_user(request, f"导出失败: {e}", level=messages.ERROR)
 
+    @admin.action(description="🚚 分发最终蓝图")
+    def deliver_blueprint_action(self, request, queryset):
+        projects = [p for p in queryset if p.final_blueprint_file]
+        for project in projects:
+            enqueue_delivery(project, "final_blueprint_file")
+        skipped = queryset.count() - len(projects)
+        self.message_user(
+            request,
+            f"已为 {len(projects)} 个项目创建分发任务" + (f"，{skipped} 个项目尚无蓝图已跳过。" if skipped else "。"),
+            messages.SUCCESS if projects else messages.WARNING,
+        )
+
     # --- 按钮具体实现 ---
     @action(description="导入项目 (ZIP)", url_path="import-wizard", icon="file_upload")
     def open_import_wizard(self, request: HttpRequest):
@@ -1,19 +1,54 @@
 # 文件路径: apps/workflow/services/label_studio.py
 
 import logging
-from typing import Optional, Tuple
+import threading
+from typing import Dict, List, Optional, Tuple
 
 import requests
 from decouple import config
 from django.conf import settings
 from django.template.loader import render_to_string
 from django.urls import reverse
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from apps.configuration.models import IntegrationSettings
-from apps.workflow.models import AnnotationProject, TranscodingJob
+from apps.workflow.models import AnnotationProject
 
 logger = logging.getLogger(__name__)
 
+# 每次调用的超时 (连接, 读取) 秒数；批量导入与导出的响应时间随任务数增长，单独放宽读取超时
+DEFAULT_TIMEOUT = (5, 60)
+IMPORT_TIMEOUT = (5, 300)
+EXPORT_TIMEOUT = (5, 300)
+
+# 按 data.media_id 回查任务时每页的任务数
+TASK_PAGE_SIZE = 500
+
+# --- 进程级共享的 HTTP 会话 ---
+# 所有 LabelStudioService 实例共用一个 Session (keep-alive 复用连接)，并挂载重试适配器:
+# 连接失败对所有请求重试；429 / 5xx 只对幂等请求 (GET 等) 重试，避免 POST 重试造成重复的项目或任务。
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=3,
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(max_retries=retry, pool_maxsize=10)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
 
 def _build_full_url(url_path):
     """
@@ -59,6 +94,63 @@ class LabelStudioService:
             "Authorization": f"Token {self.ACCESS_TOKEN}",
             "Content-Type": "application/json",
         }
+        self.session = get_session()
+
+    def _request(self, method: str, path: str, timeout=DEFAULT_TIMEOUT, **kwargs) -> requests.Response:
+        """经共享会话发送请求，每次调用都带超时。"""
+        return self.session.request(method, f"{self.BASE_URL}{path}", headers=self.headers, timeout=timeout, **kwargs)
+
+    def _find_task_ids(self, ls_project_id: int) -> Dict[str, int]:
+        """分页列出项目下的任务，返回 {data.media_id: task_id}。用于导入响应未返回任务 ID 的旧版 Label Studio。"""
+        found, page = {}, 1
+        while True:
+            response = self._request(
+                "GET", "/api/tasks", params={"project": ls_project_id, "page": page, "page_size": TASK_PAGE_SIZE}
+            )
+            if response.status_code == 404:
+                # 超出最后一页
+                return found
+            response.raise_for_status()
+            data = response.json()
+            tasks = data.get("tasks", []) if isinstance(data, dict) else data
+            for task in tasks:
+                media_id = (task.get("data") or {}).get("media_id")
+                if media_id:
+                    found[media_id] = task["id"]
+            if len(tasks) < TASK_PAGE_SIZE:
+                return found
+            page += 1
+
+    def _import_tasks(self, ls_project_id: int, medias: List) -> dict:
+        """
+        一次请求批量导入所有 Media 的任务，返回 {media.id: task_id}。
+        任务 ID 与提交顺序一一对应 (return_task_ids)；任务 data 中同时带上 media_id，
+        响应中没有任务 ID 时按 media_id 回查。
+        """
+        if not medias:
+            return {}
+        tasks_payload = [{"data": {"video_url": video_url, "media_id": str(media.id)}} for media, video_url in medias]
+        response = self._request(
+            "POST",
+            f"/api/projects/{ls_project_id}/import",
+            timeout=IMPORT_TIMEOUT,
+            params={"return_task_ids": "true"},
+            json=tasks_payload,
+        )
+        if response.status_code >= 400:
+            logger.error(f"批量导入 Task 失败 ({response.status_code}): {response.text}")
+        response.raise_for_status()
+
+        task_ids = response.json().get("task_ids") or []
+        if len(task_ids) == len(medias):
+            return {media.id: task_id for (media, _), task_id in zip(medias, task_ids)}
+
+        found = self._find_task_ids(ls_project_id)
+        task_mapping = {media.id: found[str(media.id)] for media, _ in medias if str(media.id) in found}
+        for media, _ in medias:
+            if media.id not in task_mapping:
+                logger.error(f"为 Media '{media.title}' 创建 Task 失败: 导入结果中找不到对应任务。")
+        return task_mapping
 
     def create_project_for_asset(self, project: AnnotationProject) -> Tuple[bool, str, Optional[int], dict]:
         """
@@ -96,7 +188,7 @@ class LabelStudioService:
             logger.info(f"URL: {url}")
             logger.info(f"Auth Header Length: {len(auth_header)}")
             logger.info(f"Auth Header Preview: {auth_header[:15]}...")
-            project_response = requests.post(url, json=project_payload, headers=self.headers)
+            project_response = self._request("POST", "/api/projects", json=project_payload)
 
             # [DEBUG 2] 捕获并打印服务器返回的错误详情
             if project_response.status_code >= 400:
@@ -111,51 +203,22 @@ class LabelStudioService:
             if not project_id:
                 return False, "API 调用成功，但未返回项目ID。", None, {}
 
-            task_mapping = {}
+            medias = []
             for media_item in asset.medias.all():
                 if not media_item.source_video:
                     continue
 
                 # --- ↓↓↓ 核心查找逻辑 (优化版) ↓↓↓ ---
-                video_url = None
-
-                # 1. 优先尝试: 查找匹配的转码任务 (Proxy Video)
-                # 这通常是体积更小、兼容性更好的 mp4，适合标注端流畅播放
-                if project.source_encoding_profile:
-                    transcoding_job = (
-                        TranscodingJob.objects.filter(
-                            media=media_item,
-                            profile=project.source_encoding_profile,
-                            status=TranscodingJob.STATUS.COMPLETED,
-                        )
-                        .order_by("-modified")
-                        .first()
-                    )
-
-                    if transcoding_job and transcoding_job.output_url:
-                        # [关键修改] 使用动态拼接，确保拿到绝对 URL
-                        video_url = _build_full_url(transcoding_job.output_url)
-                        logger.info(f"LabelStudio Payload: 为 Media '{media_item.title}' 使用转码文件: {video_url}")
-
-                # 2. 兜底策略: 如果没有转码文件，回退到原始文件 (Source Video)
-                if not video_url:
-                    # [关键修改] 同样应用动态拼接
-                    # media_item.source_video.url 在本地模式下通常是 "/media/source_files/..."
-                    video_url = _build_full_url(media_item.source_video.url)
-                    logger.info(f"LabelStudio Payload: 为 Media '{media_item.title}' 回退使用原始文件: {video_url}")
+                # 与 L1 编辑器共用 Media.get_best_playback_url:
+                # 项目指定的转码产出 -> HLS 播放列表 -> 入库自动生成的标注代理 -> 原始文件
+                video_url = media_item.get_best_playback_url(encoding_profile=project.source_encoding_profile)
+                logger.info(f"LabelStudio Payload: 为 Media '{media_item.title}' 使用播放地址: {video_url}")
 
                 # --- ↑↑↑ 查找逻辑结束 ↑↑↑ ---
+                medias.append((media_item, video_url))
 
-                task_payload = {"data": {"video_url": video_url}}
-                task_response = requests.post(
-                    f"{self.BASE_URL}/api/projects/{project_id}/tasks", json=task_payload, headers=self.headers
-                )
-
-                if task_response.status_code == 201:
-                    task_id = task_response.json().get("id")
-                    task_mapping[media_item.id] = task_id
-                else:
-                    logger.error(f"为 Media '{media_item.title}' 创建 Task 失败: {task_response.text}")
+            # 所有 Media 的任务一次批量导入 (而不是每个 Media 一次请求)
+            task_mapping = self._import_tasks(project_id, medias)
 
             message = f"成功在 Label Studio 中创建项目 (ID: {project_id}) 并为 {len(task_mapping)} 个媒体文件准备了任务！"
             return True, message, project_id, task_mapping
@@ -171,10 +234,11 @@ class LabelStudioService:
         """
         try:
             logger.info(f"开始从 LS 导出 Project {ls_project_id} 的全部数据...")
-            export_url = f"{self.BASE_URL}/api/projects/{ls_project_id}/export"
 
             # 使用 stream=True 适合处理可能的大文件
-            response = requests.get(export_url, headers=self.headers, stream=True, timeout=300)  # 增加超时
+            response = self._request(
+                "GET", f"/api/projects/{ls_project_id}/export", timeout=EXPORT_TIMEOUT, stream=True
+            )  # 增加超时
             response.raise_for_status()
 
             return True, "Export successful", response.content
@@ -192,8 +256,6 @@ class LabelStudioService:
         用于项目导入时的状态恢复。
         """
         try:
-            url = f"{self.BASE_URL}/api/tasks/{task_id}/annotations"
-
             # 清洗数据：移除 ID 和元数据，让 LS 生成新的
             payload = {
                 "result": annotation_data.get("result", []),
@@ -203,7 +265,7 @@ class LabelStudioService:
                 "lead_time": annotation_data.get("lead_time", 0),
             }
 
-            response = requests.post(url, json=payload, headers=self.headers)
+            response = self._request("POST", f"/api/tasks/{task_id}/annotations", json=payload)
             if response.status_code == 201:
                 return True
             else:
@@ -55,6 +55,9 @@ def start_l1_annotation_view(request, job_id):
     raw_srt_url = job.media.source_subtitle.url if job.media.source_subtitle else ""
     srt_url = _build_full_media_url(raw_srt_url)
 
+    # 3. 预计算的波形峰值 (未生成时为空，编辑器回退到自行解码音轨)
+    peaks_url = job.media.get_waveform_url()
+
     logger.debug(f"DEBUG URL: FINAL URLs prepared for Subeditor: video_url={video_url}, srt_url={srt_url}")
 
     job_id_param = job.id
@@ -64,7 +67,7 @@ def start_l1_annotation_view(request, job_id):
     )
 
     # 构建 vss-subeditor 的 URL
-    subeditor_url = f"{settings.SUBEDITOR_PUBLIC_URL}?videoUrl={video_url}&srtUrl={srt_url}&jobId={job_id_param}&returnUrl={return_url_param}"  # noqa: E501
+    subeditor_url = f"{settings.SUBEDITOR_PUBLIC_URL}?videoUrl={video_url}&srtUrl={srt_url}&peaksUrl={peaks_url}&jobId={job_id_param}&returnUrl={return_url_param}"  # noqa: E501
 
     return redirect(subeditor_url)
 
@@ -86,6 +89,7 @@ def revise_l1_annotation_view(request, job_id):
 
     raw_srt_url = job.l1_output_file.url if job.l1_output_file else ""
     srt_url = _build_full_media_url(raw_srt_url)
+    peaks_url = job.media.get_waveform_url()
 
     job_id_param = job.id
     return_url_param = request.build_absolute_uri(
@@ -93,7 +97,7 @@ def revise_l1_annotation_view(request, job_id):
     )
 
     # 构建 vss-subeditor 的 URL
-    subeditor_url = f"{settings.SUBEDITOR_PUBLIC_URL}?videoUrl={video_url}&srtUrl={srt_url}&jobId={job_id_param}&returnUrl={return_url_param}"  # noqa: E501
+    subeditor_url = f"{settings.SUBEDITOR_PUBLIC_URL}?videoUrl={video_url}&srtUrl={srt_url}&peaksUrl={peaks_url}&jobId={job_id_param}&returnUrl={return_url_param}"  # noqa: E501
 
     return redirect(subeditor_url)
 
@@ -4,12 +4,13 @@ import json
 import logging
 
 from django.conf import settings
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.http import HttpRequest
 from django.urls import path, reverse
 from django.utils.html import format_html
 from unfold.admin import ModelAdmin
 
+from ..delivery.tasks import enqueue_delivery
 from .forms import CreativeProjectForm
 from .models import CreativeProject
 
@@ -57,6 +58,19 @@ class CreativeProjectAdmin(ModelAdmin):
     autocomplete_fields = ["inference_project"]
 
     readonly_fields = ("status",)
+    actions = ["deliver_final_video_action"]
+
+    @admin.action(description="🚚 分发最终成片")
+    def deliver_final_video_action(self, request, queryset):
+        projects = [p for p in queryset if p.final_video_file]
+        for project in projects:
+            enqueue_delivery(project, "final_video_file")
+        skipped = queryset.count() - len(projects)
+        self.message_user(
+            request,
+            f"已为 {len(projects)} 个项目创建分发任务" + (f"，{skipped} 个项目尚无成片已跳过。" if skipped else "。"),
+            messages.SUCCESS if projects else messages.WARNING,
+        )
 
     def status_badge(self, obj):
         return obj.status
@@ -1,6 +1,5 @@
 import json
 import logging
-import subprocess
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List
@@ -8,6 +7,10 @@ from typing import Dict, List
 from django.conf import settings
 
 from apps.media_assets.models import Media
+from apps.media_assets.services.ffmpeg_runner import check_ffmpeg, run_ffmpeg
+from apps.media_assets.services.keyframes import get_keyframe_index
+from apps.media_assets.services.probe import get_media_probe
+from apps.workflow.annotation.services.modeling.time_utils import TimeConverter
 
 # from tqdm import tqdm # 避免在后台任务中使用 tqdm
 
@@ -29,8 +32,8 @@ class SynthesisService:
         self.project_id = project_id
 
         try:
-            subprocess.run(["ffmpeg", "-version"], capture_output=True, text=True, check=True, encoding="utf-8")
-            logger.info("ffmpeg found on system path and is functioning.")
+            version = check_ffmpeg()
+            logger.info(f"ffmpeg found on system path and is functioning: {version}")
         except Exception:
             logger.error("FATAL: ffmpeg not found or not functional.", exc_info=True)
             raise
@@ -87,20 +90,9 @@ class SynthesisService:
             logger.critical(f"视频合成时失败: {e}", exc_info=True)
             raise
 
-    def _run_ffmpeg_command(self, cmd: List[str], log_label: str):
-        """执行 FFmpeg 命令的封装"""
-        logger.debug(f"Executing ffmpeg command for '{log_label}': {' '.join(cmd)}")
-        try:
-            # 捕获输出，确保 Check=True 会打印 stderr
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True, encoding="utf-8")
-            if result.stderr:
-                logger.debug(f"ffmpeg stderr for '{log_label}' (Ignored warnings): \n{result.stderr}")
-        except subprocess.CalledProcessError as e:
-            error_message = f"FFMPEG command for '{log_label}' failed with exit code {e.returncode}.\n"
-            error_message += f"Command: {' '.join(e.cmd)}\n"
-            error_message += f"Stderr: {e.stderr}"
-            logger.error(error_message)
-            raise
+    def _run_ffmpeg_command(self, args: List[str], log_label: str):
+        """执行 FFmpeg 命令的封装 (args 不含 ffmpeg 本身)，失败时日志中包含 stderr 末尾。"""
+        run_ffmpeg(args, label=log_label)
 
     def _create_narration_track(self, editing_script: List[Dict], temp_dir: Path, local_audio_base_dir: Path) -> Path:
         """
@@ -164,7 +156,6 @@ class SynthesisService:
                 f.write(f"file '{path.resolve()}'\n")
 
         cmd = [
-            "ffmpeg",
             "-y",
             "-f",
             "concat",
@@ -196,15 +187,23 @@ class SynthesisService:
 
         # --- [START OF TEMPORARY FIX: 建立可靠的源视频映射] ---
         source_media_lookup = {}
+        # Chapter ID -> MediaProbe (入库时探测的时长等信息，用于校验裁切区间)
+        source_probe_lookup = {}
+        # Chapter ID -> Media (用于读取关键帧索引)
+        source_media_lookup_by_chapter = {}
         try:
             # 1. 查找所有 Media 文件
-            media_files = Media.objects.filter(asset_id=asset_id, source_video__isnull=False)
+            media_files = Media.objects.filter(asset_id=asset_id, source_video__isnull=False).select_related(
+                "probe", "keyframe_index"
+            )
 
             for media in media_files:
                 # 2. 使用 sequence_number (对应 Chapter ID) 和实际的视频路径建立映射
                 if media.source_video and media.source_video.path and Path(media.source_video.path).is_file():
                     # 映射键: Chapter ID (字符串形式的 sequence_number)
                     source_media_lookup[str(media.sequence_number)] = Path(media.source_video.path)
+                    source_probe_lookup[str(media.sequence_number)] = get_media_probe(media)
+                    source_media_lookup_by_chapter[str(media.sequence_number)] = media
                     logger.info(f"建立映射: Chapter {media.sequence_number} -> {Path(media.source_video.path).name}")
 
             if not source_media_lookup:
@@ -230,7 +229,8 @@ class SynthesisService:
                 chapter_map[chap_id] = None
                 logger.warning(f"Chapter {chap_id} 无法通过 ORM 映射到 Media 文件。")
 
-        clip_files = []
+        # 第一遍: 解析并校验全部片段，得到裁切计划
+        clip_plan = []
 
         # 使用 for 循环代替 tqdm (在 Celery 任务中避免使用终端进度条)
         for i, entry in enumerate(editing_script):
@@ -248,8 +248,6 @@ class SynthesisService:
                     )
                     continue
 
-                temp_clip_path = temp_dir / f"clip_{i:03d}_{j:03d}.mp4"  # noqa: E231
-
                 # 确保 start_time 和 duration 是字符串/可用于 -ss/-t 参数
                 start_time = clip.get("start_time")
                 duration = clip.get("duration")
@@ -258,24 +256,60 @@ class SynthesisService:
                     logger.warning(f"剪辑片段 {i}-{j} 缺少 start_time 或 duration，跳过。")
                     continue
 
-                cmd = [
-                    "ffmpeg",
-                    "-y",
-                    "-ss",
-                    start_time,
-                    "-i",
-                    str(source_video),
-                    "-t",
-                    str(duration),
-                    "-an",
-                    "-vcodec",
-                    "libx264",
-                    "-preset",
-                    "ultrafast",
-                    str(temp_clip_path),
-                ]
-                self._run_ffmpeg_command(cmd, f"Slicing clip {i}-{j}")
-                clip_files.append(temp_clip_path)
+                start_seconds = TimeConverter.ass_time_to_seconds(str(start_time))
+                # duration 与 start_time 一样可能是 ASS 时间串 (0:00:03.50)，数值则直接按秒处理
+                if isinstance(duration, (int, float)):
+                    duration_seconds = float(duration)
+                else:
+                    duration_seconds = TimeConverter.ass_time_to_seconds(str(duration))
+                if duration_seconds <= 0:
+                    logger.warning(f"剪辑片段 {i}-{j} 时长无效 ({duration})，跳过。")
+                    continue
+
+                # 使用探测信息校验裁切区间，避免 -ss 越过片尾导致 FFmpeg 产出空文件
+                probe = source_probe_lookup.get(chapter_id)
+                if probe and probe.duration:
+                    if start_seconds >= probe.duration:
+                        logger.warning(f"剪辑片段 {i}-{j} 起点 {start_seconds:.3f}s 超出源视频时长 {probe.duration:.3f}s，跳过。")
+                        continue
+                    remaining = probe.duration - start_seconds
+                    if duration_seconds > remaining:
+                        logger.warning(f"剪辑片段 {i}-{j} 时长超出源视频结尾，截断为 {remaining:.3f}s。")
+                        duration_seconds = remaining
+
+                clip_plan.append(
+                    {
+                        "label": f"{i}-{j}",
+                        "path": temp_dir / f"clip_{i:03d}_{j:03d}.mp4",  # noqa: E231
+                        "chapter_id": chapter_id,
+                        "source_video": source_video,
+                        "start_time": start_time,
+                        "start_seconds": start_seconds,
+                        "duration": duration_seconds,
+                    }
+                )
+
+        # 第二遍: 全部片段 GOP 对齐且源编码一致时直接流复制，否则逐段重新编码
+        stream_copy = self._can_stream_copy(clip_plan, source_media_lookup_by_chapter)
+        logger.info(f"B-roll 裁切模式: {'流复制 (GOP 对齐)' if stream_copy else '重新编码'}")
+
+        clip_files = []
+        for item in clip_plan:
+            codec_args = ["-c:v", "copy"] if stream_copy else ["-vcodec", "libx264", "-preset", "ultrafast"]
+            cmd = [
+                "-y",
+                "-ss",
+                str(item["start_time"]),
+                "-i",
+                str(item["source_video"]),
+                "-t",
+                f"{item['duration']:.3f}",
+                "-an",
+                *codec_args,
+                str(item["path"]),
+            ]
+            self._run_ffmpeg_command(cmd, f"Slicing clip {item['label']}")
+            clip_files.append(item["path"])
 
         output_path = self.work_dir / "final_video_no_audio.mp4"
         if not clip_files:
@@ -289,7 +323,6 @@ class SynthesisService:
 
         # 拼接视频
         cmd = [
-            "ffmpeg",
             "-y",
             "-f",
             "concat",
@@ -306,6 +339,34 @@ class SynthesisService:
         logger.info(f"✅ B-roll视频轨道拼接完毕: {output_path}")
         return output_path
 
+    def _can_stream_copy(self, clip_plan: List[Dict], media_lookup: Dict[str, Media]) -> bool:
+        """
+        判断 B-roll 片段能否全部使用 -c copy 裁切。
+        要求: 每个片段的 [起点, 终点] 都落在源视频的关键帧上 (GOP 对齐)，
+        且所有片段来自编码参数一致的源 (否则 concat -c copy 会产出不可播放的文件)。
+        任一条件不满足即整体回退到重新编码，保证输出帧级精确。
+        """
+        if not clip_plan:
+            return False
+
+        signatures = set()
+        for item in clip_plan:
+            media = media_lookup.get(item["chapter_id"])
+            if media is None:
+                return False
+            index = get_keyframe_index(media)
+            probe = get_media_probe(media)
+            if index is None or probe is None:
+                return False
+
+            t0 = item["start_seconds"]
+            if not index.is_gop_aligned(t0, t0 + item["duration"]):
+                logger.info(f"剪辑片段 {item['label']} 未对齐关键帧 (最近关键帧 {index.keyframe_at_or_before(t0)}s)。")
+                return False
+            signatures.add((probe.video_codec, probe.width, probe.height, probe.frame_rate))
+
+        return len(signatures) == 1
+
     def _combine_audio_video(self, video_path: Path, audio_path: Path) -> Path:
         """
         步骤三：合并音视频，生成最终成片。
@@ -315,7 +376,6 @@ class SynthesisService:
 
         # 原始的 FFmpeg 命令
         cmd = [
-            "ffmpeg",
             "-y",
             "-i",
             str(video_path),
@@ -6,8 +6,9 @@ from pathlib import Path
 
 from celery import shared_task
 from django.conf import settings
-from django.core.files.base import ContentFile
 
+from apps.media_assets.services.placement import place_into_field
+from apps.media_assets.services.scheduler import SlotsUnavailable, cpu_slots
 from apps.workflow.inference.tasks import poll_cloud_task_status
 
 from .jobs import CreativeJob
@@ -351,8 +352,18 @@ def finalize_edit_script_task(job_id: str, cloud_task_data: dict, **kwargs):
 # ==============================================================================
 
 
-@shared_task(name="apps.workflow.creative.tasks.start_synthesis_task")
-def start_synthesis_task(project_id: str, **kwargs):
+@shared_task(bind=True, name="apps.workflow.creative.tasks.start_synthesis_task", max_retries=None)
+def start_synthesis_task(self, project_id: str, **kwargs):
+    # 合成包含多段 FFmpeg 编码，与转码共享全局 CPU 槽位
+    try:
+        with cpu_slots(f"synthesis:{project_id}"):
+            _run_synthesis(project_id)
+    except SlotsUnavailable as e:
+        logger.info(f"[Synthesis] 项目 {project_id} 等待 CPU 槽位: {e}")
+        raise self.retry(countdown=settings.SCHEDULER_RETRY_DELAY, exc=e)
+
+
+def _run_synthesis(project_id: str):
     action = None
     job = None
     try:
@@ -429,8 +440,8 @@ def finalize_synthesis_task(job_id: str, final_output_path: str, **kwargs):
         if not output_path_obj.exists():
             raise FileNotFoundError(f"合成产物未找到: {final_output_path}")
 
-        with output_path_obj.open("rb") as f:
-            project.final_video_file.save(output_path_obj.name, ContentFile(f.read()), save=False)
+        # 合成产物位于工作目录，直接移动到最终位置 (远程存储时流式上传)，不整文件读入内存
+        place_into_field(project.final_video_file, output_path_obj, output_path_obj.name, mode="move")
 
         project.status = CreativeProject.Status.COMPLETED
         project.save()
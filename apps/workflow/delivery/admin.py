@@ -1,14 +1,54 @@
 # 文件路径: apps/workflow/delivery/admin.py
 
-from django.contrib import admin
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib import admin, messages
+from django.db.models import Q
+from django.utils.html import format_html
+from django.utils.timezone import now
 from unfold.admin import ModelAdmin
 
-from ..models import DeliveryJob
+from ..common.baseJob import BaseJob
+from ..models import DeliveryJob, TranscodingJob
+from .tasks import queue_single_delivery
 
 
 @admin.register(DeliveryJob)
 class DeliveryJobAdmin(ModelAdmin):
-    list_display = ("__str__", "status", "delivery_url", "modified")
+    list_display = ("__str__", "status", "delivery_url", "target_summary", "checksum", "modified")
     list_filter = ("status", "source_content_type")
-    readonly_fields = ("source_object", "delivery_url")
-    search_fields = ("source_object_id",)
+    readonly_fields = ("source_object", "source_field", "delivery_url", "checksum", "target_results", "upload_state")
+    search_fields = ("source_object_id", "checksum")
+    actions = ["retry_delivery_action"]
+
+    @admin.display(description="目标 (成功 / 全部)")
+    def target_summary(self, obj):
+        results = obj.target_results or {}
+        if not results:
+            return "—"
+        failed = [name for name, r in results.items() if r.get("error")]
+        text = f"{len(results) - len(failed)} / {len(results)}"
+        if failed:
+            return format_html('<span style="color:#dc2626" title="{}">{}</span>', ", ".join(failed), text)
+        return text
+
+    @admin.action(description="🔁 重试分发 (续传未完成的分片)")
+    def retry_delivery_action(self, request, queryset):
+        # 失败的任务，以及超过 DELIVERY_STALE_AFTER 秒没有任何进度的"处理中"任务 (worker 已退出)；
+        # 仍在运行的任务不重复派发，否则两处共用同一个 upload_state / UploadId 同时上传
+        stale_before = now() - timedelta(seconds=settings.DELIVERY_STALE_AFTER)
+        retryable = Q(status=BaseJob.STATUS.ERROR) | Q(status=BaseJob.STATUS.PROCESSING, modified__lt=stale_before)
+        jobs = list(queryset.filter(retryable))
+        running = queryset.filter(status=BaseJob.STATUS.PROCESSING, modified__gte=stale_before).count()
+        queued = 0
+        for job in jobs:
+            source = job.source_object
+            # 分发失败时源转码任务被标记为 ERROR，产出仍在，恢复为 QA_PENDING 后重新交付
+            if isinstance(source, TranscodingJob) and source.status == BaseJob.STATUS.ERROR and source.output_file:
+                TranscodingJob.objects.filter(pk=source.pk).update(status=BaseJob.STATUS.QA_PENDING)
+            if queue_single_delivery(job.id, claimable=retryable):
+                queued += 1
+        self.message_user(request, f"已重新派发 {queued} 个分发任务。", messages.SUCCESS if queued else messages.WARNING)
+        if running:
+            self.message_user(request, f"{running} 个任务仍在处理中 (近期有进度)，未重新派发。", messages.WARNING)
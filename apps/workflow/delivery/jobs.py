@@ -10,17 +10,30 @@ from ..common.baseJob import BaseJob
 class DeliveryJob(BaseJob):
     """
     一个通用的、原子的分发任务。
-    它负责将一个源产出物（如转码文件）交付到一个目标位置（如S3）。
+    它负责将一个源产出物（如转码文件、二创成片、标注产物）交付到所有启用的分发目标（本地媒体服务器、S3、镜像）。
     """
 
     # --- 核心设计：使用通用外键关联任何源对象 ---
+    # 项目类模型使用 UUID 主键，因此 object_id 用字符串保存
     source_content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
-    source_object_id = models.PositiveIntegerField()
+    source_object_id = models.CharField(max_length=64, db_index=True)
     source_object = GenericForeignKey("source_content_type", "source_object_id")
 
+    # 要交付的文件字段名；留空时按源类型取默认字段 (转码任务 output_file、二创项目 final_video_file)
+    source_field = models.CharField(max_length=64, blank=True, default="", verbose_name="源文件字段")
+
     # 记录最终分发到的 URL
     delivery_url = models.URLField(max_length=1024, blank=True, null=True, verbose_name="分发后URL (CDN)")
 
+    # 交付内容的校验值 (S3 ETag 规则: MD5 或 分片 MD5 的 MD5-分片数)，用于重试时判断目标是否已是相同内容
+    checksum = models.CharField(max_length=80, blank=True, default="", verbose_name="校验值")
+
+    # 各目标的交付结果: {目标名称: {"url", "skipped", "elapsed", "error"}}
+    target_results = models.JSONField(default=dict, blank=True, verbose_name="各目标交付结果")
+
+    # 未完成的分片上传进度: {"目标名称:路径": {"upload_id", "etag", "chunksize", "parts"}}，worker 重启后据此续传
+    upload_state = models.JSONField(default=dict, blank=True, verbose_name="分片上传进度")
+
     def __str__(self):
         return f"分发 {self.source_content_type.model} (ID: {self.source_object_id})"
 
@@ -0,0 +1,281 @@
+# 文件路径: apps/workflow/delivery/services/fanout.py
+
+import logging
+import os
+import posixpath
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils.timezone import now
+
+from apps.configuration.models import DeliveryTarget
+from apps.media_assets.services.storage import combine_checksums, compute_s3_etag
+
+from ...models import DeliveryJob, TranscodingJob
+from .targets import get_active_targets, get_backend
+
+logger = logging.getLogger(__name__)
+
+# 各源类型默认交付的文件字段 (ContentType.model -> 字段名)；其他类型 (如标注项目的产物) 需在任务上指定 source_field
+SOURCE_DEFAULT_FIELDS = {
+    "transcodingjob": "output_file",
+    "creativeproject": "final_video_file",
+}
+
+
+@dataclass
+class DeliverySource:
+    """待交付的产出: (本地路径, 相对路径) 列表，入口文件 (返回其 URL) 排在最后。"""
+
+    files: List[Tuple[Path, str]]
+    entry_key: str
+
+
+@dataclass
+class FanoutResult:
+    checksum: str
+    results: Dict[str, Dict] = field(default_factory=dict)
+    primary: Optional[str] = None
+    # 交付结束时仍未完成的分片上传进度 (全部成功时为空)
+    upload_state: Dict[str, Dict] = field(default_factory=dict)
+
+    @property
+    def failed(self) -> List[str]:
+        return [name for name, r in self.results.items() if r.get("error")]
+
+    @property
+    def skipped(self) -> List[str]:
+        return [name for name, r in self.results.items() if r.get("skipped")]
+
+    @property
+    def url(self) -> Optional[str]:
+        return self.results.get(self.primary, {}).get("url")
+
+
+class UploadStateStore:
+    """
+    DeliveryJob.upload_state 的读写。各目标线程共用同一个 JSON 字段，
+    这里在内存中维护整份进度并加锁整体写回，避免并发写入互相覆盖。
+    """
+
+    def __init__(self, job: DeliveryJob):
+        self.job_id = job.id
+        self._state = dict(job.upload_state or {})
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return dict(self._state)
+
+    def slot(self, name: str) -> "UploadStateSlot":
+        return UploadStateSlot(self, name)
+
+    def load(self, name: str) -> Optional[Dict]:
+        with self._lock:
+            return self._state.get(name)
+
+    def save(self, name: str, state: Optional[Dict]):
+        with self._lock:
+            if state is None:
+                self._state.pop(name, None)
+            else:
+                self._state[name] = state
+            # 每完成一个分片写一次，modified 同时作为心跳 (见 DELIVERY_STALE_AFTER)
+            DeliveryJob.objects.filter(pk=self.job_id).update(upload_state=self._state, modified=now())
+
+
+@dataclass
+class UploadStateSlot:
+    """单个文件 (目标 + 路径) 的上传进度，提供 multipart.resumable_upload 需要的 load() / save()。"""
+
+    store: UploadStateStore
+    name: str
+
+    def load(self) -> Optional[Dict]:
+        return self.store.load(self.name)
+
+    def save(self, state: Optional[Dict]):
+        self.store.save(self.name, state)
+
+
+def resolve_source(job: DeliveryJob) -> DeliverySource:
+    """
+    找到分发任务要交付的本地文件。相对路径沿用文件在存储中的名称，各目标的目录结构与本地一致。
+    HLS 转码产出交付整个目录 (播放列表最后传，避免播放器读到引用了未上传分片的列表)。
+    """
+    source = job.source_object
+    field_name = job.source_field or SOURCE_DEFAULT_FIELDS.get(job.source_content_type.model)
+    if not field_name:
+        raise ValueError(f"{job.source_content_type.model} 没有默认的交付字段，请指定 source_field。")
+
+    field_file = getattr(source, field_name, None)
+    if not field_file:
+        raise ValueError(f"源对象 {source} 没有可用的 {field_name}。")
+
+    path = Path(field_file.path)
+    if isinstance(source, TranscodingJob) and source.profile.is_hls:
+        prefix = posixpath.dirname(field_file.name)
+        files = sorted((p for p in path.parent.iterdir() if p.is_file()), key=lambda p: (p == path, p.name))
+        return DeliverySource([(p, f"{prefix}/{p.name}") for p in files], field_file.name)
+    return DeliverySource([(path, field_file.name)], field_file.name)
+
+
+def _checksum_of(source: DeliverySource, checksums: Dict[str, str]) -> str:
+    if len(source.files) == 1:
+        return checksums[source.entry_key]
+    return combine_checksums({posixpath.basename(key): value for key, value in checksums.items()})
+
+
+def _deliver_to_target(
+    target: DeliveryTarget,
+    source: DeliverySource,
+    checksums: Dict[str, str],
+    states: UploadStateStore,
+    backend=None,
+) -> Dict:
+    """
+    把全部文件交付到一个目标。异常不向外抛出，记录在结果中，不影响其他目标。
+    bytes 为实际传输的字节数 (内容相同而跳过的文件不计)。
+    """
+    started = time.monotonic()
+    try:
+        backend = backend or get_backend(target)
+        skipped, transferred = True, 0
+        for path, key in source.files:
+            target_key = f"{target.key_prefix}{key}"
+            resume = states.slot(f"{target.name}:{target_key}")
+            file_skipped = backend.put(path, target_key, checksums[key], resume)
+            skipped = skipped and file_skipped
+            transferred += 0 if file_skipped else os.path.getsize(path)
+        result = {
+            "url": backend.url_for(f"{target.key_prefix}{source.entry_key}"),
+            "skipped": skipped,
+            "bytes": transferred,
+        }
+    except Exception as e:
+        logger.error(f"交付到目标 {target.name} 失败: {e}", exc_info=True)
+        result = {"error": str(e)}
+    finally:
+        # 进度在本线程写库；数据库连接按线程隔离，这里只清理本线程的连接
+        close_old_connections()
+    result["elapsed"] = round(time.monotonic() - started, 2)
+    return result
+
+
+def deliver_to_targets(job: DeliveryJob, targets: Optional[List[DeliveryTarget]] = None) -> FanoutResult:
+    """
+    一份产出并发交付到所有目标 (每个分发任务一个线程池，每个目标一个线程)。
+    校验值只计算一次 (一次顺序读)，所有目标共用；各目标随后读取的是刚读过的、仍在页缓存中的文件。
+    单个目标失败不会中断其他目标，结果逐个记录；未完成的分片上传进度保存在 job.upload_state，重跑时续传。
+    """
+    source = resolve_source(job)
+    targets = targets or get_active_targets()
+
+    checksums = {key: compute_s3_etag(path) for path, key in source.files}
+    checksum = _checksum_of(source, checksums)
+
+    states = UploadStateStore(job)
+    with ThreadPoolExecutor(max_workers=len(targets), thread_name_prefix=f"delivery-{job.id}") as pool:
+        futures = {
+            target.name: pool.submit(_deliver_to_target, target, source, checksums, states) for target in targets
+        }
+        results = {name: future.result() for name, future in futures.items()}
+
+    primary = next((t.name for t in targets if t.is_primary), targets[0].name)
+    return FanoutResult(checksum=checksum, results=results, primary=primary, upload_state=states.snapshot())
+
+
+def _throughput(transferred: int, elapsed: float) -> Optional[float]:
+    """吞吐量 (MB/s)。"""
+    return round(transferred / elapsed / (1024 * 1024), 2) if elapsed > 0 else None
+
+
+def deliver_batch(
+    jobs: List[DeliveryJob], targets: Optional[List[DeliveryTarget]] = None, concurrency: Optional[int] = None
+) -> Tuple[Dict[int, Union[FanoutResult, Exception]], Dict]:
+    """
+    批量交付: 目标只加载一次，按目标分组，每个目标一个共享客户端 (连接池复用 TLS 连接)，
+    最多 concurrency 个任务同时交付；各目标之间并行。
+    返回 ({job_id: FanoutResult 或解析失败的异常}, 汇总统计)，汇总统计含总吞吐与各目标吞吐。
+    """
+    started = time.monotonic()
+    targets = targets or get_active_targets()
+    concurrency = max(1, concurrency or settings.DELIVERY_BATCH_CONCURRENCY)
+    outcomes: Dict[int, Union[FanoutResult, Exception]] = {}
+
+    # 1. 解析源文件 (需要访问数据库，在当前线程完成)，再并发计算校验值 (每个任务只读一遍)
+    sources = {}
+    for job in jobs:
+        try:
+            sources[job.id] = resolve_source(job)
+        except Exception as e:
+            outcomes[job.id] = e
+
+    def checksum_files(source: DeliverySource) -> Dict[str, str]:
+        return {key: compute_s3_etag(path) for path, key in source.files}
+
+    prepared = {}
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="delivery-checksum") as pool:
+        futures = {job_id: pool.submit(checksum_files, source) for job_id, source in sources.items()}
+        for job_id, future in futures.items():
+            try:
+                prepared[job_id] = (sources[job_id], future.result())
+            except Exception as e:
+                outcomes[job_id] = e
+
+    states = {job.id: UploadStateStore(job) for job in jobs if job.id in prepared}
+
+    # 2. 按目标分组交付
+    def run_target(target: DeliveryTarget):
+        target_started = time.monotonic()
+        try:
+            backend = get_backend(target)
+        except Exception as e:
+            return {job_id: {"error": str(e), "elapsed": 0.0} for job_id in prepared}, 0.0
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f"delivery-{target.name}") as pool:
+            futures = {
+                job_id: pool.submit(_deliver_to_target, target, source, checksums, states[job_id], backend)
+                for job_id, (source, checksums) in prepared.items()
+            }
+            results = {job_id: future.result() for job_id, future in futures.items()}
+        return results, time.monotonic() - target_started
+
+    with ThreadPoolExecutor(max_workers=len(targets), thread_name_prefix="delivery-batch") as pool:
+        per_target = {target.name: pool.submit(run_target, target) for target in targets}
+        per_target = {name: future.result() for name, future in per_target.items()}
+
+    primary = next((t.name for t in targets if t.is_primary), targets[0].name)
+    for job_id, (source, checksums) in prepared.items():
+        outcomes[job_id] = FanoutResult(
+            checksum=_checksum_of(source, checksums),
+            results={name: results[job_id] for name, (results, _) in per_target.items()},
+            primary=primary,
+            upload_state=states[job_id].snapshot(),
+        )
+
+    elapsed = time.monotonic() - started
+    target_stats = {}
+    for name, (results, target_elapsed) in per_target.items():
+        transferred = sum(r.get("bytes", 0) for r in results.values())
+        target_stats[name] = {
+            "bytes": transferred,
+            "failed": sum(1 for r in results.values() if r.get("error")),
+            "elapsed": round(target_elapsed, 2),
+            "throughput_mb_s": _throughput(transferred, target_elapsed),
+        }
+    total = sum(s["bytes"] for s in target_stats.values())
+    stats = {
+        "jobs": len(jobs),
+        "failed": sum(1 for o in outcomes.values() if isinstance(o, Exception) or o.failed),
+        "bytes": total,
+        "elapsed": round(elapsed, 2),
+        "throughput_mb_s": _throughput(total, elapsed),
+        "targets": target_stats,
+    }
+    return outcomes, stats
@@ -0,0 +1,110 @@
+# 文件路径: apps/workflow/delivery/services/targets.py
+
+import logging
+import os
+from pathlib import Path
+from typing import List
+
+from django.conf import settings
+
+from apps.configuration.models import DeliveryTarget
+from apps.media_assets.services.placement import place_local_file
+from apps.media_assets.services.storage import (
+    compute_s3_etag,
+    get_integration_settings,
+    get_s3_client,
+    upload_file_if_changed,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def get_default_target() -> DeliveryTarget:
+    """未配置分发目标时，按集成设置的存储后端构造一个临时目标 (不入库)，与原来的单目标交付行为一致。"""
+    integration = get_integration_settings()
+    backend = getattr(integration, "storage_backend", settings.FINAL_STORAGE_BACKEND)
+    if backend != "s3":
+        return DeliveryTarget(name="default", kind="local", is_primary=True)
+
+    custom_domain = settings.AWS_S3_CUSTOM_DOMAIN
+    return DeliveryTarget(
+        name="default",
+        kind="s3",
+        is_primary=True,
+        bucket_name=settings.AWS_STORAGE_BUCKET_NAME,
+        endpoint_url=settings.AWS_S3_ENDPOINT_URL or "",
+        region_name=settings.AWS_S3_REGION_NAME or "",
+        access_key_id=settings.AWS_ACCESS_KEY_ID or "",
+        secret_access_key=settings.AWS_SECRET_ACCESS_KEY or "",
+        public_url_base=f"https://{custom_domain}" if custom_domain else "",  # noqa: E231
+    )
+
+
+def get_active_targets() -> List[DeliveryTarget]:
+    """所有启用的分发目标，主目标排在最前。"""
+    return list(DeliveryTarget.objects.filter(is_active=True)) or [get_default_target()]
+
+
+class LocalTargetBackend:
+    """本地媒体服务器: 放到 <local_root>/<key>，同盘时硬链接 (零拷贝，源文件保留)，跨盘时分块复制。"""
+
+    def __init__(self, target: DeliveryTarget):
+        self.target = target
+        self.root = Path(target.local_root or settings.MEDIA_ROOT)
+
+    def url_for(self, key: str) -> str:
+        base = self.target.public_url_base or (
+            f"{settings.LOCAL_MEDIA_URL_BASE.rstrip('/')}/{settings.MEDIA_URL.strip('/')}"
+        )
+        return f"{base.rstrip('/')}/{key}"
+
+    def put(self, local_path: Path, key: str, etag: str, resume=None) -> bool:
+        """放置单个文件，目标已是同一文件或内容相同时跳过。返回是否跳过。本地放置无需续传与限速。"""
+        dest = self.root / key
+        if dest.exists():
+            if os.path.samefile(local_path, dest):
+                return True
+            if dest.stat().st_size == os.path.getsize(local_path) and compute_s3_etag(dest) == etag:
+                return True
+            dest.unlink()
+        place_local_file(local_path, dest, mode="link")
+        return False
+
+
+class S3TargetBackend:
+    """S3 / S3 兼容存储: 每个目标使用各自凭证的共享客户端，幂等、可续传、按分发带宽上限限速的分片上传。"""
+
+    def __init__(self, target: DeliveryTarget):
+        self.target = target
+        self.client = get_s3_client(
+            region_name=target.region_name,
+            endpoint_url=target.endpoint_url,
+            access_key_id=target.access_key_id,
+            secret_access_key=target.secret_access_key,
+        )
+
+    def url_for(self, key: str) -> str:
+        if self.target.public_url_base:
+            return f"{self.target.public_url_base.rstrip('/')}/{key}"
+        if self.target.endpoint_url:
+            # S3 兼容服务使用 path-style 地址
+            return f"{self.target.endpoint_url.rstrip('/')}/{self.target.bucket_name}/{key}"
+        return f"https://{self.target.bucket_name}.s3.amazonaws.com/{key}"  # noqa: E231
+
+    def put(self, local_path: Path, key: str, etag: str, resume=None) -> bool:
+        return upload_file_if_changed(
+            self.client, self.target.bucket_name, local_path, key, etag, resume=resume, throttle=True
+        )[1]
+
+
+TARGET_BACKENDS = {
+    "local": LocalTargetBackend,
+    "s3": S3TargetBackend,
+}
+
+
+def get_backend(target: DeliveryTarget):
+    try:
+        return TARGET_BACKENDS[target.kind](target)
+    except KeyError:
+        raise ValueError(f"不支持的分发目标类型: {target.kind}")
@@ -1,85 +1,240 @@
 # 文件路径: apps/workflow/delivery/tasks.py
 
 import logging
+from typing import List, Optional
 
+import redis
 from celery import shared_task
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils.timezone import now
 
-from apps.media_assets.services.storage import StorageService
+from apps.media_assets.services.scheduler import get_redis
 
 from ..common.baseJob import BaseJob
 from ..models import DeliveryJob, TranscodingJob
+from .services.fanout import FanoutResult, deliver_batch, deliver_to_targets
 
 logger = logging.getLogger(__name__)
 
+# 已安排批量分发 (flush) 的标记，窗口期内只安排一次
+FLUSH_SCHEDULED_KEY = "vss:delivery:flush_scheduled"
 
-@shared_task
-def run_delivery_job(job_id):
-    """
-    执行一个具体的分发任务。
-    """
-    try:
-        job = DeliveryJob.objects.get(id=job_id)
-    except DeliveryJob.DoesNotExist:
-        logger.error(f"找不到 ID 为 {job_id} 的分发任务。")
-        return
 
+def _check_source(job: DeliveryJob):
+    """检查源对象是否可以交付，不可交付时把分发任务标记为失败并返回 None。"""
     # [FIX 4a] 检查源任务，如果源任务不是 QA_PENDING，则不应运行
     source_job = job.source_object
     if not source_job:
-        logger.error(f"分发任务 {job_id} 找不到源对象。任务失败。")
+        logger.error(f"分发任务 {job.id} 找不到源对象。任务失败。")
         job.fail()
         job.save()
-        return
+        return None
 
-    if source_job.status != BaseJob.STATUS.QA_PENDING:
-        logger.error(f"源任务 {source_job.id} 状态为 {source_job.status} (不是 QA_PENDING)。分发任务 {job_id} 中止。")
+    # 只有转码任务有 QA 状态机；二创成片、标注产物等源对象不做状态检查
+    if isinstance(source_job, TranscodingJob) and source_job.status != BaseJob.STATUS.QA_PENDING:
+        logger.error(f"源任务 {source_job.id} 状态为 {source_job.status} (不是 QA_PENDING)。分发任务 {job.id} 中止。")
         # 如果源任务已经失败，我们也标记分发失败
         job.fail()
         job.save()
-        return
+        return None
+    return source_job
 
-    # 源任务状态正确 (QA_PENDING)，我们开始处理
-    job.start()
-    job.save()
 
-    try:
-        # 确保源文件存在
-        if not hasattr(source_job, "output_file") or not source_job.output_file.path:
-            raise ValueError(f"源对象 {source_job} 没有可用的 output_file。")
+def _update_project_status(source_job):
+    """源转码任务状态因交付而变化 (COMPLETED / ERROR) 后，重新汇总所属转码项目的状态。"""
+    # (局部导入，transcoding.tasks 在模块级导入了本模块)
+    from apps.workflow.transcoding.tasks import _check_and_update_project_status
 
-        local_file_path = source_job.output_file.path
+    _check_and_update_project_status(source_job.project)
 
-        # 调用 StorageService 执行上传
-        storage_service = StorageService()
 
-        # --- 核心逻辑：根据源对象的类型调用不同的上传方法 ---
-        if isinstance(source_job, TranscodingJob):
-            final_url = storage_service.save_transcoded_video(local_temp_path=local_file_path, job=source_job)
-        else:
-            raise TypeError(f"不支持的源对象类型: {type(source_job)}")
+def _finish(job: DeliveryJob, source_job, outcome: FanoutResult):
+    """写回交付结果；有目标失败时抛出异常 (由调用方标记失败)。"""
+    # 回写校验值、各目标结果与未完成的上传进度 (失败时同样保留，便于排查与续传)
+    job.checksum = outcome.checksum
+    job.target_results = outcome.results
+    job.upload_state = outcome.upload_state
+    if outcome.failed:
+        raise RuntimeError(f"{len(outcome.failed)}/{len(outcome.results)} 个目标交付失败: {', '.join(outcome.failed)}")
+    if outcome.skipped:
+        logger.info(f"分发任务 {job.id}: 目标 {', '.join(outcome.skipped)} 已存在相同内容 ({outcome.checksum})，未重复上传。")
 
-        # 回写最终 URL 到 DeliveryJob
-        job.delivery_url = final_url
-        job.complete()
-        job.save()
+    # 回写主目标的 URL 到 DeliveryJob
+    final_url = outcome.url
+    job.delivery_url = final_url
+    job.complete()
+    job.save()
 
-        # [FIX 4b] 将 URL 更新回源 TranscodingJob 并将其标记为 COMPLETED
+    # [FIX 4b] 将 URL 更新回源 TranscodingJob 并将其标记为 COMPLETED
+    if isinstance(source_job, TranscodingJob):
         source_job.output_url = final_url
         source_job.complete()  # (现在 'QA_PENDING' -> 'COMPLETED' 是允许的)
         source_job.save(update_fields=["output_url", "status"])
+        _update_project_status(source_job)
 
-        logger.info(f"分发任务 {job_id} 成功完成！URL: {final_url}")
+    logger.info(f"分发任务 {job.id} 成功完成 ({len(outcome.results)} 个目标)！URL: {final_url}")
 
-    except Exception as e:
-        logger.error(f"分发任务 {job_id} 失败: {e}", exc_info=True)
-        job.fail()
-        job.save()
 
-        # [FIX 4c] 如果分发失败，将源 TranscodingJob 标记为 ERROR
+def _fail(job: DeliveryJob, source_job, error: Exception):
+    logger.error(f"分发任务 {job.id} 失败: {error}", exc_info=error)
+    job.fail()
+    job.save()
+
+    # [FIX 4c] 如果分发失败，将源 TranscodingJob 标记为 ERROR
+    if isinstance(source_job, TranscodingJob):
         try:
             source_job.fail()  # ( 'QA_PENDING' -> 'ERROR' 是允许的)
             source_job.save(update_fields=["status"])
+            _update_project_status(source_job)
         except Exception as e_inner:
             logger.error(f"无法将源任务 {source_job.id} 标记为失败: {e_inner}")
 
+
+def queue_single_delivery(job_id, claimable: Optional[Q] = None) -> bool:
+    """
+    逐个派发: 先原子地把任务标记为 QUEUED (flush 只认领 PENDING，不会再把它并入批量)，再发布 run_delivery_job。
+    claimable 为允许认领的条件 (默认只认领 PENDING)；任务不满足条件 (已被其他派发认领) 时返回 False。
+    """
+    claimable = Q(status=BaseJob.STATUS.PENDING) if claimable is None else claimable
+    claimed = DeliveryJob.objects.filter(claimable, pk=job_id).update(status=BaseJob.STATUS.QUEUED, modified=now())
+    if claimed:
+        run_delivery_job.delay(job_id)
+    return bool(claimed)
+
+
+# acks_late + reject_on_worker_lost: worker 中途退出时消息重新入队，新的 worker 按 upload_state 续传
+@shared_task(bind=True, acks_late=True, reject_on_worker_lost=True)
+def run_delivery_job(self, job_id):
+    """
+    执行一个具体的分发任务: 把源产出并发交付到所有启用的分发目标。
+    全部目标成功才算完成；部分失败时任务失败，各目标结果仍会记录 (重试时已交付的目标经校验后跳过，
+    未完成的大文件从已上传的分片之后继续)。
+    """
+    # 原子认领: 只有 PENDING / QUEUED 的任务由本任务处理；已是 PROCESSING 的只在消息重投 (worker 中途退出) 时继续，
+    # 否则说明已被批量分发认领，避免两处同时上传同一任务
+    claimed = DeliveryJob.objects.filter(pk=job_id, status__in=[BaseJob.STATUS.PENDING, BaseJob.STATUS.QUEUED]).update(
+        status=BaseJob.STATUS.PROCESSING, modified=now()
+    )
+    try:
+        job = DeliveryJob.objects.get(id=job_id)
+    except DeliveryJob.DoesNotExist:
+        logger.error(f"找不到 ID 为 {job_id} 的分发任务。")
+        return
+
+    redelivered = (self.request.delivery_info or {}).get("redelivered", False)
+    if not claimed and not (redelivered and job.status == BaseJob.STATUS.PROCESSING):
+        logger.warning(f"分发任务 {job_id} 状态为 {job.status}，已由其他派发处理，跳过。")
+        return
+
+    source_job = _check_source(job)
+    if source_job is None:
+        return
+
+    try:
+        _finish(job, source_job, deliver_to_targets(job))
+    except Exception as e:
+        _fail(job, source_job, e)
         raise e
+
+
+@shared_task(acks_late=True, reject_on_worker_lost=True)
+def run_delivery_batch(job_ids: List[int]):
+    """
+    批量执行分发任务 (见 deliver_batch): 目标与集成设置只加载一次，同一目标的所有任务共用一个客户端，
+    按 DELIVERY_BATCH_CONCURRENCY 限制并发。单个任务失败不影响同批其他任务。返回汇总统计 (含吞吐量)。
+    """
+    # flush 认领时已是 PROCESSING；直接调用时在这里认领仍为 PENDING 的任务。
+    # 其他状态 (例如逐个派发的 QUEUED、已完成) 不属于本批，跳过
+    DeliveryJob.objects.filter(id__in=job_ids, status=BaseJob.STATUS.PENDING).update(
+        status=BaseJob.STATUS.PROCESSING, modified=now()
+    )
+    ready = []
+    jobs = DeliveryJob.objects.filter(id__in=job_ids, status=BaseJob.STATUS.PROCESSING)
+    for job in jobs.select_related("source_content_type").order_by("id"):
+        source_job = _check_source(job)
+        if source_job is not None:
+            ready.append((job, source_job))
+    if not ready:
+        return {}
+
+    outcomes, stats = deliver_batch([job for job, _ in ready])
+    for job, source_job in ready:
+        outcome = outcomes[job.id]
+        try:
+            if isinstance(outcome, Exception):
+                raise outcome
+            _finish(job, source_job, outcome)
+        except Exception as e:
+            _fail(job, source_job, e)
+
+    per_target = ", ".join(
+        f"{name} {s['bytes'] / 1024 / 1024:.1f} MB @ {s['throughput_mb_s']} MB/s"
+        for name, s in stats["targets"].items()
+    )
+    logger.info(
+        f"批量分发完成: {stats['jobs']} 个任务 (失败 {stats['failed']})，共 {stats['bytes'] / 1024 / 1024:.1f} MB，"
+        f"耗时 {stats['elapsed']}s，总吞吐 {stats['throughput_mb_s']} MB/s [{per_target}]"
+    )
+    return stats
+
+
+@shared_task
+def flush_delivery_batch():
+    """认领所有待分发 (PENDING) 的任务，按 DELIVERY_BATCH_MAX_JOBS 分批派发 run_delivery_batch。"""
+    try:
+        # 先清除标记: 此后新完成的任务会安排下一次 flush，不会漏掉
+        get_redis().delete(FLUSH_SCHEDULED_KEY)
+    except redis.RedisError as e:
+        logger.warning(f"清除批量分发标记失败: {e}")
+
+    with transaction.atomic():
+        job_ids = list(
+            DeliveryJob.objects.select_for_update(skip_locked=True)
+            .filter(status=BaseJob.STATUS.PENDING)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        # 等价于对每个任务执行 start()，这里用一次 UPDATE 完成
+        # (QuerySet.update 不会自动更新 modified，这里显式写入，后台据此判断处理中的任务是否仍在运行)
+        DeliveryJob.objects.filter(id__in=job_ids).update(status=BaseJob.STATUS.PROCESSING, modified=now())
+
+    size = max(1, settings.DELIVERY_BATCH_MAX_JOBS)
+    for i in range(0, len(job_ids), size):
+        run_delivery_batch.delay(job_ids[i : i + size])
+    if job_ids:
+        logger.info(f"批量分发: 认领 {len(job_ids)} 个任务，分 {(len(job_ids) + size - 1) // size} 批派发。")
+
+
+def _schedule_flush() -> bool:
+    """窗口期内只安排一次 flush。Redis 不可用时返回 False，由调用方逐个派发。"""
+    window = settings.DELIVERY_BATCH_WINDOW
+    try:
+        # 标记的过期时间留出余量；flush 消息丢失时标记过期，之后完成的任务会重新安排 (并顺带认领遗留任务)
+        if get_redis().set(FLUSH_SCHEDULED_KEY, 1, nx=True, ex=int(window * 2) + 30):
+            flush_delivery_batch.apply_async(countdown=window)
+        return True
+    except redis.RedisError as e:
+        logger.warning(f"无法安排批量分发，改为逐个派发: {e}")
+        return False
+
+
+def schedule_delivery(job: DeliveryJob):
+    """
+    事务提交后派发分发任务。启用批量分发 (DELIVERY_BATCH_WINDOW > 0) 时，
+    窗口期内完成的任务 (例如一个项目的几十个短剧集) 合并为一批，共用客户端与连接池交付。
+    """
+
+    def dispatch():
+        if not (settings.DELIVERY_BATCH_WINDOW > 0 and _schedule_flush()):
+            queue_single_delivery(job.id)
+
+    transaction.on_commit(dispatch)
+
+
+def enqueue_delivery(source, source_field: str = "") -> DeliveryJob:
+    """为任意带文件字段的源对象创建分发任务，事务提交后派发。"""
+    job = DeliveryJob.objects.create(source_object=source, source_field=source_field)
+    schedule_delivery(job)
+    return job
@@ -0,0 +1,161 @@
+# 文件路径: apps/workflow/delivery/tests/test_dispatch.py
+
+from datetime import timedelta
+from unittest import mock
+
+import redis
+from django.contrib.admin import AdminSite
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils.timezone import now
+
+from apps.media_assets.models import Asset
+from apps.workflow.common.baseJob import BaseJob
+from apps.workflow.delivery import tasks
+from apps.workflow.delivery.admin import DeliveryJobAdmin
+from apps.workflow.delivery.services.fanout import FanoutResult
+from apps.workflow.models import DeliveryJob
+
+STATUS = BaseJob.STATUS
+
+
+class DeliveryClaimTests(TestCase):
+    """批量 flush 与逐个派发之间的认领: 同一个分发任务只能由一处执行。"""
+
+    def setUp(self):
+        # 源对象只需存在；交付本身在各用例中打桩
+        self.source = Asset.objects.create(title="asset")
+
+    def _job(self, status=STATUS.PENDING):
+        job = DeliveryJob.objects.create(source_object=self.source, source_field="thumbnail")
+        DeliveryJob.objects.filter(pk=job.pk).update(status=status)
+        return job
+
+    def _status(self, job):
+        return DeliveryJob.objects.values_list("status", flat=True).get(pk=job.pk)
+
+    def _result(self):
+        return FanoutResult(checksum="x", results={"default": {"url": "http://cdn/x"}}, primary="default")
+
+    @override_settings(DELIVERY_BATCH_WINDOW=0)
+    @mock.patch.object(tasks.run_delivery_job, "delay")
+    def test_single_dispatch_claims_job_before_publishing(self, delay):
+        with self.captureOnCommitCallbacks(execute=True):
+            job = tasks.enqueue_delivery(self.source, "thumbnail")
+
+        delay.assert_called_once_with(job.id)
+        self.assertEqual(self._status(job), STATUS.QUEUED)
+
+    @override_settings(DELIVERY_BATCH_WINDOW=5)
+    @mock.patch.object(tasks.run_delivery_job, "delay")
+    @mock.patch.object(tasks, "get_redis")
+    def test_redis_outage_falls_back_to_claimed_single_dispatch(self, get_redis, delay):
+        get_redis.return_value.set.side_effect = redis.ConnectionError("down")
+        with self.captureOnCommitCallbacks(execute=True):
+            job = tasks.enqueue_delivery(self.source, "thumbnail")
+
+        delay.assert_called_once_with(job.id)
+        self.assertEqual(self._status(job), STATUS.QUEUED)
+
+    @override_settings(DELIVERY_BATCH_WINDOW=5)
+    @mock.patch.object(tasks.flush_delivery_batch, "apply_async")
+    @mock.patch.object(tasks, "get_redis")
+    def test_flush_is_scheduled_once_per_window(self, get_redis, apply_async):
+        # SET NX: 第一次成功，窗口内之后的调用返回 None
+        get_redis.return_value.set.side_effect = [True, None, None]
+        with self.captureOnCommitCallbacks(execute=True):
+            jobs = [tasks.enqueue_delivery(self.source, "thumbnail") for _ in range(3)]
+
+        apply_async.assert_called_once_with(countdown=5)
+        self.assertEqual({self._status(job) for job in jobs}, {STATUS.PENDING})
+
+    @override_settings(DELIVERY_BATCH_MAX_JOBS=2)
+    @mock.patch.object(tasks.run_delivery_batch, "delay")
+    @mock.patch.object(tasks, "get_redis")
+    def test_flush_claims_only_pending_jobs(self, get_redis, batch_delay):
+        pending = [self._job() for _ in range(3)]
+        queued = self._job(STATUS.QUEUED)
+
+        tasks.flush_delivery_batch()
+
+        get_redis.return_value.delete.assert_called_once_with(tasks.FLUSH_SCHEDULED_KEY)
+        self.assertEqual(
+            [c.args[0] for c in batch_delay.call_args_list], [[pending[0].id, pending[1].id], [pending[2].id]]
+        )
+        self.assertEqual({self._status(job) for job in pending}, {STATUS.PROCESSING})
+        self.assertEqual(self._status(queued), STATUS.QUEUED)
+
+    @mock.patch.object(tasks, "deliver_to_targets")
+    def test_single_run_skips_job_claimed_by_batch(self, deliver):
+        job = self._job(STATUS.PROCESSING)
+
+        tasks.run_delivery_job.apply(args=[job.id])
+
+        deliver.assert_not_called()
+        self.assertEqual(self._status(job), STATUS.PROCESSING)
+
+    @mock.patch.object(tasks, "deliver_to_targets")
+    def test_single_run_delivers_queued_job(self, deliver):
+        deliver.return_value = self._result()
+        job = self._job(STATUS.QUEUED)
+
+        tasks.run_delivery_job.apply(args=[job.id])
+
+        deliver.assert_called_once()
+        self.assertEqual(self._status(job), STATUS.COMPLETED)
+
+    @mock.patch.object(tasks, "deliver_to_targets")
+    def test_redelivered_single_run_resumes_processing_job(self, deliver):
+        deliver.return_value = self._result()
+        job = self._job(STATUS.PROCESSING)
+
+        tasks.run_delivery_job.push_request(delivery_info={"redelivered": True})
+        try:
+            tasks.run_delivery_job.run(job.id)
+        finally:
+            tasks.run_delivery_job.pop_request()
+
+        deliver.assert_called_once()
+        self.assertEqual(self._status(job), STATUS.COMPLETED)
+
+    @mock.patch.object(tasks, "deliver_batch")
+    def test_batch_skips_jobs_queued_for_single_dispatch(self, deliver_batch):
+        claimed = self._job(STATUS.PROCESSING)
+        queued = self._job(STATUS.QUEUED)
+        stats = {"jobs": 1, "failed": 0, "bytes": 0, "elapsed": 0, "throughput_mb_s": None, "targets": {}}
+        deliver_batch.return_value = ({claimed.id: self._result()}, stats)
+
+        tasks.run_delivery_batch.apply(args=[[claimed.id, queued.id]])
+
+        self.assertEqual([job.id for job in deliver_batch.call_args.args[0]], [claimed.id])
+        self.assertEqual(self._status(claimed), STATUS.COMPLETED)
+        self.assertEqual(self._status(queued), STATUS.QUEUED)
+
+
+@override_settings(DELIVERY_STALE_AFTER=600)
+class RetryDeliveryActionTests(TestCase):
+    """后台重试: 只重新派发失败的任务和超时无进度的"处理中"任务。"""
+
+    def setUp(self):
+        self.source = Asset.objects.create(title="asset")
+        self.model_admin = DeliveryJobAdmin(DeliveryJob, AdminSite())
+        self.request = RequestFactory().post("/")
+
+    def _job(self, status, idle_seconds=0):
+        job = DeliveryJob.objects.create(source_object=self.source, source_field="thumbnail")
+        DeliveryJob.objects.filter(pk=job.pk).update(status=status, modified=now() - timedelta(seconds=idle_seconds))
+        return job
+
+    @mock.patch.object(DeliveryJobAdmin, "message_user")
+    @mock.patch.object(tasks.run_delivery_job, "delay")
+    def test_active_processing_job_is_not_requeued(self, delay, message_user):
+        failed = self._job(STATUS.ERROR)
+        stale = self._job(STATUS.PROCESSING, idle_seconds=3600)
+        active = self._job(STATUS.PROCESSING, idle_seconds=10)
+
+        self.model_admin.retry_delivery_action(self.request, DeliveryJob.objects.all())
+
+        self.assertCountEqual([c.args[0] for c in delay.call_args_list], [failed.id, stale.id])
+        statuses = dict(DeliveryJob.objects.values_list("pk", "status"))
+        self.assertEqual(statuses[failed.pk], STATUS.QUEUED)
+        self.assertEqual(statuses[stale.pk], STATUS.QUEUED)
+        self.assertEqual(statuses[active.pk], STATUS.PROCESSING)
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.23 on 2026-10-17 03:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("configuration", "0009_encodingprofile_cpu_slots"),
+        ("workflow", "0002_alter_creativeproject_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transcodingproject",
+            name="extra_profiles",
+            field=models.ManyToManyField(
+                blank=True,
+                help_text="可选。与主编码配置共用一次解码，同时产出多个版本，每个版本各自交付。",
+                related_name="+",
+                to="configuration.encodingprofile",
+                verbose_name="附加编码配置",
+            ),
+        ),
+    ]
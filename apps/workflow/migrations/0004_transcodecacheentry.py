@@ -0,0 +1,59 @@
+# Generated by Django 4.2.23 on 2026-10-17 03:35
+
+import django.utils.timezone
+import model_utils.fields
+from django.db import migrations, models
+
+import apps.workflow.transcoding.cache
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("workflow", "0003_transcodingproject_extra_profiles"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TranscodeCacheEntry",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "created",
+                    model_utils.fields.AutoCreatedField(
+                        default=django.utils.timezone.now, editable=False, verbose_name="created"
+                    ),
+                ),
+                (
+                    "modified",
+                    model_utils.fields.AutoLastModifiedField(
+                        default=django.utils.timezone.now, editable=False, verbose_name="modified"
+                    ),
+                ),
+                ("source_sha256", models.CharField(max_length=64, verbose_name="源内容 SHA-256")),
+                ("command_hash", models.CharField(max_length=64, verbose_name="参数哈希")),
+                ("container", models.CharField(max_length=10, verbose_name="封装格式")),
+                ("command", models.TextField(verbose_name="规范化 FFmpeg 参数")),
+                (
+                    "file",
+                    models.FileField(
+                        max_length=255,
+                        upload_to=apps.workflow.transcoding.cache.get_transcode_cache_path,
+                        verbose_name="缓存文件",
+                    ),
+                ),
+                ("size", models.BigIntegerField(default=0, verbose_name="文件大小 (bytes)")),
+                ("hit_count", models.PositiveIntegerField(default=0, verbose_name="命中次数")),
+                ("last_used_at", models.DateTimeField(db_index=True, verbose_name="最近使用时间")),
+            ],
+            options={
+                "verbose_name": "转码缓存",
+                "verbose_name_plural": "转码缓存",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="transcodecacheentry",
+            constraint=models.UniqueConstraint(
+                fields=("source_sha256", "command_hash", "container"), name="unique_transcode_cache_key"
+            ),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.23 on 2026-10-17 03:38
+
+from django.db import migrations, models
+
+import apps.workflow.transcoding.jobs
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("workflow", "0004_transcodecacheentry"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="transcodingjob",
+            name="output_file",
+            field=models.FileField(
+                blank=True,
+                null=True,
+                upload_to=apps.workflow.transcoding.jobs.get_transcoding_output_upload_path,
+                verbose_name="输出文件",
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.23 on 2026-10-17 03:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("workflow", "0005_alter_transcodingjob_output_file"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transcodingjob",
+            name="realtime_factor",
+            field=models.FloatField(blank=True, null=True, verbose_name="实时倍速"),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.23 on 2026-10-17 03:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("workflow", "0006_transcodingjob_realtime_factor"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="deliveryjob",
+            name="checksum",
+            field=models.CharField(blank=True, default="", max_length=80, verbose_name="校验值"),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.23 on 2026-10-17 03:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("workflow", "0007_deliveryjob_checksum"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="deliveryjob",
+            name="source_field",
+            field=models.CharField(blank=True, default="", max_length=64, verbose_name="源文件字段"),
+        ),
+        migrations.AddField(
+            model_name="deliveryjob",
+            name="target_results",
+            field=models.JSONField(blank=True, default=dict, verbose_name="各目标交付结果"),
+        ),
+        migrations.AlterField(
+            model_name="deliveryjob",
+            name="source_object_id",
+            field=models.CharField(db_index=True, max_length=64),
+        ),
+    ]
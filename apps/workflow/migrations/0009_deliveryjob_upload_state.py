@@ -0,0 +1,17 @@
+# Generated by Django 4.2.23 on 2026-10-17 03:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("workflow", "0008_deliveryjob_targets"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="deliveryjob",
+            name="upload_state",
+            field=models.JSONField(blank=True, default=dict, verbose_name="分片上传进度"),
+        ),
+    ]
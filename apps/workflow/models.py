@@ -13,6 +13,7 @@ from .delivery.jobs import DeliveryJob
 
 # --- 从 inference 子包导入 ---
 from .inference.projects import InferenceProject
+from .transcoding.cache import TranscodeCacheEntry
 from .transcoding.jobs import TranscodingJob
 from .transcoding.projects import TranscodingProject
 
@@ -23,6 +24,7 @@ __all__ = [
     "CreativeProject",
     "DeliveryJob",
     "InferenceProject",
+    "TranscodeCacheEntry",
     "TranscodingJob",
     "TranscodingProject",
 ]
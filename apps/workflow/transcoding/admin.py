@@ -1,26 +1,70 @@
 # 文件路径: apps/workflow/transcoding/admin.py
 
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.urls import path, reverse
 from django.utils.html import format_html
 from unfold.admin import ModelAdmin
 
-from ..models import TranscodingJob, TranscodingProject
+from ..models import TranscodeCacheEntry, TranscodingJob, TranscodingProject
+from .services import cache as transcode_cache
+from .services.dispatch import redispatch_failed_jobs
+from .services.progress import format_eta, get_progress
 from .views import trigger_transcoding_view  # 导入我们新的视图
 
 
 @admin.register(TranscodingProject)
 class TranscodingProjectAdmin(ModelAdmin):
     # --- 核心修改 1: 在列表页增加“操作”列 ---
-    list_display = ("name", "asset", "status", "encoding_profile", "project_actions")
+    list_display = ("name", "asset", "status", "encoding_profile", "job_progress", "live_progress", "project_actions")
     list_display_links = ("name",)
 
     # 详情页字段，现在也包含了编码配置的选择
-    fields = ("name", "asset", "description", "encoding_profile", "status")
+    fields = ("name", "asset", "description", "encoding_profile", "extra_profiles", "status")
     readonly_fields = ("status",)
     # [核心修复] 增加分页
     list_per_page = 20
 
+    def get_queryset(self, request):
+        # 进度列所需的计数随列表查询一次性聚合，不再逐行查询
+        return (
+            super()
+            .get_queryset(request)
+            .select_related("asset", "encoding_profile")
+            .annotate(**TranscodingProject.job_count_aggregates())
+        )
+
+    def get_changelist_instance(self, request):
+        # 当前页处理中的项目: 一次查询取出处理中的任务，一次 Redis pipeline 取回全部实时进度
+        cl = super().get_changelist_instance(request)
+        projects = {p.pk: p for p in cl.result_list if p.status == TranscodingProject.STATUS.PROCESSING}
+        running = TranscodingJob.objects.filter(
+            project_id__in=list(projects), status=TranscodingJob.STATUS.PROCESSING
+        ).values_list("id", "project_id")
+        progress = get_progress(job_id for job_id, _ in running)
+        for project in projects.values():
+            project.running_progress = []
+        for job_id, project_id in running:
+            projects[project_id].running_progress.append(progress.get(job_id) or {})
+        return cl
+
+    @admin.display(description="完成度 / 预计剩余")
+    def live_progress(self, obj):
+        if obj.status != TranscodingProject.STATUS.PROCESSING or not obj.jobs_total:
+            return "—"
+        running = getattr(obj, "running_progress", [])
+        # 已完成计 100%，处理中按实时百分比，其余 (排队/失败) 计 0
+        percent = (obj.jobs_done * 100 + sum(p.get("percent") or 0 for p in running)) / obj.jobs_total
+        etas = [p["eta"] for p in running if p.get("eta") is not None]
+        return f"{percent:.0f}% / {format_eta(max(etas)) if etas else '—'}"
+
+    @admin.display(description="进度 (完成/失败/总数)")
+    def job_progress(self, obj):
+        if not obj.jobs_total:
+            return "—"
+        return format_html(
+            '{} / <span style="color:#dc2626">{}</span> / {}', obj.jobs_done, obj.jobs_failed, obj.jobs_total
+        )
+
     # --- 核心修改 2: 定义“操作”列的内容 ---
     @admin.display(description="操作")
     def project_actions(self, obj):
@@ -28,6 +72,10 @@ class TranscodingProjectAdmin(ModelAdmin):
         if obj.status == "PENDING":
             trigger_url = reverse("admin:workflow_transcodingproject_trigger", args=[obj.pk])
             return format_html('<a href="{}" class="button variant-primary">▶️ 启动任务</a>', trigger_url)
+        if obj.status == "FAILED":
+            # 只会重置并重新派发失败的任务，已完成的任务不受影响
+            trigger_url = reverse("admin:workflow_transcodingproject_trigger", args=[obj.pk])
+            return format_html('<a href="{}" class="button">🔁 重跑失败任务</a>', trigger_url)
         return "—"  # 其他状态下不显示按钮
 
     # --- 核心修改 3: 添加新的 URL 路由 ---
@@ -47,10 +95,86 @@ class TranscodingProjectAdmin(ModelAdmin):
 @admin.register(TranscodingJob)
 class TranscodingJobAdmin(ModelAdmin):
     # TranscodingJobAdmin 的代码保持不变
-    list_display = ("media", "project", "status", "profile", "output_url", "modified")
+    list_display = (
+        "media",
+        "project",
+        "status",
+        "live_progress",
+        "profile",
+        "realtime_factor",
+        "output_url",
+        "modified",
+    )
     list_filter = ("status", "project", "profile")
     list_display_links = ("media",)
-    readonly_fields = ("project", "media", "profile", "output_file", "output_url")
+    readonly_fields = ("project", "media", "profile", "output_file", "output_url", "realtime_factor")
     search_fields = ("media__title", "project__name")
     # [核心修复] 增加分页
     list_per_page = 20
+    actions = ["rerun_failed_action"]
+
+    def get_changelist_instance(self, request):
+        # 一次 Redis pipeline 取回当前页所有处理中任务的实时进度
+        cl = super().get_changelist_instance(request)
+        running = [job for job in cl.result_list if job.status == TranscodingJob.STATUS.PROCESSING]
+        progress = get_progress(job.id for job in running)
+        for job in running:
+            job.live = progress.get(job.id)
+        return cl
+
+    @admin.display(description="进度 / 预计剩余")
+    def live_progress(self, obj):
+        if obj.status in (TranscodingJob.STATUS.QA_PENDING, TranscodingJob.STATUS.COMPLETED):
+            return "100%"
+        live = getattr(obj, "live", None)
+        if obj.status != TranscodingJob.STATUS.PROCESSING or not live:
+            return "—"
+        percent = f"{live['percent']:.0f}%" if live.get("percent") is not None else "?"
+        speed = f" @{live['speed']:.1f}x" if live.get("speed") else ""
+        return f"{percent} / {format_eta(live.get('eta'))}{speed}"
+
+    @admin.action(description="🔁 重跑所选失败任务")
+    def rerun_failed_action(self, request, queryset):
+        # 只重跑所选的失败任务本身 (不按 media × profile 展开)
+        failed = queryset.filter(status=TranscodingJob.STATUS.ERROR).select_related("project")
+        by_project = {}
+        for job in failed:
+            by_project.setdefault(job.project_id, (job.project, []))[1].append(job.id)
+
+        total = 0
+        for project, job_ids in by_project.values():
+            total += redispatch_failed_jobs(project, job_ids)
+        self.message_user(request, f"已重新派发 {total} 个失败的转码任务。", messages.SUCCESS)
+
+
+@admin.register(TranscodeCacheEntry)
+class TranscodeCacheEntryAdmin(ModelAdmin):
+    list_display = ("__str__", "container", "size", "hit_count", "last_used_at", "created")
+    list_filter = ("container",)
+    search_fields = ("source_sha256", "command")
+    readonly_fields = (
+        "source_sha256",
+        "command_hash",
+        "container",
+        "command",
+        "file",
+        "size",
+        "hit_count",
+        "last_used_at",
+    )
+    ordering = ("-last_used_at",)
+    list_per_page = 20
+    actions = ["evict_action"]
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="🧹 按配额淘汰 (LRU)")
+    def evict_action(self, request, queryset):
+        removed, freed = transcode_cache.evict()
+        stats = transcode_cache.get_cache_stats()
+        self.message_user(
+            request,
+            f"淘汰 {removed} 条，释放 {freed / 1024**2:.1f} MB；命中 {stats['hits']} / 未命中 {stats['misses']}",
+            messages.SUCCESS,
+        )
@@ -0,0 +1,40 @@
+# 文件路径: apps/workflow/transcoding/cache.py
+
+from django.db import models
+from model_utils.models import TimeStampedModel
+
+
+def get_transcode_cache_path(instance, filename):
+    # transcode_cache/ab/<source_sha256>/<command_hash>.<ext>
+    return f"transcode_cache/{instance.source_sha256[:2]}/{instance.source_sha256}/{filename}"
+
+
+class TranscodeCacheEntry(TimeStampedModel):
+    """
+    转码结果缓存。
+    键为 (源内容 SHA-256, 规范化后的 FFmpeg 参数哈希, 封装格式)，与项目、Asset、EncodingProfile 记录无关：
+    不同项目对同一源内容使用相同参数转码时，直接硬链接缓存文件，跳过 FFmpeg。
+    """
+
+    source_sha256 = models.CharField(max_length=64, verbose_name="源内容 SHA-256")
+    command_hash = models.CharField(max_length=64, verbose_name="参数哈希")
+    container = models.CharField(max_length=10, verbose_name="封装格式")
+    command = models.TextField(verbose_name="规范化 FFmpeg 参数")
+
+    file = models.FileField(upload_to=get_transcode_cache_path, max_length=255, verbose_name="缓存文件")
+    size = models.BigIntegerField(default=0, verbose_name="文件大小 (bytes)")
+
+    hit_count = models.PositiveIntegerField(default=0, verbose_name="命中次数")
+    last_used_at = models.DateTimeField(db_index=True, verbose_name="最近使用时间")
+
+    def __str__(self):
+        return f"{self.source_sha256[:12]} / {self.command_hash[:12]}.{self.container}"
+
+    class Meta:
+        verbose_name = "转码缓存"
+        verbose_name_plural = "转码缓存"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["source_sha256", "command_hash", "container"], name="unique_transcode_cache_key"
+            )
+        ]
@@ -5,6 +5,11 @@ from django.db import models
 from ..common.baseJob import BaseJob
 
 
+def get_transcoding_output_upload_path(instance, filename):
+    """转码产出直接放在交付位置: transcoding_outputs/<asset_id>/<job_id>.<ext>，本地交付时无需再移动。"""
+    return f"transcoding_outputs/{instance.media.asset_id}/{filename}"
+
+
 class TranscodingJob(BaseJob):
     """
     (V2.1 最终版 - 解耦转码与上传)
@@ -23,12 +28,15 @@ class TranscodingJob(BaseJob):
 
     # 这个字段记录了转码操作成功后，在服务器上生成的物理文件路径。
     output_file = models.FileField(
-        upload_to="transcoding_outputs/", blank=True, null=True, verbose_name="输出文件"  # 路径将由后台任务动态生成
+        upload_to=get_transcoding_output_upload_path, blank=True, null=True, verbose_name="输出文件"
     )
 
     # 这个字段记录了文件上传到 S3 或其他 CDN 之后的可访问 URL。
     output_url = models.URLField(max_length=1024, blank=True, null=True, verbose_name="输出文件URL (CDN)")
 
+    # 实际达到的编码倍速 (源时长 / 编码耗时)，用于跟踪不同配置、不同机器的吞吐；命中转码缓存时为空
+    realtime_factor = models.FloatField(blank=True, null=True, verbose_name="实时倍速")
+
     def __str__(self):
         return f"对 {self.media.title} 进行 {self.profile.name} 转码"
 
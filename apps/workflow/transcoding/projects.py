@@ -1,6 +1,7 @@
 # 文件路径: apps/workflow/transcoding/projects.py
 
 from django.db import models
+from django.db.models import Count, Q
 from django_fsm import FSMField
 from model_utils import Choices
 
@@ -10,6 +11,10 @@ from ..common.baseProject import BaseProject
 class TranscodingProject(BaseProject):
     STATUS = Choices(("PENDING", "等待开始"), ("PROCESSING", "处理中"), ("COMPLETED", "已完成"), ("FAILED", "失败"))
 
+    # 任务状态分组 (取值见 BaseJob.STATUS)；QA_PENDING 表示转码已完成、等待交付
+    JOB_DONE_STATUSES = ("QA_PENDING", "COMPLETED")
+    JOB_FAILED_STATUSES = ("ERROR",)
+
     asset = models.ForeignKey(
         "media_assets.Asset", on_delete=models.CASCADE, related_name="transcoding_projects", verbose_name="关联资产"
     )
@@ -31,6 +36,36 @@ class TranscodingProject(BaseProject):
         verbose_name="编码配置",
     )
 
+    # 附加编码配置: 与主配置一起，对每个 Media 单次解码同时产出多个版本 (例如标注代理 + 1080p 交付版)
+    extra_profiles = models.ManyToManyField(
+        "configuration.EncodingProfile",
+        blank=True,
+        related_name="+",
+        verbose_name="附加编码配置",
+        help_text="可选。与主编码配置共用一次解码，同时产出多个版本，每个版本各自交付。",
+    )
+
+    def get_profiles(self):
+        """主编码配置 + 附加编码配置 (去重，主配置在前)。"""
+        profiles = [self.encoding_profile] if self.encoding_profile else []
+        for profile in self.extra_profiles.all():
+            if profile not in profiles:
+                profiles.append(profile)
+        return profiles
+
+    @staticmethod
+    def job_count_aggregates(prefix: str = "transcoding_jobs__"):
+        """
+        一次查询统计 总数 / 已完成 / 失败 的条件聚合。
+        在项目查询集上 annotate 时使用默认前缀；直接对 transcoding_jobs 聚合时传入 prefix=""。
+        """
+        status = f"{prefix}status__in"
+        return {
+            "jobs_total": Count(f"{prefix}pk"),
+            "jobs_done": Count(f"{prefix}pk", filter=Q(**{status: TranscodingProject.JOB_DONE_STATUSES})),
+            "jobs_failed": Count(f"{prefix}pk", filter=Q(**{status: TranscodingProject.JOB_FAILED_STATUSES})),
+        }
+
     def __str__(self):
         return self.name
 
@@ -0,0 +1 @@
+# This file intentionally left blank
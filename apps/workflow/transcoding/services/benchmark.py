@@ -0,0 +1,175 @@
+# 文件路径: apps/workflow/transcoding/services/benchmark.py
+
+import logging
+import os
+import platform
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from django.utils import timezone
+
+from apps.configuration.models import EncodingProfile
+from apps.media_assets.services.ffmpeg_runner import FFmpegProgress, check_ffmpeg, run_ffmpeg
+from apps.media_assets.services.probe import run_ffprobe
+
+logger = logging.getLogger(__name__)
+
+# 默认参考片段: testsrc2 (含运动与细节，比 testsrc 更接近真实画面) + 正弦音频，离线即可合成
+DEFAULT_CLIP_DURATION = 10
+DEFAULT_CLIP_SIZE = "1280x720"
+DEFAULT_CLIP_RATE = 25
+
+# 质量评估滤镜在 stderr 末尾输出的汇总行
+PSNR_PATTERN = re.compile(r"PSNR .*?average:([\d.]+|inf)")
+SSIM_PATTERN = re.compile(r"SSIM .*?All:([\d.]+)")
+
+
+def synthesize_reference_clip(
+    output_path: Path,
+    duration: int = DEFAULT_CLIP_DURATION,
+    size: str = DEFAULT_CLIP_SIZE,
+    rate: int = DEFAULT_CLIP_RATE,
+) -> Path:
+    """用 lavfi testsrc2 + sine 合成无损参考片段 (H.264 qp=0)，作为编码输入与质量评估的基准。"""
+    run_ffmpeg(
+        [
+            "-f",
+            "lavfi",
+            "-i",
+            f"testsrc2=duration={duration}:size={size}:rate={rate}",
+            "-f",
+            "lavfi",
+            "-i",
+            f"sine=frequency=440:duration={duration}",
+            "-c:v",
+            "libx264",
+            "-qp",
+            "0",
+            "-preset",
+            "ultrafast",
+            "-pix_fmt",
+            "yuv420p",
+            "-c:a",
+            "pcm_s16le",
+            "-shortest",
+            "-y",
+            str(output_path),
+        ],
+        label="benchmark reference clip",
+        duration=duration,
+    )
+    return output_path
+
+
+def _probe_clip(path: Path) -> Dict:
+    info = run_ffprobe(path)
+    video = next((s for s in info.get("streams", []) if s.get("codec_type") == "video"), {})
+    return {
+        "duration": float(info.get("format", {}).get("duration") or 0),
+        "width": video.get("width"),
+        "height": video.get("height"),
+    }
+
+
+def measure_quality(encoded_path: Path, reference_path: Path, width: int, height: int) -> Dict[str, Optional[float]]:
+    """
+    PSNR / SSIM (ffmpeg psnr、ssim 滤镜)。
+    编码产出先缩放回参考分辨率再比较，因此降分辨率的配置得分会包含缩放损失。
+    与参考完全一致时 PSNR 为 "inf" (JSON 不支持无穷大浮点数)。
+    """
+    lavfi = (
+        f"[0:v]scale={width}:{height}:flags=bicubic,setpts=PTS-STARTPTS,split[d1][d2];"
+        "[1:v]setpts=PTS-STARTPTS,split[r1][r2];"
+        "[d1][r1]psnr;[d2][r2]ssim"
+    )
+    tail = run_ffmpeg(
+        ["-i", str(encoded_path), "-i", str(reference_path), "-lavfi", lavfi, "-f", "null", "-"],
+        label=f"benchmark quality {encoded_path.name}",
+    )
+    text = "\n".join(tail)
+    psnr = PSNR_PATTERN.search(text)
+    ssim = SSIM_PATTERN.search(text)
+    return {
+        "psnr": None if not psnr else (psnr.group(1) if psnr.group(1) == "inf" else round(float(psnr.group(1)), 2)),
+        "ssim": round(float(ssim.group(1)), 4) if ssim else None,
+    }
+
+
+def benchmark_profile(
+    profile: EncodingProfile, reference_path: Path, clip_source: Optional[str] = None, save: bool = True
+) -> Dict:
+    """
+    用 profile 的参数编码参考片段，记录编码速度、倍速、码率、体积与 PSNR/SSIM。
+    结果写入 profile.benchmark_results (save=True 时) 并返回。
+    """
+    clip = _probe_clip(reference_path)
+    ext = profile.container or "mp4"
+
+    with tempfile.TemporaryDirectory(prefix=f"benchmark_{profile.id}_") as tmp:
+        encoded_path = Path(tmp) / f"encoded.{ext}"
+        last_progress = FFmpegProgress()
+
+        def on_progress(progress: FFmpegProgress):
+            nonlocal last_progress
+            last_progress = progress
+
+        started = time.monotonic()
+        run_ffmpeg(
+            ["-i", str(reference_path), *profile.ffmpeg_command.split(), "-y", str(encoded_path)],
+            label=f"benchmark {profile.name}",
+            duration=clip["duration"],
+            on_progress=on_progress,
+        )
+        elapsed = time.monotonic() - started
+
+        size = os.path.getsize(encoded_path)
+        quality = measure_quality(encoded_path, reference_path, clip["width"], clip["height"])
+
+    results = {
+        # 平均编码速度: 总帧数 / 墙钟耗时 (ffmpeg 报告的 fps 是瞬时值)
+        "encode_fps": round(last_progress.frame / elapsed, 1) if last_progress.frame and elapsed > 0 else None,
+        "realtime_factor": round(clip["duration"] / elapsed, 2) if elapsed > 0 else None,
+        "elapsed": round(elapsed, 2),
+        "size_bytes": size,
+        "bitrate_kbps": round(size * 8 / clip["duration"] / 1000, 1) if clip["duration"] else None,
+        **quality,
+        "clip": {"source": clip_source or str(reference_path), **clip},
+        "host": platform.node(),
+        "cpus": os.cpu_count(),
+        "ffmpeg": check_ffmpeg(),
+        "measured_at": timezone.now().isoformat(),
+    }
+    logger.info(
+        f"基准测试 {profile.name}: {results['encode_fps']} fps, {results['realtime_factor']}x, "
+        f"{results['bitrate_kbps']} kbps, PSNR {results['psnr']}, SSIM {results['ssim']}"
+    )
+
+    if save:
+        profile.benchmark_results = results
+        profile.save(update_fields=["benchmark_results"])
+    return results
+
+
+def benchmark_profiles(profiles, clip_path: Optional[str] = None, **clip_options) -> Dict[int, Dict]:
+    """
+    对一组配置运行基准测试 (共用同一个参考片段)。clip_path 为空时按 clip_options 合成。
+    单个配置失败不影响其余配置，失败原因同样记录在该配置的 benchmark_results 中。
+    """
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="benchmark_clip_") as tmp:
+        if clip_path:
+            reference, clip_source = Path(clip_path), clip_path
+        else:
+            reference, clip_source = synthesize_reference_clip(Path(tmp) / "reference.mkv", **clip_options), "testsrc2"
+        for profile in profiles:
+            try:
+                results[profile.id] = benchmark_profile(profile, reference, clip_source)
+            except Exception as e:
+                logger.error(f"配置 {profile.name} 基准测试失败: {e}", exc_info=True)
+                results[profile.id] = {"error": str(e), "measured_at": timezone.now().isoformat()}
+                profile.benchmark_results = results[profile.id]
+                profile.save(update_fields=["benchmark_results"])
+    return results
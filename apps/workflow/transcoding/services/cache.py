@@ -0,0 +1,166 @@
+# 文件路径: apps/workflow/transcoding/services/cache.py
+
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import redis
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from apps.media_assets.models import Media
+from apps.media_assets.services.placement import is_local_storage, place_into_field
+from apps.media_assets.services.scheduler import get_redis
+from apps.workflow.transcoding.cache import TranscodeCacheEntry
+
+logger = logging.getLogger(__name__)
+
+# Redis 计数器 (命中 / 未命中)，跨进程累计
+HITS_KEY = "vss:transcode_cache:hits"
+MISSES_KEY = "vss:transcode_cache:misses"
+
+# 不影响产出内容的参数，计算缓存键时忽略 (带值的参数连同其值一起忽略)
+IGNORED_FLAGS = ("-y", "-n", "-hide_banner", "-nostats", "-stats")
+IGNORED_OPTIONS = ("-loglevel", "-v", "-progress", "-stats_period")
+
+
+def normalize_command(params: List[str]) -> str:
+    """规范化 FFmpeg 参数: 合并空白、去掉日志/覆盖类参数。参数顺序保持不变 (顺序会影响产出)。"""
+    tokens = [t for p in params for t in str(p).split()]
+    normalized = []
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token in IGNORED_OPTIONS:
+            i += 2
+            continue
+        if token not in IGNORED_FLAGS:
+            normalized.append(token)
+        i += 1
+    return " ".join(normalized)
+
+
+def cache_key(params: List[str], container: str) -> Tuple[str, str, str]:
+    """返回 (参数哈希, 规范化参数, 封装格式)。"""
+    command = normalize_command(params)
+    container = (container or "mp4").lower()
+    return hashlib.sha256(command.encode("utf-8")).hexdigest(), command, container
+
+
+def _is_cacheable(media: Media) -> bool:
+    if not getattr(settings, "TRANSCODE_CACHE_ENABLED", True):
+        return False
+    # 未入内容库的历史 Media 没有内容哈希；缓存依赖硬链接，只支持本地存储
+    return bool(media.content_hash) and is_local_storage(TranscodeCacheEntry._meta.get_field("file").storage)
+
+
+def _incr(key: str):
+    try:
+        get_redis().incr(key)
+    except redis.RedisError as e:
+        logger.debug(f"转码缓存计数失败 ({key}): {e}")
+
+
+def lookup(media: Media, params: List[str], container: str) -> Optional[TranscodeCacheEntry]:
+    """查找缓存。命中时更新命中次数与最近使用时间；记录存在但文件已丢失时删除记录并视为未命中。"""
+    if not _is_cacheable(media):
+        return None
+
+    command_hash, _, container = cache_key(params, container)
+    entry = TranscodeCacheEntry.objects.filter(
+        source_sha256=media.content_hash, command_hash=command_hash, container=container
+    ).first()
+
+    if entry and not Path(entry.file.path).exists():
+        logger.warning(f"转码缓存 {entry} 的文件已丢失，删除记录。")
+        entry.delete()
+        entry = None
+
+    if entry is None:
+        _incr(MISSES_KEY)
+        return None
+
+    TranscodeCacheEntry.objects.filter(pk=entry.pk).update(hit_count=F("hit_count") + 1, last_used_at=timezone.now())
+    _incr(HITS_KEY)
+    logger.info(f"转码缓存命中: Media {media.id} -> {entry.file.name}")
+    return entry
+
+
+def store(media: Media, params: List[str], container: str, src_path) -> Optional[TranscodeCacheEntry]:
+    """
+    把一次转码产出硬链接进缓存 (源文件保留，调用方照常使用)，随后按配额淘汰。
+    并发写入相同键时保留先写入的记录，删除本次放置的副本。
+    """
+    if not _is_cacheable(media):
+        return None
+
+    command_hash, command, container = cache_key(params, container)
+    src = Path(src_path)
+    entry = TranscodeCacheEntry(
+        source_sha256=media.content_hash,
+        command_hash=command_hash,
+        container=container,
+        command=command,
+        size=src.stat().st_size,
+        last_used_at=timezone.now(),
+    )
+    place_into_field(entry.file, src, f"{command_hash}.{container}", mode="link")
+
+    try:
+        with transaction.atomic():
+            entry.save()
+    except IntegrityError:
+        entry.file.storage.delete(entry.file.name)
+        return TranscodeCacheEntry.objects.filter(
+            source_sha256=media.content_hash, command_hash=command_hash, container=container
+        ).first()
+
+    logger.info(f"转码产出已写入缓存: {entry.file.name} ({entry.size} bytes)")
+    evict(keep=entry.pk)
+    return entry
+
+
+def get_quota_bytes() -> int:
+    return int(getattr(settings, "TRANSCODE_CACHE_QUOTA_GB", 100) * 1024**3)
+
+
+def evict(quota_bytes: Optional[int] = None, keep: Optional[int] = None) -> Tuple[int, int]:
+    """
+    按最近使用时间 (LRU) 淘汰，直到缓存总大小不超过配额。
+    已交付给任务的产出是硬链接，删除缓存文件不影响它们。返回 (删除条数, 释放字节数)。
+    """
+    quota_bytes = get_quota_bytes() if quota_bytes is None else quota_bytes
+    total = TranscodeCacheEntry.objects.aggregate(total=Sum("size"))["total"] or 0
+    removed, freed = 0, 0
+    if total <= quota_bytes:
+        return removed, freed
+
+    for entry in TranscodeCacheEntry.objects.exclude(pk=keep).order_by("last_used_at").iterator():
+        if total - freed <= quota_bytes:
+            break
+        entry.file.delete(save=False)
+        entry.delete()
+        removed += 1
+        freed += entry.size
+
+    logger.info(f"转码缓存淘汰 {removed} 条，释放 {freed} bytes (配额 {quota_bytes} bytes)")
+    return removed, freed
+
+
+def get_cache_stats() -> Dict[str, Optional[int]]:
+    """命中/未命中计数 (Redis 不可用时为 None) 与缓存占用。"""
+    stats = {"hits": None, "misses": None}
+    try:
+        client = get_redis()
+        stats["hits"] = int(client.get(HITS_KEY) or 0)
+        stats["misses"] = int(client.get(MISSES_KEY) or 0)
+    except redis.RedisError as e:
+        logger.warning(f"读取转码缓存计数失败: {e}")
+
+    stats["entries"] = TranscodeCacheEntry.objects.count()
+    stats["size"] = TranscodeCacheEntry.objects.aggregate(total=Sum("size"))["total"] or 0
+    stats["quota"] = get_quota_bytes()
+    return stats
@@ -0,0 +1,118 @@
+# 文件路径: apps/workflow/transcoding/services/dispatch.py
+
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from celery import group
+from django.db import transaction
+
+from apps.configuration.models import EncodingProfile
+from apps.workflow.models import TranscodingJob, TranscodingProject
+from apps.workflow.transcoding.tasks import run_multi_transcoding_job, run_transcoding_job
+
+logger = logging.getLogger(__name__)
+
+
+def _publish(project: TranscodingProject, jobs_by_media: Dict) -> int:
+    """
+    事务提交后以一个 Celery group 一次性发布 (同一 Media 的多个配置合并为单次解码多路输出)。
+    须在事务内调用，返回消息条数。
+    """
+    signatures = [
+        run_multi_transcoding_job.s(job_ids) if len(job_ids) > 1 else run_transcoding_job.s(job_ids[0])
+        for job_ids in jobs_by_media.values()
+    ]
+    if signatures:
+        TranscodingProject.objects.filter(pk=project.pk).update(status=TranscodingProject.STATUS.PROCESSING)
+        project.status = TranscodingProject.STATUS.PROCESSING
+        transaction.on_commit(lambda: group(signatures).apply_async())
+    return len(signatures)
+
+
+def dispatch_transcoding(
+    project: TranscodingProject,
+    profiles: Optional[List[EncodingProfile]] = None,
+    media_ids: Optional[Iterable[UUID]] = None,
+) -> Tuple[int, int]:
+    """
+    批量创建并派发转码任务:
+    1. 一次查询取出已有的 (media, profile) 任务，缺失的用 bulk_create 一次写入；
+    2. 失败 (ERROR) 的任务重置为 PENDING 重新派发；已完成、处理中或排队中的任务不受影响；
+    3. 事务提交后以一个 Celery group 一次性发布 (同一 Media 的多个配置合并为单次解码多路输出)。
+
+    profiles 默认为项目的主配置 + 附加配置；media_ids 限定只处理部分 Media。
+    返回 (新建任务数, 派发任务数)。
+    """
+    profiles = profiles or project.get_profiles()
+    media_qs = project.asset.medias.all()
+    if media_ids is not None:
+        media_qs = media_qs.filter(id__in=list(media_ids))
+    media_id_list = list(media_qs.order_by("sequence_number").values_list("id", flat=True))
+    if not media_id_list or not profiles:
+        return 0, 0
+
+    with transaction.atomic():
+        existing = {
+            (job.media_id, job.profile_id): job
+            for job in TranscodingJob.objects.filter(
+                project=project, media_id__in=media_id_list, profile__in=profiles
+            ).only("id", "media_id", "profile_id", "status")
+        }
+
+        new_jobs = [
+            TranscodingJob(project=project, media_id=media_id, profile=profile)
+            for media_id in media_id_list
+            for profile in profiles
+            if (media_id, profile.id) not in existing
+        ]
+        created = TranscodingJob.objects.bulk_create(new_jobs)
+
+        failed_ids = [job.id for job in existing.values() if job.status == TranscodingJob.STATUS.ERROR]
+        if failed_ids:
+            # 等价于对每个任务执行 ERROR -> PENDING 的转换，这里用一次 UPDATE 完成
+            TranscodingJob.objects.filter(id__in=failed_ids).update(status=TranscodingJob.STATUS.PENDING)
+
+        jobs_by_media = defaultdict(list)
+        for job in created:
+            jobs_by_media[job.media_id].append(job.id)
+        for job in existing.values():
+            if job.id in failed_ids:
+                jobs_by_media[job.media_id].append(job.id)
+
+        messages = _publish(project, jobs_by_media)
+        dispatched = sum(len(job_ids) for job_ids in jobs_by_media.values())
+
+    logger.info(
+        f"Project {project.id}: 新建 {len(created)} 个转码任务，派发 {dispatched} 个 "
+        f"({messages} 条消息，涉及 {len(jobs_by_media)} 个媒体)"
+    )
+    return len(created), dispatched
+
+
+def redispatch_failed_jobs(project: TranscodingProject, job_ids: Iterable[int]) -> int:
+    """
+    只重跑指定的失败任务: 将其中仍为 ERROR 的任务重置为 PENDING 并派发，不新建任何 (media, profile) 组合。
+    返回派发任务数。
+    """
+    with transaction.atomic():
+        failed = list(
+            TranscodingJob.objects.select_for_update()
+            .filter(project=project, id__in=list(job_ids), status=TranscodingJob.STATUS.ERROR)
+            .order_by("id")
+            .values_list("id", "media_id")
+        )
+        if not failed:
+            return 0
+        TranscodingJob.objects.filter(id__in=[job_id for job_id, _ in failed]).update(
+            status=TranscodingJob.STATUS.PENDING
+        )
+
+        jobs_by_media = defaultdict(list)
+        for job_id, media_id in failed:
+            jobs_by_media[media_id].append(job_id)
+        messages = _publish(project, jobs_by_media)
+
+    logger.info(f"Project {project.id}: 重新派发 {len(failed)} 个失败的转码任务 ({messages} 条消息)")
+    return len(failed)
@@ -0,0 +1,51 @@
+# 文件路径: apps/workflow/transcoding/services/hls.py
+
+from pathlib import Path
+from typing import List
+
+from apps.configuration.models import EncodingProfile
+
+HLS_PLAYLIST = "index.m3u8"
+HLS_INIT_SEGMENT = "init.mp4"
+HLS_SEGMENT_PATTERN = "seg_%05d.m4s"
+
+# 只作用于 mp4 封装的参数，HLS (hls 封装) 不接受
+MP4_ONLY_OPTIONS = ("-movflags",)
+
+
+def hls_output_args(profile: EncodingProfile, encoding_params: List[str], output_dir: Path) -> List[str]:
+    """
+    把 profile 的编码参数扩展为一路 HLS (fMP4) 输出: output_dir 下生成 index.m3u8、init.mp4 与 seg_xxxxx.m4s。
+    未显式指定关键帧间隔时按分片时长强制关键帧，保证每个分片从关键帧开始、时长一致。
+    """
+    params = []
+    i = 0
+    while i < len(encoding_params):
+        if encoding_params[i] in MP4_ONLY_OPTIONS:
+            i += 2
+            continue
+        params.append(encoding_params[i])
+        i += 1
+
+    segment = max(1, profile.hls_segment_duration)
+    if not any(opt in params for opt in ("-g", "-force_key_frames")):
+        params += ["-force_key_frames", f"expr:gte(t,n_forced*{segment})"]
+
+    return [
+        *params,
+        "-f",
+        "hls",
+        "-hls_time",
+        str(segment),
+        "-hls_playlist_type",
+        "vod",
+        "-hls_segment_type",
+        "fmp4",
+        "-hls_fmp4_init_filename",
+        HLS_INIT_SEGMENT,
+        "-hls_segment_filename",
+        str(output_dir / HLS_SEGMENT_PATTERN),
+        "-hls_flags",
+        "independent_segments",
+        str(output_dir / HLS_PLAYLIST),
+    ]
@@ -0,0 +1,118 @@
+# 文件路径: apps/workflow/transcoding/services/progress.py
+
+import logging
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+import redis
+from django.conf import settings
+
+from apps.media_assets.services.ffmpeg_runner import FFmpegProgress
+from apps.media_assets.services.scheduler import get_redis
+
+logger = logging.getLogger(__name__)
+
+# 每个任务一个 HASH；任务异常退出未清理时由 TTL 兜底过期
+PROGRESS_KEY = "vss:transcoding:progress:{job_id}"
+PROGRESS_TTL = 3600
+
+
+def _key(job_id) -> str:
+    return PROGRESS_KEY.format(job_id=job_id)
+
+
+def estimate_eta(progress: FFmpegProgress, duration: Optional[float]) -> Optional[float]:
+    """剩余时长 / 当前速度 (倍速)，即预计剩余的墙钟秒数。"""
+    if not duration or progress.out_time is None or not progress.speed:
+        return None
+    return max(0.0, (duration - progress.out_time) / progress.speed)
+
+
+class ProgressPublisher:
+    """
+    作为 run_ffmpeg 的 on_progress 回调，把进度按限流写入 Redis (多路输出时同一份进度写给每个任务)。
+    同时记录墙钟耗时，结束后通过 realtime_factor() 得到实际达到的倍速 (源时长 / 耗时)。
+    """
+
+    def __init__(self, job_ids: Iterable[int], duration: Optional[float], interval: Optional[float] = None):
+        self.job_ids = list(job_ids)
+        self.duration = duration
+        self.interval = settings.TRANSCODING_PROGRESS_INTERVAL if interval is None else interval
+        self.started_at = time.monotonic()
+        self._last_published = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, progress: FFmpegProgress):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_published < self.interval and not progress.finished:
+                return
+            self._last_published = now
+
+        percent = progress.percent(self.duration)
+        eta = estimate_eta(progress, self.duration)
+        fields = {
+            "percent": "" if percent is None else f"{percent:.1f}",
+            "eta": "" if eta is None else f"{eta:.0f}",
+            "fps": "" if progress.fps is None else f"{progress.fps:.1f}",
+            "speed": "" if progress.speed is None else f"{progress.speed:.2f}",
+            "out_time": "" if progress.out_time is None else f"{progress.out_time:.1f}",
+            "updated_at": f"{time.time():.0f}",
+        }
+        try:
+            pipe = get_redis().pipeline()
+            for job_id in self.job_ids:
+                pipe.hset(_key(job_id), mapping=fields)
+                pipe.expire(_key(job_id), PROGRESS_TTL)
+            pipe.execute()
+        except redis.RedisError as e:
+            # 进度只用于展示，写入失败不影响转码
+            logger.debug(f"转码进度写入 Redis 失败 ({self.job_ids}): {e}")
+
+    def realtime_factor(self) -> Optional[float]:
+        elapsed = time.monotonic() - self.started_at
+        if not self.duration or elapsed <= 0:
+            return None
+        return round(self.duration / elapsed, 2)
+
+
+def get_progress(job_ids: Iterable[int]) -> Dict[int, Dict[str, Optional[float]]]:
+    """批量读取任务进度 (一次 pipeline)。没有进度记录的任务不出现在结果中。"""
+    job_ids = list(job_ids)
+    if not job_ids:
+        return {}
+    try:
+        pipe = get_redis().pipeline()
+        for job_id in job_ids:
+            pipe.hgetall(_key(job_id))
+        raw = pipe.execute()
+    except redis.RedisError as e:
+        logger.debug(f"读取转码进度失败: {e}")
+        return {}
+
+    result = {}
+    for job_id, fields in zip(job_ids, raw):
+        if not fields:
+            continue
+        values = {k.decode(): v.decode() for k, v in fields.items()}
+        result[job_id] = {k: float(v) if v else None for k, v in values.items()}
+    return result
+
+
+def clear_progress(job_ids: Iterable[int]):
+    keys = [_key(job_id) for job_id in job_ids]
+    if not keys:
+        return
+    try:
+        get_redis().delete(*keys)
+    except redis.RedisError as e:
+        logger.debug(f"清理转码进度失败: {e}")
+
+
+def format_eta(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "—"
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"  # noqa: E231
@@ -0,0 +1,98 @@
+# 文件路径: apps/workflow/transcoding/services/proxy.py
+
+import logging
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
+
+from apps.configuration.models import EncodingProfile
+from apps.media_assets.models import Media
+from apps.workflow.models import TranscodingJob, TranscodingProject
+
+logger = logging.getLogger(__name__)
+
+PROXY_PROJECT_NAME = "标注代理 (自动)"
+
+
+def get_annotation_proxy_profile() -> Optional[EncodingProfile]:
+    """返回被指定为标注代理的编码配置 (系统中至多一个)。"""
+    return EncodingProfile.objects.filter(is_annotation_proxy=True).first()
+
+
+def get_proxy_project(media: Media, profile: EncodingProfile) -> TranscodingProject:
+    """每个 Asset 一个自动维护的标注代理转码项目。"""
+    project, created = TranscodingProject.objects.get_or_create(
+        asset=media.asset,
+        name=PROXY_PROJECT_NAME,
+        encoding_profile=profile,
+        defaults={"description": "入库时自动创建，为每个 Media 生成低码率、fast-start 的标注代理文件。"},
+    )
+    if created:
+        logger.info(f"为 Asset {media.asset_id} 创建标注代理转码项目 {project.id}")
+    return project
+
+
+# 进行中的任务: 尚未开始的 (PENDING / QUEUED) 执行时会读取最新的源文件；
+# 正在编码或等待交付的 (PROCESSING / QA_PENDING) 不能原地重置，源被替换时延后重新生成
+NOT_STARTED_STATUSES = (TranscodingJob.STATUS.PENDING, TranscodingJob.STATUS.QUEUED)
+RUNNING_STATUSES = (TranscodingJob.STATUS.PROCESSING, TranscodingJob.STATUS.QA_PENDING)
+
+
+def queue_annotation_proxy(media: Media, force: bool = False) -> Optional[TranscodingJob]:
+    """
+    为 Media 排队一次代理转码。每个 (media, 代理配置) 在代理项目中只保留一个任务，重新生成时复用它:
+    - 未配置代理编码配置时不做任何事；
+    - 已有进行中或已完成的代理任务时跳过 (force=True 时重新生成，用于源视频被替换的情况)；
+    - 失败或需要重新生成的任务重置为 PENDING 后重新派发，不新建任务行 (失败行不会让项目一直停在 FAILED)；
+    - force=True 但任务正在编码时不重复派发，由 requeue_annotation_proxy 在 SCHEDULER_RETRY_DELAY 秒后再试。
+    任务在事务提交后派发；返回派发的任务，未派发时返回 None。
+    """
+    # [延迟导入] 避免 media_assets.tasks -> transcoding.tasks 的循环导入
+    from apps.workflow.transcoding.tasks import requeue_annotation_proxy, run_transcoding_job
+
+    profile = get_annotation_proxy_profile()
+    if profile is None:
+        logger.info("未指定标注代理编码配置，跳过代理转码。")
+        return None
+
+    existing = TranscodingJob.objects.filter(media=media, profile=profile).exclude(status=TranscodingJob.STATUS.ERROR)
+    if not force and existing.exists():
+        return None
+
+    project = get_proxy_project(media, profile)
+    with transaction.atomic():
+        jobs = list(
+            TranscodingJob.objects.select_for_update()
+            .filter(project=project, media=media, profile=profile)
+            .order_by("-created")
+        )
+        job = jobs[0] if jobs else None
+
+        if job is not None and job.status in NOT_STARTED_STATUSES:
+            # 尚未开始编码，执行时即使用新的源文件
+            return None
+        if job is not None and job.status in RUNNING_STATUSES:
+            logger.info(f"Media {media.id} 的标注代理任务 {job.id} 正在进行 ({job.status})，稍后重新生成。")
+            transaction.on_commit(
+                lambda: requeue_annotation_proxy.apply_async(
+                    args=[str(media.id)], countdown=settings.SCHEDULER_RETRY_DELAY
+                )
+            )
+            return None
+
+        if job is None:
+            job = TranscodingJob.objects.create(project=project, media=media, profile=profile)
+        else:
+            # 等价于 ERROR / COMPLETED -> PENDING 的转换，这里用一次 UPDATE 完成
+            TranscodingJob.objects.filter(pk=job.pk).update(status=TranscodingJob.STATUS.PENDING)
+            # 清理历史遗留的重复任务行 (旧版本每次重新生成都会新建一行)
+            stale = [other.pk for other in jobs[1:]]
+            if stale:
+                TranscodingJob.objects.filter(pk__in=stale).delete()
+
+        TranscodingProject.objects.filter(pk=project.pk).update(status=TranscodingProject.STATUS.PROCESSING)
+        transaction.on_commit(lambda: run_transcoding_job.delay(job.id))
+
+    logger.info(f"已为 Media {media.id} 排队标注代理转码 (Job {job.id}, 配置: {profile.name})")
+    return job
@@ -0,0 +1,210 @@
+# 文件路径: apps/workflow/transcoding/services/segmented.py
+
+import bisect
+import logging
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from apps.configuration.models import EncodingProfile
+from apps.media_assets.models import KeyframeIndex, MediaProbe
+from apps.media_assets.services.ffmpeg_runner import FFmpegProgress, run_ffmpeg
+from apps.media_assets.services.probe import count_video_packets, video_packet_times
+
+logger = logging.getLogger(__name__)
+
+# 这些参数只作用于音频或封装，分段编码时不传给视频分段，而是在最终合并时使用
+AUDIO_OPTION_PREFIXES = ("-c:a", "-codec:a", "-acodec", "-b:a", "-ar", "-ac", "-af", "-filter:a", "-q:a", "-aq")
+MUXER_OPTIONS = ("-movflags",)
+
+# 每个分段 (以及拼接后的整体) 帧数与源对应区间帧数允许的误差 (帧)
+FRAME_TOLERANCE = 1
+
+
+def plan_segments(
+    profile: EncodingProfile, probe: Optional[MediaProbe], index: Optional[KeyframeIndex], slots: int
+) -> List[Tuple[float, float]]:
+    """
+    规划分段: 目标段数取 profile.segment_count (0 表示等于任务持有的 CPU 槽位数 slots)，并受最短分段时长约束；
+    每个切点对齐到其之前最近的关键帧，保证每段都从关键帧开始解码。
+    返回 [(start, end), ...]；不足两段时返回空列表 (调用方走整段转码)。
+    """
+    if not probe or not probe.duration or index is None or index.count < 2:
+        return []
+
+    duration = probe.duration
+    target = profile.segment_count or slots
+    target = min(target, int(duration // max(profile.min_segment_duration, 1)))
+    if target < 2:
+        return []
+
+    boundaries = [0.0]
+    for k in range(1, target):
+        kf = index.keyframe_at_or_before(duration * k / target)
+        if kf is not None and kf > boundaries[-1]:
+            boundaries.append(kf)
+    boundaries.append(duration)
+
+    segments = list(zip(boundaries[:-1], boundaries[1:]))
+    return segments if len(segments) >= 2 else []
+
+
+def _split_encoding_params(params: List[str]) -> Tuple[List[str], List[str], List[str]]:
+    """把 profile 的 FFmpeg 参数拆成 (视频参数, 音频参数, 封装参数)。假设参数均为 '-opt value' 成对出现。"""
+    video_args, audio_args, muxer_args = [], [], []
+    i = 0
+    while i < len(params):
+        token = params[i]
+        has_value = i + 1 < len(params) and not params[i + 1].startswith("-")
+        pair = params[i : i + 2] if has_value else [token]
+        if token.startswith(AUDIO_OPTION_PREFIXES):
+            audio_args += pair
+        elif token in MUXER_OPTIONS:
+            muxer_args += pair
+        else:
+            video_args += pair
+        i += len(pair)
+    return video_args, audio_args, muxer_args
+
+
+def transcode_segmented(
+    source_path: Path,
+    output_path: Path,
+    encoding_params: List[str],
+    segments: List[Tuple[float, float]],
+    source_duration: float,
+    slots: int,
+    label: str = "segmented",
+    on_progress: Optional[Callable[[FFmpegProgress], None]] = None,
+) -> Path:
+    """
+    分段并行转码:
+    1. 各段只编码视频 (从关键帧起点 -ss 精确定位)，最多 slots 个 ffmpeg 同时运行；
+    2. 逐段校验帧数，再 concat 流复制拼接视频段，同时从源文件一次性编码音轨；
+    3. 校验拼接后的总帧数。
+    slots 为任务实际持有的 CPU 槽位数: 并发进程数与每个进程的编码线程数都按它分配，不超出调度器的准入配额。
+    on_progress 收到的是各分段进度的汇总 (已编码时长之和、倍速之和)。
+    """
+    video_args, audio_args, muxer_args = _split_encoding_params(encoding_params)
+    if not audio_args:
+        audio_args = ["-c:a", "aac"]
+
+    # 槽位在并发分段之间平分，避免 N 个 ffmpeg 各自按全部核心开线程
+    workers = max(1, min(len(segments), slots))
+    threads_args = [] if "-threads" in video_args else ["-threads", str(max(1, slots // workers))]
+
+    work_dir = Path(tempfile.mkdtemp(prefix="segmented_", dir=output_path.parent))
+    try:
+        chunk_paths = [work_dir / f"chunk_{k:04d}.mkv" for k in range(len(segments))]  # noqa: E231
+        chunk_progress = [FFmpegProgress() for _ in segments]
+        progress_lock = threading.Lock()
+
+        def report_chunk(k: int, progress: FFmpegProgress):
+            with progress_lock:
+                chunk_progress[k] = progress
+                on_progress(
+                    FFmpegProgress(
+                        frame=sum(p.frame or 0 for p in chunk_progress),
+                        fps=sum(p.fps or 0 for p in chunk_progress),
+                        speed=sum(p.speed or 0 for p in chunk_progress),
+                        out_time=sum(p.out_time or 0 for p in chunk_progress),
+                    )
+                )
+
+        def encode_chunk(k: int):
+            start, end = segments[k]
+            run_ffmpeg(
+                [
+                    "-ss",
+                    f"{start:.3f}",
+                    "-i",
+                    str(source_path),
+                    "-t",
+                    f"{end - start:.3f}",
+                    "-map",
+                    "0:v:0",
+                    "-an",
+                    "-sn",
+                    *video_args,
+                    *threads_args,
+                    "-y",
+                    str(chunk_paths[k]),
+                ],
+                label=f"{label} chunk {k + 1}/{len(segments)}",
+                duration=end - start,
+                on_progress=(lambda progress: report_chunk(k, progress)) if on_progress else None,
+            )
+
+        logger.info(f"{label}: 分 {len(segments)} 段并行编码 (切点: {[round(s, 3) for s, _ in segments]})")
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # 源的逐帧时间戳只解封装读取一遍，与分段编码同时进行
+            expected_future = pool.submit(source_frame_counts, source_path, segments)
+            # list() 触发结果收集，任一分段失败都会在此抛出
+            list(pool.map(encode_chunk, range(len(segments))))
+            expected = expected_future.result()
+        chunk_frames = verify_chunk_frames(chunk_paths, expected)
+
+        concat_list = work_dir / "concat.txt"
+        concat_list.write_text("".join(f"file '{p.as_posix()}'\n" for p in chunk_paths), encoding="utf-8")
+
+        run_ffmpeg(
+            [
+                "-f",
+                "concat",
+                "-safe",
+                "0",
+                "-i",
+                str(concat_list),
+                "-i",
+                str(source_path),
+                "-map",
+                "0:v:0",
+                "-map",
+                "1:a:0?",
+                "-c:v",
+                "copy",
+                *audio_args,
+                *muxer_args,
+                "-y",
+                str(output_path),
+            ],
+            label=f"{label} concat",
+            duration=source_duration,
+        )
+        verify_output_frames(output_path, sum(expected), sum(chunk_frames))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return output_path
+
+
+def source_frame_counts(source_path: Path, segments: List[Tuple[float, float]]) -> List[int]:
+    """源视频每个分段 [start, end) 内的帧数 (最后一段包含结尾的所有帧)。"""
+    times = sorted(video_packet_times(source_path))
+    starts = [bisect.bisect_left(times, start) for start, _ in segments] + [len(times)]
+    return [starts[k + 1] - starts[k] for k in range(len(segments))]
+
+
+def verify_chunk_frames(chunk_paths: List[Path], expected: List[int]) -> List[int]:
+    """
+    逐段比对编码后帧数与源区间帧数，误差超过 FRAME_TOLERANCE 帧时抛出 ValueError
+    (切点处丢帧或重复帧)。返回各段实际帧数。
+    """
+    counts = []
+    for k, (path, want) in enumerate(zip(chunk_paths, expected)):
+        got = count_video_packets(path)
+        if abs(got - want) > FRAME_TOLERANCE:
+            raise ValueError(f"分段 {k + 1}/{len(chunk_paths)} 帧数 {got} 与源区间帧数 {want} 不一致")
+        counts.append(got)
+    return counts
+
+
+def verify_output_frames(output_path: Path, expected_total: int, chunk_total: int):
+    """拼接结果须包含全部分段帧 (流复制不应增减帧)，且总帧数与源相差不超过 FRAME_TOLERANCE 帧。"""
+    got = count_video_packets(output_path)
+    if got != chunk_total or abs(got - expected_total) > FRAME_TOLERANCE:
+        raise ValueError(f"分段转码产出帧数 {got} 与分段帧数之和 {chunk_total} / 源帧数 {expected_total} 不一致")
+    logger.info(f"分段转码帧数校验通过: {got} 帧 (源 {expected_total} 帧)")
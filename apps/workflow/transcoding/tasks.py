@@ -2,69 +2,145 @@
 
 import logging
 import os
-import subprocess
+import shutil
 from pathlib import Path
+from typing import List, Optional, Tuple
 
 from celery import shared_task
 from django.conf import settings
-from django.core.files.base import ContentFile
 from django.db import transaction
 
+from apps.configuration.models import EncodingProfile
+from apps.media_assets.models import Media
+from apps.media_assets.services.ffmpeg_runner import run_ffmpeg
+from apps.media_assets.services.keyframes import get_keyframe_index
+from apps.media_assets.services.placement import place_directory_into_field, place_into_field
+from apps.media_assets.services.probe import get_media_probe
+from apps.media_assets.services.scheduler import SlotsUnavailable, cpu_slots
 from apps.workflow.models import DeliveryJob, TranscodingJob, TranscodingProject
+from apps.workflow.transcoding.services import cache as transcode_cache
+from apps.workflow.transcoding.services.benchmark import benchmark_profiles
+from apps.workflow.transcoding.services.hls import HLS_PLAYLIST, hls_output_args
+from apps.workflow.transcoding.services.progress import ProgressPublisher, clear_progress
+from apps.workflow.transcoding.services.proxy import queue_annotation_proxy
+from apps.workflow.transcoding.services.segmented import plan_segments, transcode_segmented
 
-from ..delivery.tasks import run_delivery_job
+from ..delivery.tasks import schedule_delivery
 
 logger = logging.getLogger(__name__)
 
 
 def _check_and_update_project_status(project: TranscodingProject):
     """
-    检查给定项目下的所有转码任务状态，并更新项目的聚合状态。
+    汇总项目下所有转码任务的状态，更新项目的聚合状态。
+    锁住项目行后用一次条件聚合统计 总数/已完成/失败，避免并发任务结束时交错读写导致状态回退。
     """
-    # 刷新对象以获取最新状态
-    project.refresh_from_db()
-
-    all_jobs = project.transcoding_jobs.all()
-    total_jobs = all_jobs.count()
-
-    if total_jobs == 0:
+    with transaction.atomic():
+        project = TranscodingProject.objects.select_for_update().get(pk=project.pk)
+        counts = project.transcoding_jobs.aggregate(**TranscodingProject.job_count_aggregates(prefix=""))
+
+        total, done, failed = counts["jobs_total"], counts["jobs_done"], counts["jobs_failed"]
+        if total == 0:
+            return
+
+        if failed:
+            new_status = TranscodingProject.STATUS.FAILED
+        elif done == total:
+            new_status = TranscodingProject.STATUS.COMPLETED
+        else:
+            # 还有在跑的，保持 PROCESSING (或不做改变)
+            return
+
+        if project.status != new_status:
+            project.status = new_status
+            project.save(update_fields=["status"])
+            logger.info(f"Project {project.id} status updated to {new_status} ({done}/{total} done, {failed} failed)")
+
+
+def _build_encoding_params(job: TranscodingJob) -> List[str]:
+    encoding_params = job.profile.ffmpeg_command.split()
+    ext = job.profile.container or "mp4"
+    if (
+        job.profile.is_annotation_proxy
+        and not job.profile.is_hls
+        and ext in ("mp4", "mov")
+        and "-movflags" not in encoding_params
+    ):
+        # 代理文件必须 fast-start (moov 前置)，浏览器无需下载完整文件即可开始播放和拖动
+        encoding_params += ["-movflags", "+faststart"]
+    return encoding_params
+
+
+def _temp_output(job: TranscodingJob, temp_output_dir: Path) -> Tuple[Path, str]:
+    """临时产出路径与最终文件名。HLS 的产出是一个目录，最终文件名为其中的播放列表。"""
+    if job.profile.is_hls:
+        return temp_output_dir / f"{job.id}_hls", HLS_PLAYLIST
+    filename = f"{job.id}.{job.profile.container or 'mp4'}"
+    return temp_output_dir / filename, filename
+
+
+def _output_args(job: TranscodingJob, encoding_params: List[str], temp_output_path: Path) -> List[str]:
+    """一路输出的 FFmpeg 参数 (编码参数 + 输出目标)。"""
+    if job.profile.is_hls:
+        shutil.rmtree(temp_output_path, ignore_errors=True)
+        temp_output_path.mkdir(parents=True)
+        return hls_output_args(job.profile, encoding_params, temp_output_path)
+    return [*encoding_params, str(temp_output_path)]
+
+
+def _remove_temp_output(temp_output_path: Optional[Path]):
+    if temp_output_path is None:
         return
+    if temp_output_path.is_dir():
+        shutil.rmtree(temp_output_path, ignore_errors=True)
+    elif temp_output_path.exists():
+        os.remove(temp_output_path)
 
-    # [核心修复] 使用字符串字面量，避开 STATUS vs Status 的属性引用坑
-    # 同时也为了兼容 model_utils Choices 的取值方式
 
-    # 检查是否有失败的任务
-    # 注意：这里假设数据库里存的就是 "ERROR" 或 "FAILED" 这样的字符串
-    # 根据日志报错，之前的 STATUS.CREATED 说明定义可能是 Choices
+def _place_output(job: TranscodingJob, src_path, filename: str, mode: str):
+    """把单文件产出放到 job.output_file。重跑时先删除上一次的产出，保证文件名不变 (交付与 URL 依赖固定路径)。"""
+    if job.output_file:
+        job.output_file.delete(save=False)
+    place_into_field(job.output_file, src_path, filename, mode=mode)
 
-    # 我们直接查数据库字段的值，这是最安全的
-    failed_exists = all_jobs.filter(status="ERROR").exists()
 
-    # 检查是否还有未完成的任务
-    running_exists = all_jobs.filter(status__in=["PENDING", "PROCESSING", "CREATED"]).exists()
+def _finalize_output(
+    job: TranscodingJob,
+    temp_output_path: Optional[Path],
+    temp_output_filename: str,
+    realtime_factor: Optional[float] = None,
+):
+    """
+    原子化：保存产出 + 状态变为 QA_PENDING + 创建并在提交后触发 DeliveryJob (批量分发时合并到同一批)。
+    temp_output_path 为 None 表示 output_file 已经指向复用的产出。
+    产出文件直接移动 (同盘 rename) 到最终存储路径，远程存储时流式上传，不再整文件读入内存。
+    realtime_factor 为本次编码实际达到的倍速 (命中缓存时为 None)。
+    HLS 产出 (目录) 整体放到 transcoding_outputs/<asset_id>/<job_id>/ 下，output_file 指向播放列表。
+    """
+    with transaction.atomic():
+        if temp_output_path is not None and temp_output_path.is_dir():
+            # 目标目录会被整体替换，无需单独删除旧产出
+            place_directory_into_field(job.output_file, temp_output_path, str(job.id), temp_output_filename)
+        elif temp_output_path is not None:
+            _place_output(job, temp_output_path, temp_output_filename, mode="move")
+
+        job.realtime_factor = realtime_factor
+        job.queue_for_qa()  # 状态变为 QA_PENDING
+        job.save()
 
-    new_status = project.status
+        delivery_job = DeliveryJob.objects.create(source_object=job)
 
-    if failed_exists:
-        new_status = "FAILED"
-    elif not running_exists:
-        # 没有正在跑的，也没有失败的，说明全成功了
-        new_status = "COMPLETED"
-    else:
-        # 还有在跑的，保持 PROCESSING (或不做改变)
-        return
+        schedule_delivery(delivery_job)
 
-    if project.status != new_status:
-        project.status = new_status
-        project.save(update_fields=["status"])
-        logger.info(f"Project {project.id} status updated to {new_status}")
+    logger.info(f"Job {job.id} finished transcoding, triggering delivery {delivery_job.id}")
 
 
-@shared_task(name="apps.workflow.transcoding.tasks.run_transcoding_job")
-def run_transcoding_job(job_id):
+@shared_task(bind=True, name="apps.workflow.transcoding.tasks.run_transcoding_job", max_retries=None)
+def run_transcoding_job(self, job_id):
     """
     (V2.4 Status 修复版)
     执行转码 -> 保存文件 -> 触发分发 -> 更新项目状态
+    先按 EncodingProfile.cpu_slots 申请 CPU 槽位，槽位已满时保持 PENDING 并稍后重试。
     """
     try:
         job = TranscodingJob.objects.select_related("project", "profile", "media__asset").get(id=job_id)
@@ -72,6 +148,17 @@ def run_transcoding_job(job_id):
         logger.error(f"Job {job_id} not found.")
         return
 
+    try:
+        with cpu_slots(f"transcoding:{job.id}", job.profile.cpu_slots):
+            _execute_transcoding_job(job)
+    except SlotsUnavailable as e:
+        logger.info(f"Job {job_id} 等待 CPU 槽位: {e}")
+        raise self.retry(countdown=settings.SCHEDULER_RETRY_DELAY, exc=e)
+
+
+def _execute_transcoding_job(job: TranscodingJob):
+    job_id = job.id
+
     # [修复] 统一使用字符串字面量或确保 Status 属性正确
     # 这里我们直接用字符串，这是 Django Choices 的通用做法
     if job.status == "PENDING":
@@ -89,35 +176,75 @@ def run_transcoding_job(job_id):
         _check_and_update_project_status(job.project)
         return
 
+    # 读取入库时的探测结果 (不再打开源文件)，对不含视频流的源直接判定失败
+    probe = get_media_probe(media)
+    if probe and not probe.has_video:
+        logger.error(f"Job {job_id}: 源文件不包含视频流 ({probe.format_name})。")
+        job.fail()
+        job.save()
+        _check_and_update_project_status(job.project)
+        return
+    if probe:
+        logger.info(
+            f"Job {job_id}: 源 {probe.video_codec} {probe.width}x{probe.height} "
+            f"@{probe.frame_rate}fps, 时长 {probe.duration}s"
+        )
+
     source_video_path = Path(media.source_video.path)
     temp_output_dir = Path(settings.MEDIA_ROOT) / "temp_transcoding"
     temp_output_dir.mkdir(parents=True, exist_ok=True)
 
     ext = job.profile.container if job.profile.container else "mp4"
-    temp_output_filename = f"{job.id}.{ext}"
-    temp_output_path = temp_output_dir / temp_output_filename
+    temp_output_path, temp_output_filename = _temp_output(job, temp_output_dir)
+    hls = job.profile.is_hls
 
+    publisher = ProgressPublisher([job_id], probe.duration if probe else None)
     try:
-        # FFmpeg 执行
-        encoding_params = job.profile.ffmpeg_command.split()
-        command = ["ffmpeg", "-i", str(source_video_path), *encoding_params, str(temp_output_path), "-y"]
-
-        logger.info(f"FFmpeg cmd: {' '.join(command)}")
-        subprocess.run(command, check=True, capture_output=True, text=True, encoding="utf-8")
-
-        # 原子化：保存 + 触发分发
-        with transaction.atomic():
-            with open(temp_output_path, "rb") as f:
-                job.output_file.save(temp_output_filename, ContentFile(f.read()), save=False)
-
-            job.queue_for_qa()  # 状态变为 QA_PENDING
-            job.save()
-
-            delivery_job = DeliveryJob.objects.create(source_object=job)
-
-            transaction.on_commit(lambda: run_delivery_job.delay(delivery_job.id))
-
-        logger.info(f"Job {job_id} finished transcoding, triggering delivery {delivery_job.id}")
+        encoding_params = _build_encoding_params(job)
+        # 转码缓存与分段并行只支持单文件产出
+        cached = None if hls else transcode_cache.lookup(media, encoding_params, ext)
+
+        if cached:
+            # 源内容与参数均相同：直接链接缓存中的产出，跳过 FFmpeg
+            logger.info(f"Job {job_id} 命中转码缓存 ({cached.file.name})")
+            _place_output(job, cached.file.path, temp_output_filename, mode="link")
+        else:
+            # FFmpeg 执行
+            ffmpeg_args = ["-y", "-i", str(source_video_path), *_output_args(job, encoding_params, temp_output_path)]
+
+            segments = []
+            if job.profile.enable_segmented and not hls:
+                segments = plan_segments(job.profile, probe, get_keyframe_index(media), job.profile.cpu_slots)
+                if not segments:
+                    logger.info(f"Job {job_id}: 不满足分段条件 (时长/关键帧索引)，回退为整段转码。")
+
+            if segments:
+                transcode_segmented(
+                    source_video_path,
+                    temp_output_path,
+                    encoding_params,
+                    segments,
+                    probe.duration,
+                    job.profile.cpu_slots,
+                    label=f"transcoding job {job_id}",
+                    on_progress=publisher,
+                )
+            else:
+                logger.info(f"FFmpeg args: {' '.join(ffmpeg_args)}")
+                run_ffmpeg(
+                    ffmpeg_args,
+                    label=f"transcoding job {job_id}",
+                    duration=probe.duration if probe else None,
+                    on_progress=publisher,
+                )
+
+            if not hls:
+                transcode_cache.store(media, encoding_params, ext, temp_output_path)
+
+        if cached:
+            _finalize_output(job, None, temp_output_filename)
+        else:
+            _finalize_output(job, temp_output_path, temp_output_filename, publisher.realtime_factor())
 
         # [关键] 更新项目状态
         _check_and_update_project_status(job.project)
@@ -131,5 +258,133 @@ def run_transcoding_job(job_id):
         raise e
 
     finally:
-        if temp_output_path and temp_output_path.exists():
-            os.remove(temp_output_path)
+        clear_progress([job_id])
+        _remove_temp_output(temp_output_path)
+
+
+@shared_task
+def requeue_annotation_proxy(media_id: str):
+    """源视频被替换时代理任务正在编码: 延后再次尝试重新生成 (仍在进行时会继续延后)。"""
+    media = Media.objects.filter(pk=media_id).first()
+    if media is not None:
+        queue_annotation_proxy(media, force=True)
+
+
+@shared_task(bind=True, name="apps.workflow.transcoding.tasks.run_multi_transcoding_job", max_retries=None)
+def run_multi_transcoding_job(self, job_ids: List[int]):
+    """
+    单次解码、多路输出: 同一 Media 的多个 TranscodingJob (不同 EncodingProfile) 合并为一次 FFmpeg 调用。
+    FFmpeg 对同一输入只解码一次，再分别送入各输出的滤镜与编码器；完成后每个输出各自创建 DeliveryJob。
+    CPU 槽位按各配置之和申请。
+    """
+    jobs = list(
+        TranscodingJob.objects.select_related("project", "profile", "media__asset")
+        .filter(id__in=job_ids)
+        .order_by("id")
+    )
+    if not jobs:
+        logger.error(f"Jobs {job_ids} not found.")
+        return
+    if len({job.media_id for job in jobs}) != 1:
+        raise ValueError(f"多路输出任务要求所有 Job 属于同一个 Media: {job_ids}")
+
+    slots = sum(job.profile.cpu_slots for job in jobs)
+    try:
+        with cpu_slots(f"transcoding-multi:{jobs[0].id}", slots):
+            _execute_multi_transcoding(jobs)
+    except SlotsUnavailable as e:
+        logger.info(f"Jobs {job_ids} 等待 CPU 槽位: {e}")
+        raise self.retry(countdown=settings.SCHEDULER_RETRY_DELAY, exc=e)
+
+
+def _execute_multi_transcoding(jobs: List[TranscodingJob]):
+    media = jobs[0].media
+    label = f"transcoding jobs {[job.id for job in jobs]}"
+
+    for job in jobs:
+        if job.status == "PENDING":
+            job.start()
+            job.save()
+
+    def fail_all(reason: str):
+        logger.error(f"{label}: {reason}")
+        for job in jobs:
+            job.fail()
+            job.save()
+        _check_and_update_project_status(jobs[0].project)
+
+    if not media.source_video:
+        fail_all("Media has no source video.")
+        return
+
+    probe = get_media_probe(media)
+    if probe and not probe.has_video:
+        fail_all(f"源文件不包含视频流 ({probe.format_name})。")
+        return
+
+    temp_output_dir = Path(settings.MEDIA_ROOT) / "temp_transcoding"
+    temp_output_dir.mkdir(parents=True, exist_ok=True)
+
+    # 先处理命中缓存的产出，剩余的才进入 FFmpeg
+    outputs = []
+    ffmpeg_args = ["-y", "-i", str(media.source_video.path)]
+    for job in jobs:
+        ext = job.profile.container or "mp4"
+        temp_output_path, filename = _temp_output(job, temp_output_dir)
+        encoding_params = _build_encoding_params(job)
+        cached = None if job.profile.is_hls else transcode_cache.lookup(media, encoding_params, ext)
+        if cached:
+            logger.info(f"Job {job.id} 命中转码缓存 ({cached.file.name})")
+            _place_output(job, cached.file.path, filename, mode="link")
+            outputs.append((job, None, filename, encoding_params))
+            continue
+        ffmpeg_args += _output_args(job, encoding_params, temp_output_path)
+        outputs.append((job, temp_output_path, filename, encoding_params))
+
+    encoded_ids = [job.id for job, path, _, _ in outputs if path is not None]
+    publisher = ProgressPublisher(encoded_ids, probe.duration if probe else None)
+    try:
+        if encoded_ids:
+            logger.info(f"{label}: 单次解码多路输出 FFmpeg args: {' '.join(ffmpeg_args)}")
+            run_ffmpeg(ffmpeg_args, label=label, duration=probe.duration if probe else None, on_progress=publisher)
+        realtime_factor = publisher.realtime_factor()
+
+        for job, temp_output_path, filename, encoding_params in outputs:
+            if temp_output_path is not None and not job.profile.is_hls:
+                transcode_cache.store(media, encoding_params, job.profile.container or "mp4", temp_output_path)
+            _finalize_output(job, temp_output_path, filename, realtime_factor if temp_output_path else None)
+
+        _check_and_update_project_status(jobs[0].project)
+
+    except Exception as e:
+        logger.error(f"{label} failed: {e}", exc_info=True)
+        for job in jobs:
+            if job.status != TranscodingJob.STATUS.QA_PENDING:
+                job.fail()
+                job.save()
+        _check_and_update_project_status(jobs[0].project)
+        raise
+
+    finally:
+        clear_progress(encoded_ids)
+        for _, temp_output_path, _, _ in outputs:
+            _remove_temp_output(temp_output_path)
+
+
+@shared_task(bind=True, name="apps.workflow.transcoding.tasks.run_profile_benchmark", max_retries=None)
+def run_profile_benchmark(self, profile_ids: List[int]):
+    """
+    对选中的 EncodingProfile 运行基准测试 (结果写入 profile.benchmark_results)。
+    依次编码，按各配置中最大的 cpu_slots 申请槽位，避免与线上转码争抢 CPU 导致测量失真。
+    """
+    profiles = list(EncodingProfile.objects.filter(id__in=profile_ids).order_by("id"))
+    if not profiles:
+        return
+
+    slots = max(profile.cpu_slots for profile in profiles)
+    try:
+        with cpu_slots(f"benchmark:{profiles[0].id}", slots):
+            benchmark_profiles(profiles)
+    except SlotsUnavailable as e:
+        logger.info(f"基准测试 {profile_ids} 等待 CPU 槽位: {e}")
+        raise self.retry(countdown=settings.SCHEDULER_RETRY_DELAY, exc=e)
@@ -0,0 +1,60 @@
+# 文件路径: apps/workflow/transcoding/tests/test_segmented.py
+
+from django.test import SimpleTestCase
+
+from apps.configuration.models import EncodingProfile
+from apps.media_assets.models import KeyframeIndex, MediaProbe
+from apps.workflow.transcoding.services.segmented import plan_segments
+
+
+def _index(timestamps_ms, duration):
+    timestamps_ms = list(timestamps_ms)
+    return KeyframeIndex(data=KeyframeIndex.pack(timestamps_ms), count=len(timestamps_ms), duration=duration)
+
+
+class PlanSegmentsTests(SimpleTestCase):
+    def setUp(self):
+        self.profile = EncodingProfile(name="seg", enable_segmented=True, segment_count=0, min_segment_duration=5)
+        self.probe = MediaProbe(duration=30.0)
+        # 每 2 秒一个关键帧
+        self.index = _index(range(0, 30000, 2000), 30.0)
+
+    def test_segment_count_defaults_to_held_slots(self):
+        segments = plan_segments(self.profile, self.probe, self.index, slots=3)
+        self.assertEqual(segments, [(0.0, 10.0), (10.0, 20.0), (20.0, 30.0)])
+
+    def test_explicit_segment_count_overrides_slots(self):
+        self.profile.segment_count = 2
+        segments = plan_segments(self.profile, self.probe, self.index, slots=8)
+        self.assertEqual(segments, [(0.0, 14.0), (14.0, 30.0)])
+
+    def test_cut_points_snap_to_preceding_keyframe(self):
+        # 关键帧在 0 / 7 / 13 / 25 秒，理想切点 10、20 分别对齐到 7、13
+        index = _index([0, 7000, 13000, 25000], 30.0)
+        segments = plan_segments(self.profile, self.probe, index, slots=3)
+        self.assertEqual(segments, [(0.0, 7.0), (7.0, 13.0), (13.0, 30.0)])
+
+    def test_segments_are_contiguous_and_cover_source(self):
+        segments = plan_segments(self.profile, self.probe, self.index, slots=4)
+        self.assertEqual(segments[0][0], 0.0)
+        self.assertEqual(segments[-1][1], 30.0)
+        for (_, end), (start, _) in zip(segments, segments[1:]):
+            self.assertEqual(end, start)
+
+    def test_min_segment_duration_limits_count(self):
+        self.profile.min_segment_duration = 12
+        segments = plan_segments(self.profile, self.probe, self.index, slots=8)
+        self.assertEqual(len(segments), 2)
+
+    def test_duplicate_cut_points_are_dropped(self):
+        # 只有 0 秒与 20 秒两个关键帧: 切点 7.5 / 15 都对齐到 0 而被丢弃，22.5 对齐到 20
+        index = _index([0, 20000], 30.0)
+        segments = plan_segments(self.profile, self.probe, index, slots=4)
+        self.assertEqual(segments, [(0.0, 20.0), (20.0, 30.0)])
+
+    def test_returns_empty_when_segmenting_is_not_worthwhile(self):
+        self.assertEqual(plan_segments(self.profile, self.probe, self.index, slots=1), [])
+        self.assertEqual(plan_segments(self.profile, MediaProbe(duration=8.0), self.index, slots=4), [])
+        self.assertEqual(plan_segments(self.profile, None, self.index, slots=4), [])
+        self.assertEqual(plan_segments(self.profile, self.probe, None, slots=4), [])
+        self.assertEqual(plan_segments(self.profile, self.probe, _index([0], 30.0), slots=4), [])
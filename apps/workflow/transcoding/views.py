@@ -1,11 +1,13 @@
 # 文件路径: apps/workflow/transcoding/views.py
 
+from uuid import UUID
+
 from django.contrib import messages
 from django.shortcuts import get_object_or_404, redirect
 
-from ..models import TranscodingJob, TranscodingProject
+from ..models import TranscodingProject
 from .forms import StartTranscodingForm
-from .tasks import run_transcoding_job
+from .services.dispatch import dispatch_transcoding
 
 
 def trigger_transcoding_view(request, project_id):
@@ -18,22 +20,18 @@ def trigger_transcoding_view(request, project_id):
         messages.error(request, f"项目《{project.name}》未选择编码配置，无法启动。")
         return redirect("admin:workflow_transcodingproject_changelist")
 
-    media_files = project.asset.medias.all()
-    jobs_created_count = 0
-    for media in media_files:
-        job, created = TranscodingJob.objects.get_or_create(
-            project=project,
-            media=media,
-            profile=project.encoding_profile,  # 使用项目预设的 profile
-            defaults={"status": "PENDING"},
-        )
-        run_transcoding_job.delay(job.id)
-        jobs_created_count += 1
-
-    if jobs_created_count > 0:
-        messages.success(request, f"已成功为《{project.name}》派发 {jobs_created_count} 个转码任务。")
-        project.status = TranscodingProject.STATUS.PROCESSING
-        project.save()
+    # 可选: ?media=<id>&media=<id> 只处理部分媒体 (例如只重跑失败的剧集)
+    try:
+        media_ids = [UUID(value) for value in request.GET.getlist("media")] or None
+    except ValueError:
+        messages.error(request, "参数 media 不是有效的媒体 ID。")
+        return redirect("admin:workflow_transcodingproject_changelist")
+    created_count, dispatched_count = dispatch_transcoding(project, media_ids=media_ids)
+
+    if dispatched_count > 0:
+        messages.success(request, f"已成功为《{project.name}》派发 {dispatched_count} 个转码任务 (新建 {created_count} 个)。")
+    elif project.asset.medias.exists():
+        messages.info(request, f"项目《{project.name}》没有需要派发的转码任务 (已完成或正在处理中)。")
     else:
         messages.warning(request, f"项目《{project.name}》下没有找到可用于转码的媒体文件。")
 
@@ -55,23 +53,12 @@ def start_transcoding_jobs_view(request, project_id):
     if form.is_valid():
         print("--- [DEBUG] 表单有效 (Form is valid) ---")  # 诊断点 2
         profile = form.cleaned_data["profile"]
-        media_files = project.asset.medias.all()
-
-        jobs_created_count = 0
-        for media in media_files:
-            job, created = TranscodingJob.objects.get_or_create(
-                project=project, media=media, profile=profile, defaults={"status": "PENDING"}
-            )
-            print(f"--- [DEBUG] 准备派发 Job ID: {job.id} ---")  # 诊断点 3
-            run_transcoding_job.delay(job.id)
-            jobs_created_count += 1
-
-        if jobs_created_count > 0:
-            messages.success(request, f"已成功为 {jobs_created_count} 个媒体文件派发转码任务。")
-            project.status = TranscodingProject.STATUS.PROCESSING
-            project.save()
+        created_count, dispatched_count = dispatch_transcoding(project, profiles=[profile])
+
+        if dispatched_count > 0:
+            messages.success(request, f"已成功为 {dispatched_count} 个媒体文件派发转码任务 (新建 {created_count} 个)。")
         else:
-            messages.warning(request, "此项目下没有找到可用于转码的媒体文件。")
+            messages.warning(request, "此项目下没有需要派发转码任务的媒体文件。")
     else:
         # --- ↓↓↓ 这是最关键的诊断点 ↓↓↓ ---
         print("--- [DEBUG] 表单无效 (Form is invalid) ---")
@@ -0,0 +1,104 @@
+// frontend/src/features/media/BatchUpload/chunkedUpload.js
+// 断点续传上传器：创建/恢复会话 -> 按 offset 顺序 PUT 分块 (Content-Range + CRC32) -> 通知服务端组装
+
+const MAX_RETRIES = 5;
+
+// --- CRC32 (非 HTTPS 环境下浏览器没有 crypto.subtle，因此使用 CRC32 做分块校验) ---
+const CRC_TABLE = (() => {
+    const table = new Uint32Array(256);
+    for (let n = 0; n < 256; n++) {
+        let c = n;
+        for (let k = 0; k < 8; k++) {
+            c = c & 1 ? 0xedb88320 ^ (c >>> 1) : c >>> 1;
+        }
+        table[n] = c >>> 0;
+    }
+    return table;
+})();
+
+const crc32Hex = (buffer) => {
+    const bytes = new Uint8Array(buffer);
+    let crc = 0xffffffff;
+    for (let i = 0; i < bytes.length; i++) {
+        crc = CRC_TABLE[(crc ^ bytes[i]) & 0xff] ^ (crc >>> 8);
+    }
+    return ((crc ^ 0xffffffff) >>> 0).toString(16).padStart(8, '0');
+};
+
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+const jsonRequest = async (url, options, csrfToken) => {
+    const response = await fetch(url, {
+        credentials: 'same-origin',
+        ...options,
+        headers: { 'X-CSRFToken': csrfToken, ...(options.headers || {}) },
+    });
+    const data = await response.json().catch(() => ({}));
+    return { ok: response.ok, status: response.status, data };
+};
+
+export const chunkedUpload = async ({ file, sessionsUrl, csrfToken, onProgress }) => {
+    // 1. 创建或恢复会话 (服务端按 文件名+大小 复用未完成的会话)
+    const created = await jsonRequest(sessionsUrl, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ filename: file.name, size: file.size }),
+    }, csrfToken);
+    if (!created.ok) {
+        throw new Error(created.data.message || `创建上传会话失败 (${created.status})`);
+    }
+
+    const sessionUrl = `${sessionsUrl}${created.data.session_id}/`;
+    const chunkSize = created.data.chunk_size;
+    let offset = created.data.offset;
+    let retries = 0;
+
+    // 2. 从服务端确认的 offset 开始顺序追加分块
+    while (offset < file.size) {
+        const end = Math.min(offset + chunkSize, file.size);
+        const buffer = await file.slice(offset, end).arrayBuffer();
+
+        let result;
+        try {
+            result = await jsonRequest(sessionUrl, {
+                method: 'PUT',
+                headers: {
+                    'Content-Type': 'application/octet-stream',
+                    'Content-Range': `bytes ${offset}-${end - 1}/${file.size}`,
+                    'X-Chunk-Checksum': `crc32=${crc32Hex(buffer)}`,
+                },
+                body: buffer,
+            }, csrfToken);
+        } catch (networkError) {
+            result = { ok: false, status: 0, data: {} };
+        }
+
+        if (result.ok) {
+            offset = result.data.offset;
+            retries = 0;
+            onProgress?.(Math.round((offset / file.size) * 100));
+            continue;
+        }
+
+        if (++retries > MAX_RETRIES) {
+            throw new Error(result.data.message || `分块上传失败 (${result.status})`);
+        }
+        // 409: 偏移不一致，以服务端记录为准；其他错误: 重新查询偏移后退避重试
+        if (result.status === 409 && typeof result.data.offset === 'number') {
+            offset = result.data.offset;
+        } else {
+            await sleep(1000 * 2 ** retries);
+            const status = await jsonRequest(sessionUrl, { method: 'GET' }, csrfToken).catch(() => null);
+            if (status?.ok) {
+                offset = status.data.offset;
+            }
+        }
+    }
+
+    // 3. 服务端组装
+    const completed = await jsonRequest(`${sessionUrl}complete/`, { method: 'POST' }, csrfToken);
+    if (!completed.ok) {
+        throw new Error(completed.data.message || `文件组装失败 (${completed.status})`);
+    }
+    return completed.data;
+};
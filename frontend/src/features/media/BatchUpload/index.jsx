@@ -8,6 +8,7 @@ import {
     InfoCircleOutlined,
     RollbackOutlined
 } from '@ant-design/icons';
+import { chunkedUpload } from './chunkedUpload';
 
 // 简单的内联样式，你也可以选择创建同级 css 文件引入
 const styles = {
@@ -57,6 +58,15 @@ const BatchUpload = ({ context }) => {
         action: urls.uploadApi,
         headers: { 'X-CSRFToken': csrfToken },
         accept: '.mp4,.mov,.srt',
+        // 使用断点续传协议代替整文件 POST，网络中断后可从已确认的偏移继续
+        customRequest({ file, onProgress, onSuccess, onError }) {
+            chunkedUpload({
+                file,
+                sessionsUrl: urls.uploadSessions,
+                csrfToken,
+                onProgress: (percent) => onProgress({ percent }),
+            }).then(onSuccess).catch(onError);
+        },
         onChange(info) {
             const { status } = info.file;
             if (status === 'done') {
@@ -4,6 +4,7 @@
 Django settings for visify_ssw project.
 """
 import logging
+import os
 import sys
 from pathlib import Path
 
@@ -168,6 +169,15 @@ AWS_SECRET_ACCESS_KEY = config("AWS_SECRET_ACCESS_KEY", default="")
 AWS_STORAGE_BUCKET_NAME = config("AWS_STORAGE_BUCKET_NAME", default="")
 AWS_S3_REGION_NAME = config("AWS_S3_REGION_NAME", default="")
 AWS_S3_CUSTOM_DOMAIN = config("AWS_S3_CUSTOM_DOMAIN", default=None)
+# S3 兼容服务地址 (如本地 MinIO: http://minio:9000)；留空则使用 AWS 官方端点
+AWS_S3_ENDPOINT_URL = config("AWS_S3_ENDPOINT_URL", default=None)
+
+# 分片上传参数: 超过阈值的文件按分片大小切分，由多个线程并发上传
+S3_MULTIPART_THRESHOLD = config("S3_MULTIPART_THRESHOLD", default=16 * 1024 * 1024, cast=int)
+S3_MULTIPART_CHUNK_SIZE = config("S3_MULTIPART_CHUNK_SIZE", default=16 * 1024 * 1024, cast=int)
+S3_MAX_CONCURRENCY = config("S3_MAX_CONCURRENCY", default=8, cast=int)
+# 每个共享 S3 客户端的连接池大小；批量分发时多个任务共用一个客户端，应不小于 批量并发数 x S3_MAX_CONCURRENCY
+S3_MAX_POOL_CONNECTIONS = config("S3_MAX_POOL_CONNECTIONS", default=64, cast=int)
 
 # 1. 如果数据库可用，从 DB 加载 AWS 凭证
 if IS_DB_READY and FINAL_STORAGE_BACKEND == "s3":
@@ -232,6 +242,34 @@ CELERY_IMPORTS = (
     "apps.workflow.creative.tasks",
 )
 
+# --- 队列划分 ---
+# light: 状态轮询、Label Studio 导出、蓝图生成、交付上传等 I/O 或轻量任务
+# heavy: FFmpeg 解码/编码等 CPU 密集任务，由独立 worker 消费，避免长转码阻塞轻任务
+# 注意: 原默认队列为 celery，轻任务 worker 仍同时消费它 (见 docker-compose.base.yml)，升级前已入队的消息照常执行
+CELERY_TASK_DEFAULT_QUEUE = "light"
+CELERY_HEAVY_QUEUE = "heavy"
+CELERY_TASK_ROUTES = {
+    name: {"queue": CELERY_HEAVY_QUEUE}
+    for name in (
+        "apps.media_assets.tasks.ingest_media_files",
+        "apps.media_assets.tasks.process_single_media_file",
+        "apps.media_assets.tasks.generate_media_thumbnails",
+        "apps.media_assets.tasks.generate_media_waveform",
+        "apps.workflow.transcoding.tasks.run_transcoding_job",
+        "apps.workflow.transcoding.tasks.run_multi_transcoding_job",
+        "apps.workflow.transcoding.tasks.run_profile_benchmark",
+        "apps.workflow.creative.tasks.start_synthesis_task",
+    )
+}
+# 长任务每个进程只预取一个，避免排队的重任务被某个忙碌的进程囤住
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
+# --- 重任务准入 (CPU 槽位) ---
+# 全局槽位上限，默认等于 CPU 核数；每个重任务按 EncodingProfile.cpu_slots (其它任务为 1) 占用槽位，
+# 槽位不足时任务在 SCHEDULER_RETRY_DELAY 秒后重新排队
+SCHEDULER_CPU_SLOTS = config("SCHEDULER_CPU_SLOTS", default=os.cpu_count() or 1, cast=int)
+SCHEDULER_RETRY_DELAY = config("SCHEDULER_RETRY_DELAY", default=30, cast=int)
+
 # ----------------------------------------------------------------------
 # VII. 外部集成服务 URL/TOKEN (EXTERNAL INTEGRATION SERVICES)
 # ----------------------------------------------------------------------
@@ -279,6 +317,49 @@ CORS_ALLOW_HEADERS = ["accept", "authorization", "content-type", "user-agent", "
 FFMPEG_VIDEO_BITRATE = config("FFMPEG_VIDEO_BITRATE", default="2M")
 FFMPEG_VIDEO_PRESET = config("FFMPEG_VIDEO_PRESET", default="fast")
 
+# 5. 媒资入库放置方式 (link / move / copy)
+# link: 同盘硬链接，batch_uploads 中的原文件保留；move: 同盘 rename；跨设备时均回退为分块复制
+INGEST_PLACEMENT_MODE = config("INGEST_PLACEMENT_MODE", default="link")
+
+# 6. 断点续传分块大小 (bytes)，由服务端下发给前端
+UPLOAD_CHUNK_SIZE = config("UPLOAD_CHUNK_SIZE", default=8 * 1024 * 1024, cast=int)
+
+# 7. 缩略图雪碧图 (入库后生成，供前端拖动预览)
+# interval: 每 THUMBNAIL_INTERVAL 秒取一帧；scene: 画面变化超过 THUMBNAIL_SCENE_THRESHOLD 时取帧
+THUMBNAIL_MODE = config("THUMBNAIL_MODE", default="interval")
+THUMBNAIL_INTERVAL = config("THUMBNAIL_INTERVAL", default=10, cast=float)
+THUMBNAIL_SCENE_THRESHOLD = config("THUMBNAIL_SCENE_THRESHOLD", default=0.3, cast=float)
+THUMBNAIL_WIDTH = config("THUMBNAIL_WIDTH", default=160, cast=int)
+THUMBNAIL_GRID = config("THUMBNAIL_GRID", default="10x10")
+
+# 8. 音频波形峰值 (audiowaveform .dat 格式，供字幕编辑器绘制波形)
+# 默认 16kHz 单声道，每 160 个采样一对 min/max (10ms 精度)，8 位存储约 0.7MB/小时
+WAVEFORM_SAMPLE_RATE = config("WAVEFORM_SAMPLE_RATE", default=16000, cast=int)
+WAVEFORM_SAMPLES_PER_PIXEL = config("WAVEFORM_SAMPLES_PER_PIXEL", default=160, cast=int)
+WAVEFORM_BITS = config("WAVEFORM_BITS", default=8, cast=int)
+
+# 9. 转码结果缓存 (按 源内容哈希 + 规范化 FFmpeg 参数 + 封装格式 复用产出)
+# 缓存总大小超过 TRANSCODE_CACHE_QUOTA_GB 时按最近使用时间淘汰
+TRANSCODE_CACHE_ENABLED = config("TRANSCODE_CACHE_ENABLED", default=True, cast=bool)
+TRANSCODE_CACHE_QUOTA_GB = config("TRANSCODE_CACHE_QUOTA_GB", default=100, cast=float)
+
+# 10. 转码进度写入 Redis 的最小间隔 (秒)，供后台显示百分比与预计剩余时间
+TRANSCODING_PROGRESS_INTERVAL = config("TRANSCODING_PROGRESS_INTERVAL", default=2.0, cast=float)
+
+# 11. 分发带宽上限 (Mbit/s，0 表示不限)。边缘站点与标注人员共用上行带宽，大文件交付时需要限速
+# WORKER: 每个 worker 进程内所有上传线程共享；GLOBAL: 所有 worker 共享 (Redis 令牌桶)。两者同时生效
+DELIVERY_WORKER_BANDWIDTH_MBIT = config("DELIVERY_WORKER_BANDWIDTH_MBIT", default=0, cast=float)
+DELIVERY_GLOBAL_BANDWIDTH_MBIT = config("DELIVERY_GLOBAL_BANDWIDTH_MBIT", default=0, cast=float)
+
+# 12. 批量分发: 窗口期 (秒) 内完成的分发任务合并为一批，按目标分组、共用连接池并发交付 (0 表示逐个派发)
+# 每批最多 DELIVERY_BATCH_MAX_JOBS 个任务，每个目标同时交付 DELIVERY_BATCH_CONCURRENCY 个
+DELIVERY_BATCH_WINDOW = config("DELIVERY_BATCH_WINDOW", default=5, cast=float)
+DELIVERY_BATCH_MAX_JOBS = config("DELIVERY_BATCH_MAX_JOBS", default=100, cast=int)
+DELIVERY_BATCH_CONCURRENCY = config("DELIVERY_BATCH_CONCURRENCY", default=8, cast=int)
+
+# 13. "处理中"的分发任务超过该秒数没有任何进度 (分片写入会刷新 modified) 时视为 worker 已退出，允许在后台重试
+DELIVERY_STALE_AFTER = config("DELIVERY_STALE_AFTER", default=1800, cast=int)
+
 # ----------------------------------------------------------------------
 # IX. ADMIN/UNFOLD 配置 (ADMIN/UNFOLD CONFIGURATION)
 # ----------------------------------------------------------------------
@@ -355,6 +436,11 @@ UNFOLD = {
                 "separator": True,
                 "items": [
                     {"title": "分发任务", "icon": "send", "link": reverse_lazy("admin:workflow_deliveryjob_changelist")},
+                    {
+                        "title": "分发目标",
+                        "icon": "cloud_upload",
+                        "link": reverse_lazy("admin:configuration_deliverytarget_changelist"),
+                    },
                 ],
             },
             {